@@ -0,0 +1,6 @@
+"""Backend helpers for the Qlib GUI (``qlib_gui.py``).
+
+Everything that has to run outside the Streamlit script thread (worker
+processes, caches shared between sessions) lives here so that it can be
+imported and pickled by child processes.
+"""
@@ -0,0 +1,142 @@
+"""Performance analytics for many backtest return series at once.
+
+Every function takes a (dates x strategies) frame of daily returns, one column
+per strategy (a single backtest is a one-column frame), and works on the whole
+matrix with NumPy operations along the date axis instead of looping over the
+strategies. Missing days (NaN) of a strategy count as flat.
+"""
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+DEFAULT_ROLLING_WINDOW = 63
+SUMMARY_METRICS = (
+    "total_return",
+    "annual_return",
+    "annual_volatility",
+    "sharpe_ratio",
+    "max_drawdown",
+    "calmar_ratio",
+    "win_rate",
+    "daily_mean",
+    "daily_std",
+    "skewness",
+    "kurtosis",
+    "var_95",
+    "max_drawdown_days",
+    "trading_days",
+)
+
+
+def returns_matrix(series: dict) -> pd.DataFrame:
+    """(dates x strategies) frame from ``{name: daily return series}``, aligned on the union of dates."""
+    return pd.DataFrame(series).sort_index().astype(np.float64)
+
+
+def cumulative(returns: pd.DataFrame) -> pd.DataFrame:
+    """Growth of 1 per strategy."""
+    return pd.DataFrame(np.cumprod(1 + returns.fillna(0).to_numpy(), axis=0), index=returns.index, columns=returns.columns)
+
+
+def drawdowns(returns: pd.DataFrame) -> pd.DataFrame:
+    """Drawdown from the running peak of the cumulative curve (0 at a new high)."""
+    growth = cumulative(returns).to_numpy()
+    return pd.DataFrame(growth / np.maximum.accumulate(growth, axis=0) - 1, index=returns.index, columns=returns.columns)
+
+
+def _durations(drawdown: np.ndarray) -> np.ndarray:
+    # 每个日期上最近一次创新高的位置（第一天总是峰值），与当前位置之差即回撤持续天数
+    steps = np.arange(len(drawdown))[:, None]
+    last_peak = np.maximum.accumulate(np.where(drawdown < 0, 0, steps), axis=0)
+    return steps - last_peak
+
+
+def drawdown_durations(returns: pd.DataFrame) -> pd.DataFrame:
+    """Trading days since the last peak, per date and strategy."""
+    return pd.DataFrame(_durations(drawdowns(returns).to_numpy()), index=returns.index, columns=returns.columns)
+
+
+def rolling_sharpe(returns: pd.DataFrame, window: int = DEFAULT_ROLLING_WINDOW) -> pd.DataFrame:
+    """Annualised Sharpe ratio over a trailing ``window`` of days, from cumulative sums of r and r^2."""
+    r = returns.fillna(0).to_numpy()
+    padded = np.zeros((1, r.shape[1]))
+    s1 = np.concatenate([padded, np.cumsum(r, axis=0)])
+    s2 = np.concatenate([padded, np.cumsum(r * r, axis=0)])
+    out = np.full(r.shape, np.nan)
+    if len(r) >= window:
+        total = s1[window:] - s1[:-window]
+        total_sq = s2[window:] - s2[:-window]
+        mean = total / window
+        var = np.maximum(total_sq - window * mean * mean, 0) / (window - 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[window - 1 :] = np.where(var > 0, mean / np.sqrt(var) * np.sqrt(TRADING_DAYS), np.nan)
+    return pd.DataFrame(out, index=returns.index, columns=returns.columns)
+
+
+def monthly_returns(returns: pd.DataFrame) -> pd.DataFrame:
+    """(months x strategies) compounded returns, one ``groupby`` over all strategies."""
+    months = returns.index.to_period("M")
+    growth = (1 + returns.fillna(0)).groupby(months).prod()
+    return growth - 1
+
+
+def monthly_table(monthly: pd.Series) -> pd.DataFrame:
+    """(year x month number) table of one strategy's monthly returns."""
+    return pd.DataFrame({"year": monthly.index.year, "month": monthly.index.month, "return": monthly.values}).pivot(
+        index="year", columns="month", values="return"
+    )
+
+
+def summary(returns: pd.DataFrame) -> pd.DataFrame:
+    """(strategies x ``SUMMARY_METRICS``) table, computed as on the Backtest page."""
+    r = returns.to_numpy(dtype=np.float64)
+    valid = np.isfinite(r)
+    n = valid.sum(axis=0)
+    r0 = np.where(valid, r, 0.0)
+    growth = np.cumprod(1 + r0, axis=0)
+    drawdown = growth / np.maximum.accumulate(growth, axis=0) - 1
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total = growth[-1] - 1 if len(r) else np.full(r.shape[1], np.nan)
+        annual = (1 + total) ** (TRADING_DAYS / n) - 1
+        mean = r0.sum(axis=0) / n
+        centered = np.where(valid, r - mean, 0.0)
+        m2 = (centered**2).sum(axis=0)
+        std = np.sqrt(m2 / (n - 1))
+        volatility = std * np.sqrt(TRADING_DAYS)
+        max_drawdown = drawdown.min(axis=0) if len(r) else np.full(r.shape[1], np.nan)
+        sharpe = np.where(volatility > 0, annual / volatility, 0.0)
+        calmar = np.where(max_drawdown != 0, annual / np.abs(max_drawdown), 0.0)
+        win_rate = (r0 > 0).sum(axis=0) / n
+        # 与 pandas Series.skew / Series.kurt 相同的无偏估计
+        m2n, m3n, m4n = m2 / n, (centered**3).sum(axis=0) / n, (centered**4).sum(axis=0) / n
+        skewness = np.where(m2n > 0, np.sqrt(n * (n - 1)) / (n - 2) * m3n / m2n**1.5, 0.0)
+        kurtosis = np.where(m2n > 0, (n - 1) / ((n - 2) * (n - 3)) * ((n + 1) * m4n / m2n**2 - 3 * (n - 1)), 0.0)
+    skewness[n < 3] = np.nan
+    kurtosis[n < 4] = np.nan
+    var_95 = np.nanpercentile(r, 5, axis=0) if valid.any() else np.full(r.shape[1], np.nan)
+    max_duration = _durations(drawdown).max(axis=0) if len(r) else np.zeros(r.shape[1])
+
+    table = pd.DataFrame(
+        {
+            "total_return": total,
+            "annual_return": annual,
+            "annual_volatility": volatility,
+            "sharpe_ratio": sharpe,
+            "max_drawdown": max_drawdown,
+            "calmar_ratio": calmar,
+            "win_rate": win_rate,
+            "daily_mean": mean,
+            "daily_std": std,
+            "skewness": skewness,
+            "kurtosis": kurtosis,
+            "var_95": var_95,
+            "max_drawdown_days": max_duration,
+            "trading_days": n,
+        },
+        index=returns.columns,
+    )
+    # 无有效数据的策略所有指标为空
+    table.loc[n == 0, list(SUMMARY_METRICS[:-1])] = np.nan
+    return table
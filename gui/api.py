@@ -0,0 +1,367 @@
+"""Local HTTP/JSON API mirroring the Data View, Model Training and Backtest actions.
+
+The service answers from the same caches (columnar data cache, expression cache,
+backtest results, model registry) and submits to the same job table as the
+Streamlit app, so batch callers reuse everything the GUI has warmed up. It runs
+either inside the Streamlit server process (``QLIB_GUI_API_PORT`` set; started
+by ``qlib_gui.py`` in a thread next to the shared Qlib initialisation) or on its
+own with ``python -m gui.api --port 8503``, which initialises Qlib once and keeps
+it warm for all requests.
+
+Endpoints (request and response bodies are JSON):
+
+- ``GET /health``: Qlib state and the calendar range of the data;
+- ``POST /data``: ``{instruments, fields, start_date, end_date, format}``; the frame
+  as ``{"columns", "index_names", "data"}`` rows, or an Arrow IPC stream with
+  ``"format": "arrow"``;
+- ``POST /train`` and ``POST /backtest``: GUI parameters (missing ones take the GUI
+  defaults); ``{"status": "done", "result"}`` from the registry / result cache, or
+  ``{"status": "queued", "job_id"}``;
+- ``GET /jobs/<id>``, ``GET /jobs/<id>/result``, ``DELETE /jobs/<id>``: job state,
+  result and cancellation;
+- ``GET /models``: the model registry.
+"""
+
+import argparse
+import json
+import math
+import threading
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from gui import data_range, jobs, settings, telemetry
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+# 与界面控件的默认值一致，保证相同请求命中界面写入的缓存
+TRAIN_DEFAULTS = {
+    "model_type": "LightGBM",
+    "valid_ratio": 0.2,
+    "learning_rate": 0.1,
+    "max_depth": 6,
+    "n_estimators": 100,
+    "min_samples_split": 2,
+    "seed": 42,
+}
+BACKTEST_DEFAULTS = {
+    "strategy": "long_short",
+    "rebalance": "daily",
+    "initial_capital": 1000000.0,
+    "max_position": 0.1,
+    "stop_loss": 0.1,
+    "take_profit": 0.2,
+    "max_drawdown_limit": 0.15,
+    "commission_rate": 0.001,
+    "slippage": 0.0005,
+}
+_TRAIN_TYPES = {"valid_ratio": float, "learning_rate": float, "max_depth": int, "n_estimators": int,
+                "min_samples_split": int, "seed": int}
+_BACKTEST_TYPES = {name: float for name in BACKTEST_DEFAULTS if name not in ("strategy", "rebalance")}
+
+
+class ApiError(Exception):
+    """Client error, answered with status 400."""
+
+
+def to_jsonable(obj):
+    """Convert results (frames, series, arrays, timestamps, NaN) into plain JSON values."""
+    if isinstance(obj, dict):
+        return {str(key): to_jsonable(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(value) for value in obj]
+    if isinstance(obj, pd.Series):
+        return {"index": to_jsonable(list(obj.index)), "values": to_jsonable(obj.tolist())}
+    if isinstance(obj, pd.DataFrame):
+        return frame_payload(obj)
+    if isinstance(obj, np.ndarray):
+        return to_jsonable(obj.tolist())
+    if isinstance(obj, (pd.Timestamp, datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    return obj
+
+
+def frame_payload(df: pd.DataFrame) -> dict:
+    flat = df.reset_index()
+    return {
+        "columns": [str(c) for c in flat.columns],
+        "index_names": [name for name in df.index.names if name is not None],
+        "data": to_jsonable(flat.to_numpy().tolist()),
+    }
+
+
+def arrow_stream(df: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _parse_date(body: dict, name: str) -> date:
+    try:
+        return date.fromisoformat(str(body[name])[:10])
+    except KeyError:
+        raise ApiError(f"missing {name}")
+    except ValueError:
+        raise ApiError(f"invalid {name}: {body[name]}")
+
+
+def _instruments(body: dict) -> list:
+    instruments = body.get("instruments")
+    if isinstance(instruments, str):
+        instruments = instruments.split(",")
+    instruments = [s.strip().upper() for s in instruments or [] if s.strip()]
+    if not instruments:
+        raise ApiError("instruments must list at least one code")
+    return instruments
+
+
+def _clamped_range(body: dict):
+    start, end = _parse_date(body, "start_date"), _parse_date(body, "end_date")
+    if start >= end:
+        raise ApiError("start_date must be before end_date")
+    bounds = data_range.calendar_bounds()
+    clamped = data_range.clamp_range(start, end, bounds)
+    if clamped is None:
+        raise ApiError(f"no data between {start} and {end}; data covers {bounds[0]} ~ {bounds[1]}")
+    return clamped, bounds
+
+
+def _typed(body: dict, defaults: dict, types: dict) -> dict:
+    config = {}
+    for name, default in defaults.items():
+        value = body.get(name, default)
+        try:
+            config[name] = types[name](value) if name in types else value
+        except (TypeError, ValueError):
+            raise ApiError(f"invalid {name}: {value}")
+    return config
+
+
+def training_config(body: dict) -> dict:
+    """The Model Training page configuration of a request body."""
+    (start, end), bounds = _clamped_range(body)
+    config = _typed(body, TRAIN_DEFAULTS, _TRAIN_TYPES)
+    config.update(
+        {
+            "instruments": _instruments(body),
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "data_end": bounds[1].isoformat() if bounds else None,
+        }
+    )
+    return config
+
+
+def backtest_config(body: dict) -> dict:
+    """The Backtest page configuration of a request body."""
+    from gui import backtest
+
+    (start, end), bounds = _clamped_range(body)
+    config = _typed(body, BACKTEST_DEFAULTS, _BACKTEST_TYPES)
+    if config["strategy"] not in backtest.STRATEGY_TYPES:
+        raise ApiError(f"strategy must be one of {', '.join(backtest.STRATEGY_TYPES)}")
+    if config["rebalance"] not in backtest.REBALANCE_STEPS:
+        raise ApiError(f"rebalance must be one of {', '.join(backtest.REBALANCE_STEPS)}")
+    config.update(
+        {
+            "instruments": _instruments(body),
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "benchmark": backtest.BENCHMARK,
+            "signal": body.get("signal", backtest.DEFAULT_SIGNAL),
+            "data_end": bounds[1].isoformat() if bounds else None,
+        }
+    )
+    return config
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Request handler; ``server.ready()`` blocks until Qlib is initialised."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload):
+        self._send(status, json.dumps(to_jsonable(payload)).encode("utf-8"))
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            raise ApiError("request body is not valid JSON")
+        if not isinstance(body, dict):
+            raise ApiError("request body must be a JSON object")
+        return body
+
+    def _dispatch(self, method: str):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        parts = [part for part in path.split("/") if part]
+        try:
+            with telemetry.stage("api", f"{method} /{parts[0] if parts else ''}"):
+                if method == "GET" and parts == ["health"]:
+                    return self._health()
+                self.server.ready()
+                if method == "POST" and parts == ["data"]:
+                    return self._data(self._body())
+                if method == "POST" and parts == ["train"]:
+                    return self._train(self._body())
+                if method == "POST" and parts == ["backtest"]:
+                    return self._backtest(self._body())
+                if method == "GET" and parts == ["models"]:
+                    return self._models()
+                if len(parts) in (2, 3) and parts[0] == "jobs":
+                    return self._job(method, parts[1], parts[2] if len(parts) == 3 else None)
+                self._send_json(404, {"error": f"no route for {method} {path}"})
+        except ApiError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _health(self):
+        bounds = data_range.calendar_bounds()
+        self._send_json(200, {"qlib_initialized": self.server.is_ready(), "data_range": bounds})
+
+    def _data(self, body: dict):
+        from gui import dataload
+
+        fields = body.get("fields") or ["close"]
+        (start, end), _ = _clamped_range(body)
+        try:
+            df = dataload.load_frame(_instruments(body), start, end, fields, action="api")
+        except Exception as e:
+            if str(e).startswith(("No_data_found_for_dates", "Date_out_of_range")):
+                raise ApiError(str(e))
+            raise
+        with telemetry.stage("api", "serialise") as record:
+            if body.get("format") == "arrow":
+                payload = arrow_stream(df)
+                self._send(200, telemetry.measure(record, payload), ARROW_MIME)
+            else:
+                payload = json.dumps(frame_payload(df)).encode("utf-8")
+                self._send(200, telemetry.measure(record, payload))
+
+    def _train(self, body: dict):
+        from gui import registry, training
+
+        config = training_config(body)
+        if config["model_type"] not in registry.HYPERPARAMS:
+            raise ApiError(f"model_type must be one of {', '.join(registry.HYPERPARAMS)}")
+        _, key = training.resolve_key(config)
+        entry = registry.lookup(key)
+        telemetry.cache_event("model_registry", entry is not None)
+        if entry is not None:
+            return self._send_json(200, {"status": jobs.DONE, "model_key": key, "result": entry["result"]})
+        job_id = jobs.get_queue().submit(
+            "training", training.train_model, config, label=f"{config['model_type']} ({len(config['instruments'])}) [api]"
+        )
+        self._send_json(202, {"status": jobs.QUEUED, "job_id": job_id, "model_key": key})
+
+    def _backtest(self, body: dict):
+        from gui import backtest
+
+        config = backtest_config(body)
+        cached = backtest.load_cached(config)
+        if cached is not None:
+            return self._send_json(200, {"status": jobs.DONE, "result": cached})
+        job_id = jobs.get_queue().submit(
+            "backtest", backtest.run_backtest, config, label=f"{config['strategy']} ({len(config['instruments'])}) [api]"
+        )
+        self._send_json(202, {"status": jobs.QUEUED, "job_id": job_id})
+
+    def _models(self):
+        from gui import registry
+
+        self._send_json(200, {"models": registry.list_entries()})
+
+    def _job(self, method: str, job_id: str, sub: str):
+        job_queue = jobs.get_queue()
+        if method == "DELETE" and sub is None:
+            return self._send_json(200, {"cancelled": job_queue.cancel(job_id)})
+        job = job_queue.get(job_id)
+        if job is None:
+            return self._send_json(404, {"error": f"unknown job {job_id}"})
+        if method == "GET" and sub is None:
+            return self._send_json(200, job)
+        if method == "GET" and sub == "result":
+            if job["status"] != jobs.DONE:
+                return self._send_json(409, {"error": f"job is {job['status']}", "status": job["status"]})
+            return self._send_json(200, {"status": jobs.DONE, "result": job_queue.result(job_id)})
+        self._send_json(404, {"error": f"no route for {method} {self.path}"})
+
+
+class ApiServer(ThreadingHTTPServer):
+    """Threaded HTTP server; ``ready`` is called (and must block) until Qlib is initialised."""
+
+    daemon_threads = True
+
+    def __init__(self, address, ready):
+        super().__init__(address, ApiHandler)
+        self._ready = ready
+        self._ready_event = threading.Event()
+
+    def ready(self):
+        if not self._ready_event.is_set():
+            if not self._ready():
+                raise RuntimeError("Qlib is not initialised")
+            self._ready_event.set()
+
+    def is_ready(self) -> bool:
+        return self._ready_event.is_set()
+
+
+def start_in_thread(port: int, ready, host: str = "127.0.0.1") -> ApiServer:
+    """Serve the API from a daemon thread of the current process (used by ``qlib_gui.py``)."""
+    server = ApiServer((host, port), ready)
+    threading.Thread(target=server.serve_forever, name="qlib-gui-api", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Qlib GUI HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=settings.API_PORT or 8503)
+    args = parser.parse_args()
+
+    import qlib
+    from qlib.constant import REG_CN
+
+    qlib.init(provider_uri=settings.provider_uri(), region=REG_CN)
+    server = ApiServer((args.host, args.port), ready=lambda: True)
+    server.ready()
+    print(f"Qlib GUI API listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
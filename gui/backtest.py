@@ -0,0 +1,208 @@
+"""Backtest job for the Backtest page and its on-disk result cache.
+
+A finished run is pickled under ``<CACHE_DIR>/backtest/<key>.pkl`` where ``key``
+is the hash of every input that changes the result (symbols, dates, strategy,
+risk and cost parameters, signal and the last calendar date of the data), so
+re-opening a configuration returns immediately in any session.
+"""
+
+import copy
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from gui import settings, telemetry
+from gui.utils import atomic_write_bytes, stable_hash
+
+BENCHMARK = "SH000300"
+# 默认信号：20 日动量；也可以是 "model:<key>"，即注册表中模型的预测值
+DEFAULT_SIGNAL = "$close/Ref($close, 20) - 1"
+REBALANCE_STEPS = {"daily": 1, "weekly": 5, "monthly": 21}
+STRATEGY_TYPES = ("long_short", "long_only", "market_neutral")
+
+
+def cache_key(config: dict) -> str:
+    """Cache key of a backtest configuration; the symbol order does not matter."""
+    key_config = dict(config)
+    key_config["instruments"] = sorted(config["instruments"])
+    return stable_hash(key_config)
+
+
+def _cache_file(key: str) -> str:
+    return settings.cache_path("backtest", f"{key}.pkl")
+
+
+def load_cached(config: dict):
+    """Return the cached result of ``config`` or None."""
+    path = _cache_file(cache_key(config))
+    result = None
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as fp:
+                result = pickle.load(fp)
+        except Exception:
+            # a truncated or incompatible entry is treated as a miss and overwritten later
+            result = None
+    telemetry.cache_event("backtest", result is not None)
+    return result
+
+
+def store_cached(config: dict, result: dict):
+    atomic_write_bytes(_cache_file(cache_key(config)), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _load_signal(instruments, start_date, end_date, expression):
+    from qlib.data import D
+    from gui.registry import MODEL_SIGNAL_PREFIX
+
+    if expression.startswith(MODEL_SIGNAL_PREFIX):
+        # 使用模型注册表中已训练模型的预测值作为信号
+        from gui.training import predict_signal
+
+        signal = predict_signal(expression[len(MODEL_SIGNAL_PREFIX):], instruments, start_date, end_date)
+        return signal.replace([np.inf, -np.inf], np.nan).dropna()
+
+    # leave room for the look-back window of the signal expression
+    start = (pd.Timestamp(start_date) - pd.Timedelta(days=90)).strftime("%Y-%m-%d")
+    signal = D.features(instruments, [expression], start_time=start, end_time=end_date).iloc[:, 0]
+    return signal.replace([np.inf, -np.inf], np.nan).dropna()
+
+
+def load_market(config: dict) -> dict:
+    """Load what every run over the same symbols, dates and signal shares.
+
+    Returns the ``signal``, an ``exchange`` holding the quotes of all symbols and the daily
+    ``benchmark`` returns. Runs that differ only in risk or cost parameters reuse it
+    read-only (see ``gui.sweep``).
+    """
+    from qlib.backtest import get_exchange
+    from qlib.data import D
+
+    instruments = list(config["instruments"])
+    signal = _load_signal(instruments, config["start_date"], config["end_date"], config["signal"])
+    if signal.empty:
+        raise ValueError("No_data_found_for_dates")
+    exchange = get_exchange(
+        freq="day",
+        start_time=config["start_date"],
+        end_time=config["end_date"],
+        codes=instruments,
+        limit_threshold=0.095,
+        deal_price="close",
+        open_cost=config["commission_rate"],
+        close_cost=config["commission_rate"],
+        impact_cost=config["slippage"],
+        min_cost=5,
+    )
+    bench = D.features(
+        [config["benchmark"]], ["$close/Ref($close, 1) - 1"], start_time=config["start_date"], end_time=config["end_date"]
+    )
+    benchmark = bench.groupby(level="datetime").mean().iloc[:, 0].fillna(0)
+    return {"signal": signal, "exchange": exchange, "benchmark": benchmark}
+
+
+def _exchange_for(config, market):
+    # 行情数据共享，只替换本次运行的交易成本
+    exchange = copy.copy(market["exchange"])
+    exchange.open_cost = config["commission_rate"]
+    exchange.close_cost = config["commission_rate"]
+    exchange.impact_cost = config["slippage"]
+    return exchange
+
+
+def _run_leg(config, market, signal, report, progress_from, progress_to):
+    """Run one long-only top-k portfolio through qlib's ``backtest_loop``; return its daily report."""
+    from qlib.backtest import backtest_loop, get_strategy_executor
+    from gui.strategies import RiskControlTopkStrategy
+
+    n_instruments = len(config["instruments"])
+    topk = max(1, min(n_instruments, int(np.ceil(1 / config["max_position"]))))
+    strategy = RiskControlTopkStrategy(
+        signal=signal,
+        topk=topk,
+        n_drop=max(1, topk // 5),
+        risk_degree=min(0.95, topk * config["max_position"]),
+        stop_loss=config["stop_loss"],
+        take_profit=config["take_profit"],
+        max_drawdown=config["max_drawdown_limit"],
+        rebalance_every=REBALANCE_STEPS[config["rebalance"]],
+        on_step=lambda step, total: report(
+            progress_from + (progress_to - progress_from) * step / max(total, 1), "executing_backtest_trades"
+        ),
+    )
+    executor = {
+        "class": "SimulatorExecutor",
+        "module_path": "qlib.backtest.executor",
+        "kwargs": {"time_per_step": "day", "generate_portfolio_metrics": True},
+    }
+    trade_strategy, trade_executor = get_strategy_executor(
+        config["start_date"],
+        config["end_date"],
+        strategy,
+        executor,
+        benchmark=market["benchmark"],
+        account=float(config["initial_capital"]),
+        exchange_kwargs={"exchange": _exchange_for(config, market)},
+    )
+    portfolio_dict, _ = backtest_loop(config["start_date"], config["end_date"], trade_strategy, trade_executor)
+    report_df, _ = portfolio_dict["1day"]
+    return report_df
+
+
+def run_with_market(config: dict, market: dict, report=None) -> dict:
+    """Run the backtest of ``config`` on already loaded market data (see ``load_market``) and cache the result."""
+    report = report or (lambda *args, **kwargs: None)
+    signal = market["signal"]
+
+    with telemetry.stage("backtest", "backtest_run") as record:
+        result = _run_legs(config, market, signal, report)
+        telemetry.measure(record, result["returns"])
+    store_cached(config, result)
+    report(1.0, "generating_backtest_report")
+    return result
+
+
+def _run_legs(config, market, signal, report):
+    two_legs = config["strategy"] == "long_short"
+    long_df = _run_leg(config, market, signal, report, 0.10, 0.50 if two_legs else 0.90)
+    long_net = long_df["return"] - long_df["cost"]
+    if two_legs:
+        # 空头腿：对信号取反后的组合，收益取负并扣除成本
+        short_df = _run_leg(config, market, -signal, report, 0.50, 0.90)
+        returns = long_net - short_df["return"].reindex(long_net.index).fillna(0) - short_df["cost"].reindex(
+            long_net.index
+        ).fillna(0)
+        turnover = long_df["turnover"] + short_df["turnover"].reindex(long_net.index).fillna(0)
+    elif config["strategy"] == "market_neutral":
+        returns = long_net - long_df["bench"]
+        turnover = long_df["turnover"]
+    else:
+        returns = long_net
+        turnover = long_df["turnover"]
+
+    report(0.95, "calculating_performance_metrics")
+    returns = returns.astype(float)
+    return {
+        "returns": returns,
+        "benchmark": long_df["bench"].astype(float),
+        "portfolio_value": (1 + returns).cumprod() * float(config["initial_capital"]),
+        "turnover": turnover.astype(float),
+    }
+
+
+def run_backtest(config: dict, report=None) -> dict:
+    """Run the backtest described by the Backtest page parameters and cache the result.
+
+    Returns a dict of daily ``returns`` (net of costs, according to the strategy type),
+    ``benchmark`` returns, ``portfolio_value`` and ``turnover`` series.
+    """
+    report = report or (lambda *args, **kwargs: None)
+
+    report(0.02, "loading_historical_data")
+    with telemetry.stage("backtest", "provider_load") as record:
+        market = load_market(config)
+        telemetry.measure(record, market["signal"])
+    report(0.08, "generating_trading_signals")
+    return run_with_market(config, market, report)
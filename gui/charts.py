@@ -0,0 +1,83 @@
+"""Server-side downsampling of chart series before they are sent to the browser.
+
+Plotly serialises every point of a figure into the page, so a year of minute
+bars for dozens of symbols would ship tens of millions of points. The helpers
+here reduce each series to a fixed number of points while keeping its visual
+shape:
+
+- ``lttb_indices``: Largest-Triangle-Three-Buckets, keeps the point of each bucket
+  forming the largest triangle with its neighbours (good for line shape);
+- ``minmax_indices``: keeps the min and max of each bucket (keeps every spike).
+"""
+
+import numpy as np
+import pandas as pd
+
+LTTB = "lttb"
+MINMAX = "minmax"
+DEFAULT_MAX_POINTS = 2000
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Positions of the ``n_out`` points chosen by LTTB; first and last points are always kept."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # n_out - 2 buckets over the points between the first and the last one
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Positions of the minimum and maximum of equal-width buckets (plus both ends), at most ``n_out``."""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    n_buckets = (n_out - 2) // 2
+    bucket = np.arange(n) * n_buckets // n
+    # sort by (bucket, value): the first entry of each bucket is its min, the last its max
+    order = np.lexsort((y, bucket))
+    starts = np.searchsorted(bucket, np.arange(n_buckets), side="left")
+    ends = np.searchsorted(bucket, np.arange(n_buckets), side="right") - 1
+    return np.unique(np.concatenate([[0, n - 1], order[starts], order[ends]]))
+
+
+def downsample_frame(
+    df: pd.DataFrame,
+    x_col: str,
+    y_col: str,
+    group_col: str = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+    method: str = LTTB,
+) -> pd.DataFrame:
+    """Reduce every series (one per ``group_col`` value) of a long-format frame to at most ``max_points`` rows."""
+    groups = [(None, df)] if group_col is None else df.groupby(group_col, sort=False)
+    parts = []
+    for _, part in groups:
+        part = part[part[y_col].notna()].sort_values(x_col)
+        if len(part) <= max_points:
+            parts.append(part)
+            continue
+        y = part[y_col].to_numpy(dtype=np.float64)
+        if method == MINMAX:
+            positions = minmax_indices(y, max_points)
+        else:
+            x = pd.to_datetime(part[x_col]).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+            positions = lttb_indices(x, y, max_points)
+        parts.append(part.iloc[positions])
+    if not parts:
+        return df.iloc[0:0]
+    return pd.concat(parts)
@@ -0,0 +1,238 @@
+"""Return correlation / covariance of a large universe for the Data View heatmap.
+
+``pandas.DataFrame.corr`` loops over column pairs in Python-sized chunks and a
+full A-share universe takes minutes. Here the pairwise-complete statistics are
+built from matrix products of the zero-filled returns ``X`` and their validity
+mask ``M``::
+
+    n_ij   = M_i . M_j          sx_ij  = X_i . M_j          sxx_ij = X_i^2 . M_j
+    sxy_ij = X_i . X_j
+
+computed one block of rows at a time, so memory stays at a few ``block x N``
+matrices besides the ``N x N`` result. The matrix is reordered by hierarchical
+clustering and block-averaged down to at most ``max_cells`` per side before it
+is drawn.
+
+The full matrix is pickled under ``<CACHE_DIR>/correlation/<key>.pkl`` where
+``key`` hashes the universe, the date range, the statistic, ``min_periods`` and
+the last calendar date of the data, so changing only the display options does
+not recompute it.
+"""
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from gui import settings, telemetry
+from gui.utils import atomic_write_bytes, stable_hash
+
+CORRELATION = "correlation"
+COVARIANCE = "covariance"
+BLOCK_SIZE = 512
+DEFAULT_MIN_PERIODS = 20
+DEFAULT_MAX_CELLS = 300
+TOP_PAIRS = 50
+# only these config entries change the matrix itself
+MATRIX_KEYS = ("universe", "start_date", "end_date", "method", "min_periods", "data_end")
+
+
+def cache_key(config: dict) -> str:
+    key_config = {k: config.get(k) for k in MATRIX_KEYS}
+    if not isinstance(config["universe"], str):
+        key_config["universe"] = sorted(config["universe"])
+    return stable_hash(key_config)
+
+
+def _cache_file(key: str) -> str:
+    return settings.cache_path("correlation", f"{key}.pkl")
+
+
+def load_cached(config: dict):
+    """Return the cached ``{"matrix", "instruments", "date_count"[, "order"]}`` of ``config`` or None."""
+    path = _cache_file(cache_key(config))
+    entry = None
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as fp:
+                entry = pickle.load(fp)
+        except Exception:
+            entry = None
+    telemetry.cache_event("correlation", entry is not None)
+    return entry
+
+
+def store_cached(config: dict, entry: dict):
+    atomic_write_bytes(_cache_file(cache_key(config)), pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def pairwise_matrix(returns: np.ndarray, method: str = CORRELATION, min_periods: int = DEFAULT_MIN_PERIODS,
+                    block_size: int = BLOCK_SIZE, report=None) -> np.ndarray:
+    """NaN-aware pairwise correlation (or covariance) of the columns of a (dates x instruments) array.
+
+    Pairs with fewer than ``min_periods`` common observations are NaN; the result is float32.
+    """
+    mask = np.isfinite(returns)
+    x = np.where(mask, returns, 0.0)
+    m = mask.astype(np.float64)
+    x2 = x * x
+    n_cols = x.shape[1]
+    result = np.empty((n_cols, n_cols), dtype=np.float32)
+    for start in range(0, n_cols, block_size):
+        stop = min(start + block_size, n_cols)
+        xb, mb, x2b = x[:, start:stop], m[:, start:stop], x2[:, start:stop]
+        n = mb.T @ m
+        sx = xb.T @ m  # sum of x_i over the dates where x_j is valid too
+        sy = mb.T @ x  # sum of x_j over the dates where x_i is valid too
+        sxy = xb.T @ x
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = (sxy - sx * sy / n) / (n - 1)
+            if method == COVARIANCE:
+                block = cov
+            else:
+                var_x = (x2b.T @ m - sx * sx / n) / (n - 1)
+                var_y = (mb.T @ x2 - sy * sy / n) / (n - 1)
+                block = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+        block[n < max(min_periods, 2)] = np.nan
+        result[start:stop] = block
+        if report is not None:
+            report(0.3 + 0.5 * stop / n_cols, "computing_correlation")
+    return result
+
+
+def cluster_order(corr: np.ndarray) -> np.ndarray:
+    """Leaf order of an average-linkage clustering on the distance ``sqrt((1 - corr) / 2)``."""
+    from scipy.cluster.hierarchy import leaves_list, linkage
+    from scipy.spatial.distance import squareform
+
+    if len(corr) < 3:
+        return np.arange(len(corr))
+    dist = np.sqrt(np.clip((1.0 - np.nan_to_num(corr, nan=0.0)) / 2.0, 0.0, 1.0))
+    np.fill_diagonal(dist, 0.0)
+    return leaves_list(linkage(squareform(dist, checks=False), method="average"))
+
+
+def decimate(matrix: np.ndarray, max_cells: int = DEFAULT_MAX_CELLS):
+    """Block-average a square matrix to at most ``max_cells`` per side; return it and the block edges."""
+    size = len(matrix)
+    if size <= max_cells:
+        return matrix, np.arange(size + 1)
+    edges = np.linspace(0, size, max_cells + 1).astype(np.int64)
+    # sum within row blocks, then within column blocks (reduceat), counting valid cells alike
+    valid = np.isfinite(matrix)
+    sums = np.add.reduceat(np.add.reduceat(np.where(valid, matrix, 0.0), edges[:-1], axis=0), edges[:-1], axis=1)
+    counts = np.add.reduceat(np.add.reduceat(valid.astype(np.float64), edges[:-1], axis=0), edges[:-1], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sums / counts).astype(np.float32), edges
+
+
+def top_pairs(matrix: np.ndarray, instruments, count: int = TOP_PAIRS, block_size: int = BLOCK_SIZE) -> pd.DataFrame:
+    """The ``count`` pairs with the largest absolute off-diagonal values.
+
+    The upper triangle is scanned one block of rows at a time and only the best ``count``
+    candidates are kept between blocks, so no ``N x N`` index arrays are built.
+    """
+    size = len(matrix)
+    rows = np.empty(0, dtype=np.int64)
+    cols = np.empty(0, dtype=np.int64)
+    for start in range(0, max(size - 1, 0), block_size):
+        stop = min(start + block_size, size)
+        strength = np.abs(matrix[start:stop].astype(np.float64))
+        # NaN cells, the diagonal and everything below it can never be picked
+        strength[~np.isfinite(strength)] = -1.0
+        strength[:, :stop][np.arange(start, stop)[:, None] >= np.arange(stop)] = -1.0
+        flat = strength.ravel()
+        k = min(count, flat.size)
+        best = np.argpartition(flat, flat.size - k)[flat.size - k:]
+        best = best[flat[best] >= 0]
+        block_rows, block_cols = np.divmod(best, size)
+        rows = np.concatenate([rows, block_rows + start])
+        cols = np.concatenate([cols, block_cols])
+        if len(rows) > count:
+            keep = np.argpartition(-np.abs(matrix[rows, cols]), count - 1)[:count]
+            rows, cols = rows[keep], cols[keep]
+    if len(rows) == 0:
+        return pd.DataFrame(columns=["instrument_1", "instrument_2", "value"])
+    values = matrix[rows, cols]
+    order = np.argsort(-np.abs(values), kind="stable")
+    instruments = np.asarray(instruments)
+    return pd.DataFrame(
+        {"instrument_1": instruments[rows[order]], "instrument_2": instruments[cols[order]], "value": values[order]}
+    )
+
+
+def _compute_matrix(config: dict, D, report) -> dict:
+    universe = config["universe"]
+    report(0.05, "loading_correlation_data")
+    with telemetry.stage("correlation", "provider_load") as record:
+        returns = D.features(
+            D.instruments(universe) if isinstance(universe, str) else list(universe),
+            ["$close/Ref($close, 1) - 1"],
+            start_time=config["start_date"],
+            end_time=config["end_date"],
+        )
+        if returns is not None:
+            telemetry.measure(record, returns)
+    if returns is None or returns.empty:
+        raise ValueError("No_data_found_for_dates")
+    panel = returns.iloc[:, 0].replace([np.inf, -np.inf], np.nan).unstack(level="instrument").sort_index()
+    # instruments that can never reach min_periods only add NaN rows and columns
+    panel = panel.loc[:, panel.notna().sum() >= config["min_periods"]]
+    if panel.shape[1] < 2:
+        raise ValueError("No_data_found_for_dates")
+
+    report(0.3, "computing_correlation")
+    with telemetry.stage("correlation", "correlation_matrix") as record:
+        matrix = pairwise_matrix(panel.to_numpy(dtype=np.float64), config["method"], config["min_periods"], report=report)
+        telemetry.measure(record, matrix)
+    entry = {"matrix": matrix, "instruments": list(panel.columns), "date_count": int(panel.shape[0])}
+    if config["method"] != CORRELATION and config.get("clustered", True):
+        # covariance heatmaps are still ordered by correlation distance
+        entry["order"] = cluster_order(pairwise_matrix(panel.to_numpy(dtype=np.float64), CORRELATION, config["min_periods"]))
+    return entry
+
+
+def run_correlation(config: dict, report=None) -> dict:
+    """Daily return correlation (or covariance) heatmap of ``config["universe"]`` over the date range."""
+    from qlib.data import D
+
+    report = report or (lambda *args, **kwargs: None)
+    entry = load_cached(config)
+    if entry is None:
+        entry = _compute_matrix(config, D, report)
+        store_cached(config, entry)
+    matrix, instruments = entry["matrix"], np.asarray(entry["instruments"])
+
+    report(0.85, "clustering_instruments")
+    if config.get("clustered", True):
+        if "order" not in entry:
+            if config["method"] == CORRELATION:
+                entry["order"] = cluster_order(matrix)
+            else:
+                # the covariance order needs the correlation matrix, which is only built from the panel
+                entry = _compute_matrix(config, D, report)
+                matrix = entry["matrix"]
+            store_cached(config, entry)
+        order = entry["order"]
+        matrix, instruments = matrix[np.ix_(order, order)], instruments[order]
+    display, edges = decimate(matrix, config.get("max_cells", DEFAULT_MAX_CELLS))
+    labels = [
+        instruments[lo] if hi - lo == 1 else f"{instruments[lo]}…{instruments[hi - 1]}"
+        for lo, hi in zip(edges[:-1], edges[1:])
+    ]
+    # mean of the off-diagonal cells without building an N x N mask
+    diagonal = np.diagonal(matrix)
+    off_count = np.count_nonzero(np.isfinite(matrix)) - np.count_nonzero(np.isfinite(diagonal))
+    off_sum = np.nansum(matrix, dtype=np.float64) - np.nansum(diagonal, dtype=np.float64)
+    report(1.0, "clustering_instruments")
+    return {
+        "display": display,
+        "labels": labels,
+        "instruments": list(instruments),
+        "top_pairs": top_pairs(matrix, instruments),
+        "mean_value": off_sum / off_count if off_count else float("nan"),
+        "instrument_count": len(instruments),
+        "date_count": entry["date_count"],
+        "cells_per_block": int(np.ceil(len(matrix) / len(display))),
+    }
@@ -0,0 +1,58 @@
+"""Date range covered by the local Qlib data, taken from its trading calendar.
+
+The bins are updated in place (``dump_bin.py dump_update``), so the range is not
+a constant: ``calendar_bounds`` reads the first and last line of
+``calendars/<freq>.txt`` once per process and only re-reads them when the
+file's mtime changes.
+"""
+
+import os
+import threading
+from datetime import date
+
+from gui import settings
+
+_LOCK = threading.Lock()
+# calendar path -> (mtime_ns, (first_date, last_date))
+_BOUNDS = {}
+
+
+def _first_and_last_line(path: str):
+    with open(path, "rb") as fp:
+        first = fp.readline()
+        fp.seek(0, os.SEEK_END)
+        size = fp.tell()
+        # the last line is short; read a tail block instead of the whole file
+        fp.seek(max(0, size - 4096))
+        tail = fp.read().rstrip(b"\r\n")
+    return first.decode().strip(), tail.rsplit(b"\n", 1)[-1].decode().strip()
+
+
+def calendar_bounds(freq: str = "day", provider_uri: str = None):
+    """``(first_date, last_date)`` of the calendar as ``datetime.date``, or None without data."""
+    path = os.path.join(provider_uri or settings.provider_uri(), "calendars", f"{freq}.txt")
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    with _LOCK:
+        cached = _BOUNDS.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    first, last = _first_and_last_line(path)
+    if not first or not last:
+        return None
+    bounds = (date.fromisoformat(first[:10]), date.fromisoformat(last[:10]))
+    with _LOCK:
+        _BOUNDS[path] = (mtime, bounds)
+    return bounds
+
+
+def clamp_range(start: date, end: date, bounds):
+    """Intersect [start, end] with ``bounds``; None when they do not overlap."""
+    if bounds is None:
+        return start, end
+    start, end = max(start, bounds[0]), min(end, bounds[1])
+    if start > end:
+        return None
+    return start, end
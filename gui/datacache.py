@@ -0,0 +1,213 @@
+"""Columnar on-disk cache for ``D.features`` loads, shared by all sessions and restarts.
+
+Every (instrument, field, freq) column is stored as its own Parquet file together
+with the date range it was requested for (its *coverage*) in a small sqlite index.
+A request that lies inside the coverage of all its columns is answered by
+slicing the cached files; missing or too-short columns are fetched in one
+provider call and written back with the widened coverage. The total size is
+kept under a byte budget by evicting the least recently used columns.
+"""
+
+import contextlib
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # the cache is optional, loads fall back to the provider
+    pa = pq = None
+
+from gui import settings
+
+DATA_CACHE_MAX_BYTES = int(float(os.environ.get("QLIB_GUI_DATA_CACHE_MB", 2048)) * 1024**2)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS columns (
+    instrument TEXT NOT NULL,
+    field TEXT NOT NULL,
+    freq TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    path TEXT NOT NULL,
+    nbytes INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (instrument, field, freq)
+)
+"""
+
+
+def provider_loader(instruments, fields, start_time, end_time, freq="day") -> pd.DataFrame:
+    from qlib.data import D
+
+    return D.features(instruments, fields, start_time=start_time, end_time=end_time, freq=freq)
+
+
+class ColumnarCache:
+    """Parquet column cache with coverage metadata and LRU eviction.
+
+    Parameters
+    ----------
+    root : str
+        cache directory, shared by every process that uses the same path
+    max_bytes : int
+        size budget of the Parquet files; least recently used columns are evicted beyond it
+    """
+
+    def __init__(self, root: str, max_bytes: int = DATA_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    @staticmethod
+    def available() -> bool:
+        return pq is not None
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(os.path.join(self.root, "index.sqlite"), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _column_path(self, instrument: str, field: str, freq: str) -> str:
+        # expressions may contain characters that are not valid in file names
+        digest = hashlib.sha1(field.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.root, freq, instrument.lower(), f"{digest}.parquet")
+
+    def _write_column(self, path: str, series: pd.Series) -> int:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.table({"datetime": pd.DatetimeIndex(series.index), "value": series.values})
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp_", suffix=".parquet")
+        os.close(fd)
+        try:
+            pq.write_table(table, tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return os.path.getsize(path)
+
+    @staticmethod
+    def _read_column(path: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.Series:
+        table = pq.read_table(path, filters=[("datetime", ">=", start), ("datetime", "<=", end)])
+        df = table.to_pandas()
+        return pd.Series(df["value"].values, index=pd.DatetimeIndex(df["datetime"], name="datetime"))
+
+    def get_frame(self, instruments, fields, start_time, end_time, loader=None, freq: str = "day", data_end=None):
+        """Return the ``D.features``-shaped frame of ``instruments`` x ``fields`` over [start_time, end_time].
+
+        Parameters
+        ----------
+        loader : callable
+            ``loader(instruments, fields, start_time, end_time, freq)`` used for misses, ``provider_loader`` by default
+        data_end : optional
+            last date available from the provider; coverage never extends beyond it so that
+            appended data is fetched after a data update
+        """
+        loader = loader or provider_loader
+        start, end = pd.Timestamp(start_time), pd.Timestamp(end_time)
+        cover_end = min(end, pd.Timestamp(data_end)) if data_end is not None else end
+        instruments, fields = list(instruments), list(fields)
+
+        with self._lock, self._connect() as conn:
+            entries = {
+                (row[0], row[1]): (pd.Timestamp(row[2]), pd.Timestamp(row[3]), row[4])
+                for row in conn.execute(
+                    f"SELECT instrument, field, start, end, path FROM columns WHERE freq = ? AND instrument IN "
+                    f"({','.join('?' * len(instruments))})",
+                    [freq, *instruments],
+                )
+            }
+        # group the missing columns by the range that has to be fetched for them
+        fetch_groups = {}
+        for inst in instruments:
+            for field in fields:
+                entry = entries.get((inst, field))
+                if entry is not None and entry[0] <= start and entry[1] >= cover_end and os.path.exists(entry[2]):
+                    self.stats["hits"] += 1
+                    continue
+                self.stats["misses"] += 1
+                fetch_start = start if entry is None else min(start, entry[0])
+                fetch_end = cover_end if entry is None else max(cover_end, entry[1])
+                fetch_groups.setdefault((fetch_start, fetch_end), set()).add((inst, field))
+
+        # provider reads happen outside the lock so that other sessions are not serialised behind them
+        written = []
+        for (fetch_start, fetch_end), pairs in fetch_groups.items():
+            group_insts = sorted({inst for inst, _ in pairs})
+            group_fields = [field for field in fields if any((inst, field) in pairs for inst in group_insts)]
+            fetched = loader(group_insts, group_fields, fetch_start, fetch_end, freq)
+            fetched_insts = set() if fetched is None else set(fetched.index.get_level_values("instrument"))
+            for inst, field in pairs:
+                if inst in fetched_insts:
+                    series = fetched.loc[inst, field]
+                else:
+                    series = pd.Series(dtype="float32", index=pd.DatetimeIndex([], name="datetime"))
+                path = self._column_path(inst, field, freq)
+                written.append((inst, field, freq, str(fetch_start), str(fetch_end), path, self._write_column(path, series)))
+
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO columns VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [(*w, now) for w in written])
+            frames = {}
+            for inst in instruments:
+                columns = {field: self._read_column(self._column_path(inst, field, freq), start, end) for field in fields}
+                inst_df = pd.DataFrame(columns)
+                if not inst_df.empty:
+                    frames[inst] = inst_df
+            conn.execute(
+                f"UPDATE columns SET last_access = ? WHERE freq = ? AND instrument IN ({','.join('?' * len(instruments))})",
+                [now, freq, *instruments],
+            )
+            self._evict(conn)
+
+        if not frames:
+            return pd.DataFrame(columns=fields)
+        result = pd.concat(frames, names=["instrument", "datetime"])
+        return result[fields]
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM columns").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for inst, field, freq, path, nbytes in conn.execute(
+            "SELECT instrument, field, freq, path, nbytes FROM columns ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            if os.path.exists(path):
+                os.remove(path)
+            conn.execute("DELETE FROM columns WHERE instrument = ? AND field = ? AND freq = ?", (inst, field, freq))
+            total -= nbytes
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+
+_DEFAULT_CACHE = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_cache():
+    """Process-wide cache under ``CACHE_DIR/columns``, or None when pyarrow is not installed."""
+    global _DEFAULT_CACHE
+    if not ColumnarCache.available():
+        return None
+    with _DEFAULT_LOCK:
+        if _DEFAULT_CACHE is None:
+            _DEFAULT_CACHE = ColumnarCache(os.path.join(settings.CACHE_DIR, "columns"))
+        return _DEFAULT_CACHE
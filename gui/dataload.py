@@ -0,0 +1,67 @@
+"""Data View loads, shared by the Streamlit page and the HTTP API (``gui.api``).
+
+Raw fields and expressions go through the per-process expression cache
+(``gui.expressions``), whose misses are read through the columnar disk cache
+(``gui.datacache``) when pyarrow is installed. Errors are raised as
+``Exception("<Key>:<details>")`` strings that the page translates.
+"""
+
+from datetime import date
+
+from gui import data_range, datacache, expressions, telemetry
+
+
+def format_fields(fields) -> list:
+    """Prefix raw field names with ``$``; expressions (with parentheses) are kept as they are."""
+    return [field if field.startswith("$") or "(" in field else f"${field}" for field in fields]
+
+
+def load_frame(symbols, start_date: date, end_date: date, fields, action: str = "data_view"):
+    """``D.features``-shaped frame of ``fields`` for ``symbols``; the range is clamped to the calendar."""
+    from qlib.data import D
+
+    # 可用数据范围来自交易日历（随数据更新自动变化），查询区间截取到该范围内
+    data_bounds = data_range.calendar_bounds()
+    clamped_range = data_range.clamp_range(start_date, end_date, data_bounds)
+    if clamped_range is None:
+        raise Exception(
+            f"Date_out_of_range:{data_bounds[0].isoformat()}:{data_bounds[1].isoformat()}:"
+            f"{start_date.isoformat()}:{end_date.isoformat()}"
+        )
+    start_date, end_date = clamped_range
+
+    try:
+        symbols = [symbol.upper() for symbol in symbols]
+        formatted_fields = format_fields(fields)
+        data_cache = datacache.default_cache()
+
+        def fetch_expressions(instruments, expressions_to_load, start_time, end_time):
+            with telemetry.stage(action, "provider_load") as provider_record:
+                if data_cache is not None:
+                    fetched = data_cache.get_frame(
+                        instruments,
+                        expressions_to_load,
+                        start_time,
+                        end_time,
+                        data_end=data_bounds[1] if data_bounds else None,
+                    )
+                else:
+                    fetched = D.features(
+                        instruments, expressions_to_load, start_time=str(start_time.date()), end_time=str(end_time.date())
+                    )
+                if fetched is not None:
+                    telemetry.measure(provider_record, fetched)
+            # 表达式阶段只记录自身耗时，不含磁盘/数据源读取
+            eval_record["excluded_seconds"] = eval_record.get("excluded_seconds", 0.0) + provider_record["seconds"]
+            return fetched
+
+        # 表达式解析结果与计算结果在进程内缓存，只重新计算变化了的表达式
+        with telemetry.stage(action, "expression_eval", fields=len(formatted_fields)) as eval_record:
+            data = expressions.load_fields(symbols, formatted_fields, start_date, end_date, fetch_expressions)
+            if data is not None:
+                telemetry.measure(eval_record, data)
+    except Exception as e:
+        raise Exception(f"Data_loading_failed_internal:{str(e)}")
+    if data is None or data.empty:
+        raise Exception("No_data_found_for_dates")
+    return data
@@ -0,0 +1,92 @@
+"""Chunked export of Data View frames to temporary CSV or Parquet files.
+
+``DataFrame.to_csv()`` without a path builds the whole text in memory and
+``.encode()`` copies it again; a year of minute bars for an index universe does
+not fit twice in the server's memory. ``export_frame`` instead writes the frame
+``chunk_rows`` rows at a time to a file under ``<CACHE_DIR>/exports`` and
+returns its path, so only one chunk is ever serialised at once.
+"""
+
+import os
+import tempfile
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+from gui import settings
+
+CSV = "csv"
+PARQUET = "parquet"
+CHUNK_ROWS = 100_000
+MIME_TYPES = {CSV: "text/csv", PARQUET: "application/vnd.apache.parquet"}
+# exports older than this are removed the next time something is exported
+EXPORT_MAX_AGE = 3600
+
+
+def available_formats() -> list:
+    return [CSV, PARQUET] if pq is not None else [CSV]
+
+
+def export_dir() -> str:
+    path = os.path.join(settings.CACHE_DIR, "exports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cleanup_exports(max_age: float = EXPORT_MAX_AGE):
+    """Remove export files that have not been touched for ``max_age`` seconds."""
+    now = time.time()
+    for name in os.listdir(export_dir()):
+        path = os.path.join(export_dir(), name)
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                os.remove(path)
+        except OSError:
+            # another session removed it first
+            pass
+
+
+def _write_csv(df, path, chunk_rows):
+    with open(path, "w", encoding="utf-8", newline="") as fp:
+        for start in range(0, max(len(df), 1), chunk_rows):
+            df.iloc[start : start + chunk_rows].to_csv(fp, header=start == 0)
+
+
+def _write_parquet(df, path, chunk_rows):
+    writer = None
+    try:
+        for start in range(0, max(len(df), 1), chunk_rows):
+            table = pa.Table.from_pandas(df.iloc[start : start + chunk_rows], preserve_index=True)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            else:
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_frame(df, fmt: str = CSV, chunk_rows: int = CHUNK_ROWS) -> str:
+    """Write ``df`` (index included) to a new file under ``<CACHE_DIR>/exports`` chunk by chunk.
+
+    Returns the path of the finished file; a failed export leaves no partial file behind.
+    """
+    if fmt not in available_formats():
+        raise ValueError(f"unsupported export format: {fmt}")
+    cleanup_exports()
+    fd, path = tempfile.mkstemp(dir=export_dir(), prefix="qlib_data_", suffix=f".{fmt}")
+    os.close(fd)
+    try:
+        if fmt == PARQUET:
+            _write_parquet(df, path, chunk_rows)
+        else:
+            _write_csv(df, path, chunk_rows)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
@@ -0,0 +1,144 @@
+"""Qlib expression fields for the Data View, with a per-process expression cache.
+
+Users type expressions such as ``Mean($close, 20)`` or ``Corr($close, $volume, 10)``.
+Each one is parsed once into its qlib ``Expression`` tree (``compile_expression``,
+memoised); the tree's canonical string (``Mean($close,20)``) is then used as the
+key of everything computed from it, so spelling variants share one entry.
+Evaluated series are kept per (instrument, expression, freq) in an LRU cache
+bounded in bytes: when one expression of a list changes, only that expression
+is sent to the provider again.
+"""
+
+import functools
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+EXPRESSION_CACHE_MAX_BYTES = int(float(os.environ.get("QLIB_GUI_EXPR_CACHE_MB", 256)) * 1024**2)
+
+
+@functools.lru_cache(maxsize=512)
+def compile_expression(expression: str):
+    """Parse ``expression`` into a qlib ``Expression``; raise ValueError when it is not valid."""
+    from qlib.data.ops import Operators  # noqa: F401  referenced by the parsed code
+    from qlib.utils import parse_field
+
+    expression = expression.strip()
+    if not expression:
+        raise ValueError("empty expression")
+    try:
+        return eval(parse_field(expression))  # pylint: disable=W0123
+    except SyntaxError as e:
+        raise ValueError(f"invalid syntax in {expression!r}: {e.msg}") from e
+    except (AttributeError, NameError, TypeError) as e:
+        raise ValueError(f"invalid expression {expression!r}: {e}") from e
+
+
+def canonical(expression: str) -> str:
+    """Canonical spelling of ``expression`` (``Mean( $close ,20 )`` -> ``Mean($close,20)``)."""
+    return str(compile_expression(expression))
+
+
+class SeriesCache:
+    """LRU cache of evaluated series keyed by (instrument, canonical expression, freq).
+
+    Every entry remembers the [start, end] it was evaluated for; a request inside
+    that range is answered by slicing.
+    """
+
+    def __init__(self, max_bytes: int = EXPRESSION_CACHE_MAX_BYTES):
+        self.max_bytes = int(max_bytes)
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, instrument, expression, freq, start, end):
+        with self._lock:
+            entry = self._entries.get((instrument, expression, freq))
+            if entry is None or entry[0] > start or entry[1] < end:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end((instrument, expression, freq))
+            self.stats["hits"] += 1
+            series = entry[2]
+        return series.loc[start:end]
+
+    def put(self, instrument, expression, freq, start, end, series: pd.Series):
+        nbytes = int(series.memory_usage(index=True, deep=False))
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop((instrument, expression, freq), None)
+            if old is not None:
+                self._nbytes -= old[3]
+            self._entries[(instrument, expression, freq)] = (start, end, series, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted[3]
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+
+_SERIES_CACHE = SeriesCache()
+
+
+def series_cache() -> SeriesCache:
+    return _SERIES_CACHE
+
+
+def load_fields(instruments, fields, start_time, end_time, loader, freq: str = "day") -> pd.DataFrame:
+    """``D.features``-shaped frame of ``fields`` (raw fields or expressions) evaluated through the series cache.
+
+    Parameters
+    ----------
+    loader : callable
+        ``loader(instruments, fields, start_time, end_time)`` evaluating canonical expressions on a miss
+        (e.g. the columnar disk cache); it is only called for the (instrument, expression) pairs
+        that are not cached in memory.
+
+    Columns are named by the canonical form of each field.
+    """
+    cache = series_cache()
+    start, end = pd.Timestamp(start_time), pd.Timestamp(end_time)
+    exprs = list(dict.fromkeys(canonical(field) for field in fields))
+
+    columns = {}
+    missing = {}
+    for inst in instruments:
+        for expr in exprs:
+            series = cache.get(inst, expr, freq, start, end)
+            if series is None:
+                missing.setdefault(expr, []).append(inst)
+            else:
+                columns[(inst, expr)] = series
+
+    # one provider call per group of expressions missing for the same instruments
+    groups = {}
+    for expr, insts in missing.items():
+        groups.setdefault(tuple(insts), []).append(expr)
+    for insts, group_exprs in groups.items():
+        fetched = loader(list(insts), group_exprs, start, end)
+        fetched_insts = set() if fetched is None or fetched.empty else set(fetched.index.get_level_values("instrument"))
+        for inst in insts:
+            for expr in group_exprs:
+                if inst in fetched_insts:
+                    series = fetched.loc[inst, expr]
+                else:
+                    series = pd.Series(dtype="float32", index=pd.DatetimeIndex([], name="datetime"))
+                cache.put(inst, expr, freq, start, end, series)
+                columns[(inst, expr)] = series
+
+    frames = {}
+    for inst in instruments:
+        inst_df = pd.DataFrame({expr: columns[(inst, expr)] for expr in exprs})
+        if not inst_df.empty:
+            frames[inst] = inst_df
+    if not frames:
+        return pd.DataFrame(columns=exprs)
+    return pd.concat(frames, names=["instrument", "datetime"])[exprs]
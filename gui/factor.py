@@ -0,0 +1,205 @@
+"""Factor analysis job for the Factor Analysis page and its on-disk result cache.
+
+The factor and its forward returns are loaded once as (date x instrument)
+matrices; daily IC, rank IC, quantile returns and turnover are then computed
+with whole-matrix NumPy operations (masked row moments, ``bincount`` over
+date x bucket ids) instead of a per-day ``groupby.apply``.
+
+A finished analysis is pickled under ``<CACHE_DIR>/factor/<key>.pkl`` where
+``key`` hashes the canonical expression, the universe, the date range, the
+horizon, the number of quantiles and the last calendar date of the data.
+"""
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from gui import settings, telemetry
+from gui.utils import atomic_write_bytes, stable_hash
+
+DEFAULT_HORIZON = 5
+DEFAULT_QUANTILES = 5
+# days with fewer valid stocks than this get no IC / quantile values
+MIN_CROSS_SECTION = 5
+
+
+def cache_key(config: dict) -> str:
+    from gui.expressions import canonical
+
+    key_config = dict(config)
+    key_config["expression"] = canonical(config["expression"])
+    if not isinstance(config["universe"], str):
+        key_config["universe"] = sorted(config["universe"])
+    return stable_hash(key_config)
+
+
+def _cache_file(key: str) -> str:
+    return settings.cache_path("factor", f"{key}.pkl")
+
+
+def load_cached(config: dict):
+    """Return the cached analysis of ``config`` or None."""
+    path = _cache_file(cache_key(config))
+    result = None
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as fp:
+                result = pickle.load(fp)
+        except Exception:
+            result = None
+    telemetry.cache_event("factor", result is not None)
+    return result
+
+
+def store_cached(config: dict, result: dict):
+    atomic_write_bytes(_cache_file(cache_key(config)), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def row_corr(a: np.ndarray, b: np.ndarray, min_count: int = MIN_CROSS_SECTION) -> np.ndarray:
+    """Pearson correlation of every row of ``a`` with the same row of ``b``, ignoring NaNs pairwise."""
+    mask = np.isfinite(a) & np.isfinite(b)
+    n = mask.sum(axis=1)
+    a = np.where(mask, a, 0.0)
+    b = np.where(mask, b, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        da = np.where(mask, a - (a.sum(axis=1) / n)[:, None], 0.0)
+        db = np.where(mask, b - (b.sum(axis=1) / n)[:, None], 0.0)
+        corr = (da * db).sum(axis=1) / np.sqrt((da * da).sum(axis=1) * (db * db).sum(axis=1))
+    corr[n < min_count] = np.nan
+    return corr
+
+
+def row_rank(x: np.ndarray) -> np.ndarray:
+    """Average ranks (1..n) within every row, NaNs stay NaN."""
+    return pd.DataFrame(x).rank(axis=1, method="average").to_numpy()
+
+
+def quantile_buckets(factor: np.ndarray, quantiles: int) -> np.ndarray:
+    """Bucket id 0..quantiles-1 of every valid cell by its rank within the row, -1 for NaN."""
+    ranks = row_rank(factor)
+    n = np.isfinite(factor).sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        buckets = np.floor((ranks - 1) / n * quantiles)
+    buckets[~np.isfinite(buckets)] = -1
+    return buckets.astype(np.int64)
+
+
+def bucket_means(values: np.ndarray, buckets: np.ndarray, quantiles: int) -> np.ndarray:
+    """(dates x quantiles) mean of ``values`` per row and bucket, via one ``bincount``."""
+    n_dates = values.shape[0]
+    valid = (buckets >= 0) & np.isfinite(values)
+    ids = (np.arange(n_dates)[:, None] * quantiles + buckets)[valid]
+    sums = np.bincount(ids, weights=values[valid], minlength=n_dates * quantiles)
+    counts = np.bincount(ids, minlength=n_dates * quantiles)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sums / counts).reshape(n_dates, quantiles)
+
+
+def membership_turnover(members: np.ndarray) -> np.ndarray:
+    """Share of a bucket's members that were not in it the previous day."""
+    held = members.sum(axis=1).astype(np.float64)
+    kept = np.zeros(len(members))
+    kept[1:] = (members[1:] & members[:-1]).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        turnover = 1.0 - kept / held
+    turnover[0] = np.nan
+    return turnover
+
+
+def analyze(factor: pd.DataFrame, forward_return: pd.DataFrame, daily_return: pd.DataFrame, quantiles: int) -> dict:
+    """Analysis of (date x instrument) frames aligned on the same index and columns."""
+    f = factor.to_numpy(dtype=np.float64)
+    fwd = forward_return.to_numpy(dtype=np.float64)
+    day = daily_return.to_numpy(dtype=np.float64)
+    dates = factor.index
+
+    ic = row_corr(f, fwd)
+    joint = np.isfinite(f) & np.isfinite(fwd)
+    rank_ic = row_corr(row_rank(np.where(joint, f, np.nan)), row_rank(np.where(joint, fwd, np.nan)))
+
+    # too-small cross sections get no bucket at all
+    f_valid = np.where((np.isfinite(f).sum(axis=1) >= MIN_CROSS_SECTION)[:, None], f, np.nan)
+    buckets = quantile_buckets(f_valid, quantiles)
+    columns = [f"Q{i + 1}" for i in range(quantiles)]
+    quantile_daily = pd.DataFrame(bucket_means(day, buckets, quantiles), index=dates, columns=columns)
+    quantile_horizon = pd.Series(np.nanmean(bucket_means(fwd, buckets, quantiles), axis=0), index=columns)
+    turnover = pd.DataFrame(
+        {
+            columns[-1]: membership_turnover(buckets == quantiles - 1),
+            columns[0]: membership_turnover(buckets == 0),
+        },
+        index=dates,
+    )
+
+    ic = pd.Series(ic, index=dates)
+    rank_ic = pd.Series(rank_ic, index=dates)
+    long_short = (quantile_daily[columns[-1]] - quantile_daily[columns[0]]).fillna(0)
+    summary = {
+        "ic_mean": float(ic.mean()),
+        "ic_std": float(ic.std()),
+        "icir": float(ic.mean() / ic.std()) if ic.std() > 0 else float("nan"),
+        "rank_ic_mean": float(rank_ic.mean()),
+        "rank_icir": float(rank_ic.mean() / rank_ic.std()) if rank_ic.std() > 0 else float("nan"),
+        "ic_positive_ratio": float((ic.dropna() > 0).mean()) if ic.notna().any() else float("nan"),
+        "top_turnover": float(turnover[columns[-1]].mean()),
+        "long_short_return": float((1 + long_short).prod() - 1),
+    }
+    return {
+        "ic": ic,
+        "rank_ic": rank_ic,
+        "quantile_daily_returns": quantile_daily,
+        "quantile_horizon_returns": quantile_horizon,
+        "turnover": turnover,
+        "summary": summary,
+        "instrument_count": int(factor.shape[1]),
+    }
+
+
+def parse_universe(text: str):
+    """A market name (``csi300``) stays a string, a comma separated code list becomes a list."""
+    text = text.strip()
+    if "," in text or text[:2].upper() in ("SH", "SZ"):
+        return [code.strip().upper() for code in text.split(",") if code.strip()]
+    return text.lower()
+
+
+def _universe(universe):
+    from qlib.data import D
+
+    if isinstance(universe, str):
+        return D.instruments(universe)
+    return list(universe)
+
+
+def run_factor_analysis(config: dict, report=None) -> dict:
+    """Evaluate ``config["expression"]`` over the universe and analyse it against ``horizon``-day forward returns."""
+    from qlib.data import D
+    from gui.expressions import canonical
+
+    report = report or (lambda *args, **kwargs: None)
+    expression = canonical(config["expression"])
+    horizon = int(config["horizon"])
+    fields = [expression, f"Ref($close, -{horizon})/$close - 1", "Ref($close, -1)/$close - 1"]
+
+    report(0.05, "loading_factor_data")
+    with telemetry.stage("factor", "provider_load") as record:
+        data = D.features(_universe(config["universe"]), fields, start_time=config["start_date"], end_time=config["end_date"])
+        if data is not None:
+            telemetry.measure(record, data)
+    if data is None or data.empty:
+        raise ValueError("No_data_found_for_dates")
+    data = data.replace([np.inf, -np.inf], np.nan)
+    data.columns = ["factor", "forward", "daily"]
+
+    report(0.70, "computing_factor_statistics")
+    with telemetry.stage("factor", "factor_statistics") as record:
+        # one (date x instrument) matrix per column, all on the same axes
+        panel = data.unstack(level="instrument").sort_index()
+        result = analyze(panel["factor"], panel["forward"], panel["daily"], int(config["quantiles"]))
+        telemetry.measure(record, panel)
+    result["expression"] = expression
+    store_cached(config, result)
+    report(1.0, "computing_factor_statistics")
+    return result
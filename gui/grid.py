@@ -0,0 +1,87 @@
+"""Server-side filtering, sorting and paging for the Data View grid.
+
+Streamlit serialises every row handed to ``st.dataframe`` into the page, so a
+loaded frame of millions of rows is never sent as a whole. The grid keeps the
+frame on the server and resolves a query in two steps:
+
+- ``row_positions``: the positions of the rows passing the filters, in sort
+  order (boolean masks on the index levels and one stable ``argsort``);
+- ``page_rows``: ``iloc`` of one page of those positions.
+
+The positions only change with the filters or the sort, so callers keep them
+between reruns and paging costs just the ``iloc`` of the visible rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = (50, 100, 500, 1000)
+
+
+def sort_keys(df: pd.DataFrame) -> list:
+    """Names the grid can sort or filter by: the index levels, then the columns."""
+    return [name for name in df.index.names if name is not None] + list(df.columns)
+
+
+def _values(df: pd.DataFrame, name: str) -> np.ndarray:
+    if name in df.columns:
+        return df[name].to_numpy()
+    return df.index.get_level_values(name).to_numpy()
+
+
+def row_positions(
+    df: pd.DataFrame,
+    instruments=None,
+    start=None,
+    end=None,
+    column: str = None,
+    low: float = None,
+    high: float = None,
+    sort_by: str = None,
+    ascending: bool = True,
+) -> np.ndarray:
+    """Positions of the rows of ``df`` that pass the filters, ordered by ``sort_by``.
+
+    Parameters
+    ----------
+    instruments : list
+        keep these values of the ``instrument`` index level (all when empty)
+    start, end : date-like
+        inclusive bounds on the ``datetime`` index level
+    column, low, high : str, float, float
+        inclusive bounds on a numeric column; None leaves that side open
+    sort_by : str
+        index level or column name; NaNs always sort last
+    """
+    mask = np.ones(len(df), dtype=bool)
+    if instruments:
+        mask &= df.index.get_level_values("instrument").isin(list(instruments))
+    if start is not None or end is not None:
+        dates = df.index.get_level_values("datetime")
+        if start is not None:
+            mask &= dates >= pd.Timestamp(start)
+        if end is not None:
+            # 结束日期包含当天
+            mask &= dates < pd.Timestamp(end) + pd.Timedelta(days=1)
+    if column is not None:
+        values = df[column].to_numpy(dtype=np.float64)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+    positions = np.flatnonzero(mask)
+    if sort_by is None:
+        return positions
+    keys = pd.Series(_values(df, sort_by)[positions])
+    order = keys.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+    return positions[order]
+
+
+def page_count(n_rows: int, page_size: int) -> int:
+    return max(1, -(-n_rows // page_size))
+
+
+def page_rows(df: pd.DataFrame, positions: np.ndarray, page: int, page_size: int) -> pd.DataFrame:
+    """Rows of page ``page`` (1-based) of ``positions``."""
+    start = (page - 1) * page_size
+    return df.iloc[positions[start : start + page_size]]
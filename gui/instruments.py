@@ -0,0 +1,146 @@
+"""In-memory search index over the instrument codes of the local Qlib data.
+
+``instruments/<market>.txt`` lists ``code<TAB>start<TAB>end`` lines per market
+(``all``, ``csi300``, ...). ``get_index`` reads them once per process, and again
+only when one of the files changes, into a ``SymbolIndex``:
+
+- a sorted array of codes, plus one of the codes without their exchange prefix
+  (``600000`` for ``SH600000``), for ``searchsorted`` prefix lookups;
+- a trigram -> code ids posting table for fuzzy lookups, which scores every
+  code sharing a trigram with the query using one ``bincount``.
+"""
+
+import os
+import re
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from gui import settings
+
+# 界面上提供"一键加入"的指数成分
+QUICK_ADD_MARKETS = ("csi300", "csi500")
+_EXCHANGE_PREFIX = re.compile(r"^(SH|SZ|BJ)(?=\d)")
+
+_LOCK = threading.Lock()
+# instruments dir -> (signature, SymbolIndex)
+_INDEXES = {}
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _prefix_range(sorted_codes: np.ndarray, prefix: str):
+    lo = np.searchsorted(sorted_codes, prefix, side="left")
+    hi = np.searchsorted(sorted_codes, prefix + "\uffff", side="left")
+    return lo, hi
+
+
+class SymbolIndex:
+    """Prefix and fuzzy search over a set of codes, with their market memberships.
+
+    Parameters
+    ----------
+    markets : dict
+        ``{market: [(code, start, end), ...]}`` as read from ``instruments/<market>.txt``
+    """
+
+    def __init__(self, markets: dict):
+        codes = sorted({code for rows in markets.values() for code, _, _ in rows})
+        self.codes = np.array(codes, dtype=str)
+        self._code_ids = {code: i for i, code in enumerate(codes)}
+        bare = np.array([_EXCHANGE_PREFIX.sub("", code) for code in codes], dtype=str)
+        self._bare_order = np.argsort(bare, kind="stable")
+        self._bare_sorted = bare[self._bare_order]
+
+        postings = defaultdict(list)
+        for i, code in enumerate(codes):
+            for gram in _trigrams(code):
+                postings[gram].append(i)
+        self._postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+
+        self._markets = {}
+        for market, rows in markets.items():
+            if not rows:
+                continue
+            # 当前成分：截止日期等于该文件中最晚截止日期的股票
+            last_end = max(end for _, _, end in rows)
+            self._markets[market] = sorted({code for code, _, end in rows if end == last_end})
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def markets(self) -> list:
+        return sorted(self._markets)
+
+    def members(self, market: str) -> list:
+        """Current constituents of ``market`` (codes listed up to the file's last end date)."""
+        return list(self._markets.get(market.lower(), []))
+
+    def contains(self, code: str) -> bool:
+        return code.upper() in self._code_ids
+
+    def prefix(self, query: str, limit: int = 50) -> list:
+        """Codes starting with ``query``, with or without their exchange prefix, in code order."""
+        query = query.strip().upper()
+        if not query:
+            return []
+        lo, hi = _prefix_range(self.codes, query)
+        ids = set(range(lo, min(hi, lo + limit)))
+        lo, hi = _prefix_range(self._bare_sorted, query)
+        ids.update(self._bare_order[lo : min(hi, lo + limit)].tolist())
+        return [str(self.codes[i]) for i in sorted(ids)[:limit]]
+
+    def fuzzy(self, query: str, limit: int = 20) -> list:
+        """Codes ranked by how many of the query's trigrams they contain (tolerates typos)."""
+        query = query.strip().upper()
+        grams = [self._postings[gram] for gram in _trigrams(query) if gram in self._postings]
+        if not grams:
+            return []
+        scores = np.bincount(np.concatenate(grams), minlength=len(self.codes))
+        candidates = np.flatnonzero(scores)
+        # 得分相同时按代码排序，保证结果稳定
+        order = np.lexsort((candidates, -scores[candidates]))[:limit]
+        return [str(self.codes[i]) for i in candidates[order]]
+
+    def search(self, query: str, limit: int = 50) -> list:
+        """Prefix matches first, then fuzzy matches, without duplicates."""
+        results = self.prefix(query, limit)
+        if len(results) < limit:
+            seen = set(results)
+            results += [code for code in self.fuzzy(query, limit) if code not in seen][: limit - len(results)]
+        return results
+
+
+def _read_market(path: str) -> list:
+    rows = []
+    with open(path, "r") as fp:
+        for line in fp:
+            parts = line.strip().split("\t")
+            if parts and parts[0]:
+                rows.append((parts[0].upper(), parts[1] if len(parts) > 1 else "", parts[2] if len(parts) > 2 else ""))
+    return rows
+
+
+def get_index(provider_uri: str = None):
+    """Process-wide ``SymbolIndex`` of the local data, or None without instrument files."""
+    inst_dir = os.path.join(provider_uri or settings.provider_uri(), "instruments")
+    try:
+        files = sorted(name for name in os.listdir(inst_dir) if name.endswith(".txt"))
+        signature = tuple((name, os.stat(os.path.join(inst_dir, name)).st_mtime_ns) for name in files)
+    except OSError:
+        return None
+    if not files:
+        return None
+    with _LOCK:
+        cached = _INDEXES.get(inst_dir)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+    index = SymbolIndex({name[: -len(".txt")].lower(): _read_market(os.path.join(inst_dir, name)) for name in files})
+    with _LOCK:
+        _INDEXES[inst_dir] = (signature, index)
+    return index
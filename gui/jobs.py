@@ -0,0 +1,374 @@
+"""Background job queue for GUI work, with a job table persisted on local disk.
+
+Streamlit serves every browser session from threads of one server process, so a
+CPU bound call made inline (e.g. a LightGBM fit) freezes all sessions, and
+several users starting work at once would overload the machine. Heavy work is
+therefore submitted as a *job*:
+
+- the job (target function, arguments, status, progress) is recorded in
+  ``<CACHE_DIR>/jobs/jobs.sqlite`` with status ``queued``;
+- a scheduler thread in every server process sharing the table (the Streamlit
+  server, the API server) claims queued jobs; the slots are counted in the
+  table, so at most ``MAX_WORKERS`` jobs run at a time between them. Each job
+  runs in its own ``spawn`` process which initialises Qlib, runs
+  ``target(*args, report)`` and pickles the result next to the table;
+- ``report(fraction, message_key, **fmt)`` writes progress into the table, which
+  pages poll; ``cancel`` kills the worker process together with the processes
+  it started (each job runs in a process group of its own).
+
+Queued jobs survive a server restart; jobs that were running when their server
+died are marked ``failed``. Jobs that ended more than ``JOB_RETENTION_DAYS`` ago
+are deleted with their result files.
+"""
+
+import contextlib
+import importlib
+import json
+import multiprocessing as mp
+import os
+import pickle
+import signal
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+from gui import settings
+from gui.utils import atomic_write_bytes
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE = (QUEUED, RUNNING)
+
+# seconds between two progress writes of a worker (the last one is always written)
+REPORT_INTERVAL = 0.25
+SCHEDULER_INTERVAL = 0.5
+# seconds between two prunes of old jobs
+PRUNE_INTERVAL = 3600
+# a claimed job gets its pid right after its process started
+_CLAIM_GRACE = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    label TEXT NOT NULL,
+    target TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message_key TEXT,
+    message_fmt TEXT,
+    error TEXT,
+    pid INTEGER,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+)
+"""
+
+
+def jobs_dir() -> str:
+    path = os.path.join(settings.CACHE_DIR, "jobs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _db_path() -> str:
+    return os.path.join(jobs_dir(), "jobs.sqlite")
+
+
+def _args_path(job_id: str) -> str:
+    return os.path.join(jobs_dir(), f"{job_id}.args.pkl")
+
+
+def _result_path(job_id: str) -> str:
+    return os.path.join(jobs_dir(), f"{job_id}.result.pkl")
+
+
+@contextlib.contextmanager
+def _connect(db_path: str = None):
+    conn = sqlite3.connect(db_path or _db_path(), timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _pid_alive(pid) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobReporter:
+    """Picklable ``report(fraction, message_key=None, **fmt)`` callable handed to job targets.
+
+    The GUI translates ``message_key`` with ``get_text`` and formats it with ``fmt``.
+    """
+
+    def __init__(self, db_path: str, job_id: str):
+        self._db_path = db_path
+        self._job_id = job_id
+        self._last_write = 0.0
+
+    def __call__(self, fraction: float, message_key: str = None, **fmt):
+        fraction = min(max(float(fraction), 0.0), 1.0)
+        now = time.time()
+        if fraction < 1.0 and now - self._last_write < REPORT_INTERVAL:
+            return
+        self._last_write = now
+        with _connect(self._db_path) as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, message_key = ?, message_fmt = ? WHERE id = ?",
+                (fraction, message_key, json.dumps(fmt, default=str), self._job_id),
+            )
+
+
+def _kill_job(pid: int):
+    """SIGKILL a job process and its process group (e.g. the workers of its process pool)."""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+        return
+    except (AttributeError, ProcessLookupError, PermissionError):
+        # no killpg on this platform, or the job has not made its own group yet
+        pass
+    with contextlib.suppress(ProcessLookupError):
+        os.kill(pid, signal.SIGKILL)
+
+
+def _resolve(target: str):
+    module_name, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _run_job(db_path: str, job_id: str, target: str, args_path: str, result_path: str, provider_uri: str):
+    """Entry point of a job process."""
+    if hasattr(os, "setsid"):
+        # own process group: cancel kills the processes the job starts along with it
+        os.setsid()
+    try:
+        import qlib
+        from qlib.constant import REG_CN
+
+        qlib.init(provider_uri=provider_uri, region=REG_CN)
+        with open(args_path, "rb") as fp:
+            args = pickle.load(fp)
+        result = _resolve(target)(*args, JobReporter(db_path, job_id))
+        atomic_write_bytes(result_path, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        status, error = DONE, None
+    except Exception as e:
+        status, error = FAILED, f"{e}\n\n{traceback.format_exc()}"
+    with _connect(db_path) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, finished = ?, progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END "
+            "WHERE id = ? AND status = ?",
+            (status, error, time.time(), status, job_id, RUNNING),
+        )
+
+
+class JobQueue:
+    """Job table plus the scheduler thread that starts queued jobs in worker processes.
+
+    Parameters
+    ----------
+    max_workers : int
+        number of jobs allowed to run at the same time
+    """
+
+    def __init__(self, max_workers: int = settings.MAX_WORKERS):
+        self.max_workers = max(1, int(max_workers))
+        self._processes = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._last_prune = 0.0
+        with _connect() as conn:
+            conn.execute(_SCHEMA)
+        self._recover()
+        self._thread = threading.Thread(target=self._schedule_forever, name="qlib-gui-jobs", daemon=True)
+        self._thread.start()
+
+    def _recover(self):
+        # jobs left "running" by a server that is gone can never finish, and would hold their slot
+        with _connect() as conn:
+            rows = conn.execute("SELECT id, pid, started FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            for row in rows:
+                if row["pid"] is None and time.time() - (row["started"] or 0) < _CLAIM_GRACE:
+                    # just claimed, its process is being started
+                    continue
+                if not _pid_alive(row["pid"]):
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?",
+                        (FAILED, "Interrupted by a server restart", time.time(), row["id"]),
+                    )
+
+    def submit(self, kind: str, target, *args, label: str = "") -> str:
+        """Queue ``target(*args, report)`` and return the job id.
+
+        ``target`` must be a module level function of an importable module.
+        """
+        job_id = uuid.uuid4().hex
+        atomic_write_bytes(_args_path(job_id), pickle.dumps(args, protocol=pickle.HIGHEST_PROTOCOL))
+        with _connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, label, target, status, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, label, f"{target.__module__}:{target.__qualname__}", QUEUED, time.time()),
+            )
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str):
+        """Job record as a dict (``message_fmt`` decoded), or None."""
+        with _connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["message_fmt"] = json.loads(job["message_fmt"]) if job["message_fmt"] else {}
+        return job
+
+    def list(self, limit: int = 20) -> list:
+        with _connect() as conn:
+            rows = conn.execute(
+                "SELECT id, kind, label, status, progress, created, started, finished FROM jobs "
+                "ORDER BY created DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def result(self, job_id: str):
+        """Return value of a finished job."""
+        with open(_result_path(job_id), "rb") as fp:
+            return pickle.load(fp)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job or kill the process of a running one; False if it already ended."""
+        with self._lock, _connect() as conn:
+            row = conn.execute("SELECT status, pid FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row["status"] not in ACTIVE:
+                return False
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, *ACTIVE),
+            )
+            process = self._processes.get(job_id)
+            if process is not None and process.pid is not None:
+                _kill_job(process.pid)
+            elif row["status"] == RUNNING and _pid_alive(row["pid"]):
+                # started by another server process sharing the same table
+                _kill_job(row["pid"])
+        self._wakeup.set()
+        return True
+
+    def _schedule_forever(self):
+        while True:
+            try:
+                self._schedule()
+            except Exception:
+                traceback.print_exc()
+            self._wakeup.wait(SCHEDULER_INTERVAL)
+            self._wakeup.clear()
+
+    def _schedule(self):
+        with self._lock:
+            self._reap()
+            self._recover()
+            self._prune()
+            # start the processes only once the claim is committed
+            for job_id, target in self._claim():
+                # non-daemon so that a job may use a process pool of its own
+                process = mp.get_context("spawn").Process(
+                    target=_run_job,
+                    args=(_db_path(), job_id, target, _args_path(job_id), _result_path(job_id), settings.provider_uri()),
+                    name=f"qlib-gui-job-{job_id[:8]}",
+                )
+                try:
+                    process.start()
+                except Exception as e:
+                    with _connect() as conn:
+                        conn.execute(
+                            "UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?",
+                            (FAILED, f"Could not start worker: {e}", time.time(), job_id),
+                        )
+                    continue
+                self._processes[job_id] = process
+                with _connect() as conn:
+                    conn.execute("UPDATE jobs SET pid = ? WHERE id = ?", (process.pid, job_id))
+
+    def _claim(self) -> list:
+        """Mark as many queued jobs running as there are free slots; ``[(job_id, target), ...]``.
+
+        The running jobs of every server process sharing the table count, and the
+        write lock taken by ``BEGIN IMMEDIATE`` keeps two servers from claiming the
+        same slot.
+        """
+        with _connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            (running,) = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (RUNNING,)).fetchone()
+            free = self.max_workers - running
+            if free <= 0:
+                return []
+            queued = conn.execute(
+                "SELECT id, target FROM jobs WHERE status = ? ORDER BY created LIMIT ?", (QUEUED, free)
+            ).fetchall()
+            now = time.time()
+            conn.executemany(
+                "UPDATE jobs SET status = ?, started = ? WHERE id = ?", [(RUNNING, now, row["id"]) for row in queued]
+            )
+        return [(row["id"], row["target"]) for row in queued]
+
+    def _prune(self):
+        """Delete the jobs that ended more than ``settings.JOB_RETENTION_DAYS`` ago, with their files."""
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        with _connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status NOT IN (?, ?) AND COALESCE(finished, created) < ?",
+                (*ACTIVE, now - settings.JOB_RETENTION_DAYS * 86400),
+            ).fetchall()
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(row["id"],) for row in rows])
+        for row in rows:
+            for path in (_result_path(row["id"]), _args_path(row["id"])):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+
+    def _reap(self):
+        for job_id, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del self._processes[job_id]
+            if os.path.exists(_args_path(job_id)):
+                os.remove(_args_path(job_id))
+            # a worker that died without recording its outcome (e.g. killed by the OOM killer)
+            with _connect() as conn:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ? AND status = ?",
+                    (FAILED, f"Worker exited with code {process.exitcode}", time.time(), job_id, RUNNING),
+                )
+
+
+_QUEUE = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_queue() -> JobQueue:
+    """Process-wide job queue, created (and its scheduler started) on first use."""
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = JobQueue()
+        return _QUEUE
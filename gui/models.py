@@ -0,0 +1,178 @@
+"""Qlib models with per-iteration progress hooks, as used by the Model Training page.
+
+Every model here exposes ``fit(dataset, evals_result=None, on_iteration=None)``
+where ``on_iteration(done, total)`` is called after each boosting round / tree
+batch, and ``predict(dataset, segment)`` like the stock qlib models.
+"""
+
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+import xgboost as xgb
+from sklearn.ensemble import RandomForestRegressor
+from qlib.model.base import Model
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.contrib.model.gbdt import LGBModel
+from qlib.contrib.model.xgboost import XGBModel
+from qlib.contrib.model.linear import LinearModel
+
+
+class ProgressLGBModel(LGBModel):
+    """``LGBModel`` whose ``fit`` reports every boosting round.
+
+    The parent ``fit`` hard-codes its callback list and logs to ``R``, which
+    needs an active recorder; this version records the evaluation history only.
+    """
+
+    def fit(
+        self,
+        dataset,
+        num_boost_round=None,
+        early_stopping_rounds=None,
+        evals_result=None,
+        reweighter=None,
+        on_iteration=None,
+        **kwargs,
+    ):
+        if evals_result is None:
+            evals_result = {}
+        ds_l = self._prepare_data(dataset, reweighter)
+        ds, names = list(zip(*ds_l))
+        callbacks = [
+            lgb.early_stopping(
+                self.early_stopping_rounds if early_stopping_rounds is None else early_stopping_rounds, verbose=False
+            ),
+            lgb.record_evaluation(evals_result),
+        ]
+        if on_iteration is not None:
+            callbacks.append(lambda env: on_iteration(env.iteration + 1, env.end_iteration))
+        self.model = lgb.train(
+            self.params,
+            ds[0],
+            num_boost_round=self.num_boost_round if num_boost_round is None else num_boost_round,
+            valid_sets=ds,
+            valid_names=names,
+            callbacks=callbacks,
+            **kwargs,
+        )
+
+
+class _XGBProgressCallback(xgb.callback.TrainingCallback):
+    def __init__(self, on_iteration, total):
+        super().__init__()
+        self._on_iteration = on_iteration
+        self._total = total
+
+    def after_iteration(self, model, epoch, evals_log):
+        self._on_iteration(epoch + 1, self._total)
+        return False
+
+
+class ProgressXGBModel(XGBModel):
+    """``XGBModel`` reporting every boosting round through an xgboost callback."""
+
+    def __init__(self, num_boost_round=1000, early_stopping_rounds=50, **kwargs):
+        super().__init__(**kwargs)
+        self.num_boost_round = num_boost_round
+        self.early_stopping_rounds = early_stopping_rounds
+
+    def fit(self, dataset, evals_result=None, on_iteration=None, **kwargs):
+        if evals_result is None:
+            evals_result = {}
+        if on_iteration is not None:
+            kwargs["callbacks"] = [_XGBProgressCallback(on_iteration, self.num_boost_round)]
+        super().fit(
+            dataset,
+            num_boost_round=self.num_boost_round,
+            early_stopping_rounds=self.early_stopping_rounds,
+            evals_result=evals_result,
+            verbose_eval=False,
+            **kwargs,
+        )
+
+
+class ProgressLinearModel(LinearModel):
+    """``LinearModel`` with the common ``fit`` signature; a closed-form fit is a single step."""
+
+    def fit(self, dataset, evals_result=None, reweighter=None, on_iteration=None):
+        super().fit(dataset, reweighter=reweighter)
+        if on_iteration is not None:
+            on_iteration(1, 1)
+        return self
+
+
+class RandomForestModel(Model):
+    """sklearn random forest grown in batches of trees (``warm_start``) so progress can be reported."""
+
+    def __init__(self, n_estimators=100, max_depth=None, min_samples_split=2, seed=None, n_batches=10, n_jobs=-1):
+        self.n_estimators = int(n_estimators)
+        self.n_batches = max(1, min(int(n_batches), self.n_estimators))
+        self.model = RandomForestRegressor(
+            n_estimators=0,
+            max_depth=max_depth,
+            min_samples_split=min_samples_split,
+            random_state=seed,
+            warm_start=True,
+            n_jobs=n_jobs,
+        )
+
+    def fit(self, dataset, evals_result=None, on_iteration=None):
+        if evals_result is None:
+            evals_result = {}
+        df_train, df_valid = dataset.prepare(["train", "valid"], col_set=["feature", "label"], data_key=DataHandlerLP.DK_L)
+        x_train, y_train = df_train["feature"].values, np.squeeze(df_train["label"].values)
+        x_valid, y_valid = df_valid["feature"].values, np.squeeze(df_valid["label"].values)
+        evals_result["train"], evals_result["valid"] = [], []
+        for n_trees in np.unique(np.linspace(0, self.n_estimators, self.n_batches + 1).astype(int)[1:]):
+            self.model.set_params(n_estimators=int(n_trees))
+            self.model.fit(x_train, y_train)
+            evals_result["train"].append(float(np.mean((self.model.predict(x_train) - y_train) ** 2)))
+            if len(y_valid):
+                evals_result["valid"].append(float(np.mean((self.model.predict(x_valid) - y_valid) ** 2)))
+            if on_iteration is not None:
+                on_iteration(int(n_trees), self.n_estimators)
+        return self
+
+    def predict(self, dataset, segment="test"):
+        if not hasattr(self.model, "estimators_"):
+            raise ValueError("model is not fitted yet!")
+        x_test = dataset.prepare(segment, col_set="feature", data_key=DataHandlerLP.DK_I)
+        return pd.Series(self.model.predict(x_test.values), index=x_test.index)
+
+
+def build_model(config: dict) -> Model:
+    """Instantiate the model selected on the Model Training page from its GUI parameters."""
+    model_type = config["model_type"]
+    n_estimators = int(config["n_estimators"])
+    seed = int(config["seed"])
+    if model_type == "LightGBM":
+        max_depth = int(config["max_depth"])
+        return ProgressLGBModel(
+            loss="mse",
+            num_boost_round=n_estimators,
+            early_stopping_rounds=max(10, n_estimators // 10),
+            learning_rate=float(config["learning_rate"]),
+            max_depth=max_depth,
+            num_leaves=min(2**max_depth - 1, 210),
+            min_data_in_leaf=int(config["min_samples_split"]),
+            seed=seed,
+        )
+    if model_type == "XGBoost":
+        return ProgressXGBModel(
+            num_boost_round=n_estimators,
+            early_stopping_rounds=max(10, n_estimators // 10),
+            eta=float(config["learning_rate"]),
+            max_depth=int(config["max_depth"]),
+            min_child_weight=int(config["min_samples_split"]),
+            seed=seed,
+        )
+    if model_type == "Linear":
+        return ProgressLinearModel(estimator="ols")
+    if model_type == "RandomForest":
+        return RandomForestModel(
+            n_estimators=n_estimators,
+            max_depth=int(config["max_depth"]),
+            min_samples_split=int(config["min_samples_split"]),
+            seed=seed,
+        )
+    raise ValueError(f"Unsupported_model_type:{model_type}")
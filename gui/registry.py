@@ -0,0 +1,124 @@
+"""Registry of trained models shared by all sessions, on local disk.
+
+Every model fitted by the Model Training page is stored under
+``<CACHE_DIR>/models``: the fitted model is pickled to ``<key>.model.pkl`` and
+its configuration, segments and display results are recorded in
+``registry.sqlite``. ``key`` hashes the model type, the hyperparameters the
+model actually uses, the instruments, the train/valid segments, the Alpha158
+handler config and the last calendar date of the data, so re-submitting an
+identical configuration is answered from the table without refitting.
+
+The Backtest page lists the registry and uses a registered model's predictions
+as its trading signal (``MODEL_SIGNAL_PREFIX + key``).
+"""
+
+import contextlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+
+from gui import settings
+from gui.utils import atomic_write_bytes, stable_hash
+
+MODEL_SIGNAL_PREFIX = "model:"
+
+# 各模型实际使用的超参数；其余参数不影响训练结果，不参与键的计算
+HYPERPARAMS = {
+    "LightGBM": ("learning_rate", "max_depth", "n_estimators", "min_samples_split", "seed"),
+    "XGBoost": ("learning_rate", "max_depth", "n_estimators", "min_samples_split", "seed"),
+    "Linear": (),
+    "RandomForest": ("max_depth", "n_estimators", "min_samples_split", "seed"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    key TEXT PRIMARY KEY,
+    model_type TEXT NOT NULL,
+    config TEXT NOT NULL,
+    segments TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created REAL NOT NULL
+)
+"""
+
+
+def _db_path() -> str:
+    return settings.cache_path("models", "registry.sqlite")
+
+
+def _model_path(key: str) -> str:
+    return settings.cache_path("models", f"{key}.model.pkl")
+
+
+@contextlib.contextmanager
+def _connect():
+    conn = sqlite3.connect(_db_path(), timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        with conn:
+            conn.execute(_SCHEMA)
+            yield conn
+    finally:
+        conn.close()
+
+
+def model_key(config: dict, segments: dict, handler: dict) -> str:
+    """Registry key of a training configuration once its segments and handler config are resolved."""
+    model_type = config["model_type"]
+    return stable_hash(
+        {
+            "model_type": model_type,
+            "hyperparams": {name: config[name] for name in HYPERPARAMS[model_type]},
+            "instruments": sorted(config["instruments"]),
+            "segments": segments,
+            "handler": handler,
+            "data_end": config.get("data_end"),
+        }
+    )
+
+
+def _entry(row) -> dict:
+    entry = dict(row)
+    for field in ("config", "segments", "result"):
+        entry[field] = json.loads(entry[field])
+    return entry
+
+
+def lookup(key: str):
+    """Registry entry (``config``, ``segments``, ``result``, ...) of ``key``, or None."""
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM models WHERE key = ?", (key,)).fetchone()
+    if row is None or not os.path.exists(_model_path(key)):
+        return None
+    return _entry(row)
+
+
+def list_entries(limit: int = 50) -> list:
+    """Most recent registry entries first."""
+    with _connect() as conn:
+        rows = conn.execute("SELECT * FROM models ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+    return [_entry(row) for row in rows]
+
+
+def register(key: str, config: dict, segments: dict, model, result: dict):
+    """Store a fitted model; the pickle is written before the row so a listed entry is always loadable."""
+    atomic_write_bytes(_model_path(key), pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO models (key, model_type, config, segments, result, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                config["model_type"],
+                json.dumps(config, default=str),
+                json.dumps(segments, default=str),
+                json.dumps(result, default=str),
+                time.time(),
+            ),
+        )
+
+
+def load_model(key: str):
+    with open(_model_path(key), "rb") as fp:
+        return pickle.load(fp)
@@ -0,0 +1,34 @@
+"""Paths and limits shared by the GUI and its worker processes."""
+
+import os
+
+# Qlib 数据目录（相对于启动目录）
+QLIB_DATA_DIR = os.path.join(".qlib", "qlib_data", "cn_data")
+
+# 同时运行的后台任务数，默认使用一半的 CPU
+MAX_WORKERS = int(os.environ.get("QLIB_GUI_MAX_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+
+# 已结束的后台任务及其结果文件保留的天数
+JOB_RETENTION_DAYS = float(os.environ.get("QLIB_GUI_JOB_RETENTION_DAYS", 7))
+
+# 设置后在 Streamlit 服务进程内同时提供 HTTP API（gui.api），0 表示不启动
+API_PORT = int(os.environ.get("QLIB_GUI_API_PORT", 0))
+
+# 参数扫描任务内部进程池的大小，默认与后台任务并发数相同，一个扫描任务不会占用超过全部任务槽位的 CPU
+SWEEP_WORKERS = int(os.environ.get("QLIB_GUI_SWEEP_WORKERS", MAX_WORKERS))
+
+
+def provider_uri() -> str:
+    """Absolute provider uri, so that worker processes resolve the same directory."""
+    return os.path.abspath(QLIB_DATA_DIR)
+
+
+# GUI 结果缓存目录（回测结果等），所有会话共享
+CACHE_DIR = os.environ.get("QLIB_GUI_CACHE_DIR", os.path.join(".qlib", "gui_cache"))
+
+
+def cache_path(*parts: str) -> str:
+    """Path inside ``CACHE_DIR``; the parent directory is created on demand."""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
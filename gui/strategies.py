@@ -0,0 +1,86 @@
+"""Trading strategies used by the Backtest page."""
+
+import math
+
+from qlib.backtest.decision import Order, TradeDecisionWO
+from qlib.contrib.strategy.signal_strategy import TopkDropoutStrategy
+
+
+class RiskControlTopkStrategy(TopkDropoutStrategy):
+    """``TopkDropoutStrategy`` with the risk controls exposed on the Backtest page.
+
+    - positions whose close has moved ``-stop_loss`` / ``+take_profit`` from the first
+      close seen while holding them are sold on the next step;
+    - once the account drawdown from its peak exceeds ``max_drawdown`` everything is
+      liquidated and no new positions are opened;
+    - the top-k portfolio is only rebuilt every ``rebalance_every`` trading steps, exits
+      above are still checked daily.
+    """
+
+    def __init__(
+        self,
+        *,
+        stop_loss=None,
+        take_profit=None,
+        max_drawdown=None,
+        rebalance_every=1,
+        on_step=None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.max_drawdown = max_drawdown
+        self.rebalance_every = max(1, int(rebalance_every))
+        self.on_step = on_step
+        self._entry_price = {}
+        self._peak_value = None
+        self._halted = False
+
+    def _exit_orders(self, codes, start_time, end_time):
+        orders = []
+        for code in codes:
+            amount = self.trade_position.get_stock_amount(code=code)
+            if amount <= 0:
+                continue
+            order = Order(stock_id=code, amount=amount, start_time=start_time, end_time=end_time, direction=Order.SELL)
+            if self.trade_exchange.check_order(order):
+                orders.append(order)
+        return orders
+
+    def generate_trade_decision(self, execute_result=None):
+        trade_step = self.trade_calendar.get_trade_step()
+        trade_start_time, trade_end_time = self.trade_calendar.get_step_time(trade_step)
+        if self.on_step is not None:
+            self.on_step(trade_step, self.trade_calendar.get_trade_len())
+
+        position = self.trade_position
+        value = position.calculate_value()
+        self._peak_value = value if self._peak_value is None else max(self._peak_value, value)
+        if self.max_drawdown and self._peak_value > 0 and value / self._peak_value - 1 <= -self.max_drawdown:
+            self._halted = True
+
+        held = position.get_stock_list()
+        self._entry_price = {code: price for code, price in self._entry_price.items() if code in held}
+        exits = []
+        for code in held:
+            price = position.get_stock_price(code)
+            entry = self._entry_price.setdefault(code, price)
+            if not entry or math.isnan(price):
+                continue
+            ret = price / entry - 1
+            if (
+                self._halted
+                or (self.stop_loss and ret <= -self.stop_loss)
+                or (self.take_profit and ret >= self.take_profit)
+            ):
+                exits.append(code)
+
+        if self._halted or trade_step % self.rebalance_every != 0:
+            return TradeDecisionWO(self._exit_orders(exits, trade_start_time, trade_end_time), self)
+
+        decision = super().generate_trade_decision(execute_result)
+        orders = decision.get_decision()
+        sold = {order.stock_id for order in orders if order.direction == Order.SELL}
+        extra = self._exit_orders([code for code in exits if code not in sold], trade_start_time, trade_end_time)
+        return TradeDecisionWO(extra + orders, self)
@@ -0,0 +1,149 @@
+"""Parameter-sweep job for the Backtest page: a grid of backtests run in a process pool.
+
+The grid is the Cartesian product of value lists for the risk and cost parameters
+of the Backtest page. Every point is an ordinary backtest configuration, so points
+are served from and stored in the backtest result cache (``gui.backtest``).
+
+Market data (signal, quotes, benchmark) does not depend on the swept parameters; it
+is loaded once by the job process and handed to the pool workers through the pool
+initializer. With the ``fork`` start method the workers inherit it copy-on-write,
+otherwise it is pickled once per worker rather than re-read per run.
+
+Workers return only the daily returns of their point; the metrics of the whole
+grid are computed afterwards in one pass over the (dates x points) return
+matrix (``gui.analytics``).
+"""
+
+import itertools
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from gui import analytics, backtest, settings, telemetry
+
+SWEEP_PARAMS = ("max_position", "stop_loss", "take_profit", "commission_rate", "slippage")
+METRICS = (
+    "total_return",
+    "annual_return",
+    "annual_volatility",
+    "sharpe_ratio",
+    "max_drawdown",
+    "calmar_ratio",
+    "win_rate",
+    "max_drawdown_days",
+)
+# 取值越小越好的指标（排序时升序）
+LOWER_IS_BETTER = ("annual_volatility", "max_drawdown_days")
+# 单次扫描允许的最大组合数
+MAX_RUNS = 500
+
+# 进程池工作进程中的共享行情数据，由 _init_worker 设置
+_MARKET = None
+
+
+def param_values(low: float, high: float, steps: int) -> list:
+    """``steps`` evenly spaced values from ``low`` to ``high`` (just ``low`` when steps is 1 or the range is empty)."""
+    steps = max(1, int(steps))
+    if steps == 1 or high <= low:
+        return [float(low)]
+    return [round(float(v), 6) for v in np.linspace(low, high, steps)]
+
+
+def expand_grid(base_config: dict, values: dict) -> list:
+    """One backtest configuration per combination of ``values`` (``{param: [value, ...]}``) on top of ``base_config``."""
+    names = [name for name in SWEEP_PARAMS if name in values]
+    grid = []
+    for combination in itertools.product(*(values[name] for name in names)):
+        config = dict(base_config)
+        config.update(zip(names, map(float, combination)))
+        grid.append(config)
+    return grid
+
+
+def _init_worker(market, provider_uri):
+    global _MARKET
+    _MARKET = market
+    if provider_uri is not None:
+        # spawn 启动的工作进程需要自行初始化 Qlib
+        import qlib
+        from qlib.constant import REG_CN
+
+        qlib.init(provider_uri=provider_uri, region=REG_CN)
+
+
+def _run_point(index: int, config: dict):
+    result = backtest.run_with_market(config, _MARKET)
+    return index, result["returns"]
+
+
+def _pool_context():
+    if "fork" in mp.get_all_start_methods():
+        return mp.get_context("fork"), None
+    return mp.get_context("spawn"), settings.provider_uri()
+
+
+def run_sweep(sweep_config: dict, report=None) -> dict:
+    """Backtest every point of the grid described by ``sweep_config``.
+
+    Parameters
+    ----------
+    sweep_config : dict
+        ``base``: a Backtest page configuration, ``values``: ``{param: [value, ...]}`` for
+        parameters of ``SWEEP_PARAMS``.
+    report : callable
+        ``report(fraction, message_key, **fmt)`` progress hook, see ``gui.jobs.JobReporter``.
+
+    Returns
+    -------
+    dict
+        ``params``: the swept parameter names, ``table``: one row per grid point with the
+        parameter values and the metrics of ``analytics.SUMMARY_METRICS``, ``returns``: the
+        (dates x grid points) daily returns, columns in the order of ``table``.
+    """
+    report = report or (lambda *args, **kwargs: None)
+    grid = expand_grid(sweep_config["base"], sweep_config["values"])
+    if len(grid) > MAX_RUNS:
+        raise ValueError(f"Too many sweep combinations: {len(grid)} > {MAX_RUNS}")
+
+    point_returns = [None] * len(grid)
+    pending = []
+    for index, config in enumerate(grid):
+        cached = backtest.load_cached(config)
+        if cached is None:
+            pending.append(index)
+        else:
+            point_returns[index] = cached["returns"]
+    done = len(grid) - len(pending)
+    report(0.02, "sweep_progress", done=done, total=len(grid))
+
+    if pending:
+        report(0.05, "loading_historical_data")
+        with telemetry.stage("sweep", "provider_load") as record:
+            market = backtest.load_market(sweep_config["base"])
+            telemetry.measure(record, market["signal"])
+        context, provider_uri = _pool_context()
+        max_workers = min(settings.SWEEP_WORKERS, len(pending))
+        with telemetry.stage("sweep", "parallel_backtests", runs=len(pending), workers=max_workers), ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=context, initializer=_init_worker, initargs=(market, provider_uri)
+        ) as pool:
+            futures = [pool.submit(_run_point, index, grid[index]) for index in pending]
+            for finished, future in enumerate(as_completed(futures), 1):
+                index, returns = future.result()
+                point_returns[index] = returns
+                report(0.10 + 0.88 * finished / len(pending), "sweep_progress", done=done + finished, total=len(grid))
+
+    params = [name for name in SWEEP_PARAMS if name in sweep_config["values"]]
+    with telemetry.stage("sweep", "analytics", runs=len(grid)) as record:
+        returns = analytics.returns_matrix(dict(enumerate(point_returns)))
+        summary = analytics.summary(returns)
+        telemetry.measure(record, returns)
+    table = pd.concat([pd.DataFrame([{name: config[name] for name in params} for config in grid]), summary], axis=1)
+    report(1.0, "sweep_progress", done=len(grid), total=len(grid))
+    return {"params": params, "table": table, "returns": returns}
+
+
+def surface(table: pd.DataFrame, x: str, y: str, metric: str) -> pd.DataFrame:
+    """(``y`` x ``x``) matrix of ``metric``, taking the best value over the other swept parameters."""
+    return table.pivot_table(index=y, columns=x, values=metric, aggfunc="max").sort_index().sort_index(axis=1)
@@ -0,0 +1,118 @@
+"""Per-stage timings of GUI actions, appended to ``<CACHE_DIR>/telemetry.jsonl``.
+
+Pages and job processes wrap the stages of an action (provider load, expression
+evaluation, processing, model fit, plotting / serialisation) in ``stage``; each
+stage becomes one JSON line with its wall time and, when the caller measures its
+output, its row count and size in bytes. Cache lookups are recorded with
+``cache_event``. Every process appends to the same file, so the sidebar shows
+the work of background jobs next to that of the Streamlit process.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from gui import settings
+
+# 超过该大小时把日志轮换为 telemetry.jsonl.1
+MAX_FILE_BYTES = 10 * 1024**2
+# recent() 读取的文件尾部大小
+_TAIL_BYTES = 256 * 1024
+
+_WRITE_LOCK = threading.Lock()
+
+
+def telemetry_path() -> str:
+    return settings.cache_path("telemetry.jsonl")
+
+
+def _append(record: dict):
+    path = telemetry_path()
+    line = json.dumps(record, default=str, separators=(",", ":")) + "\n"
+    try:
+        with _WRITE_LOCK:
+            if os.path.exists(path) and os.path.getsize(path) > MAX_FILE_BYTES:
+                os.replace(path, path + ".1")
+            with open(path, "a", encoding="utf-8") as fp:
+                fp.write(line)
+    except OSError:
+        # telemetry must never break the action it measures
+        pass
+
+
+def measure(record: dict, obj):
+    """Fill ``rows`` and ``bytes`` of a stage record from a frame, series, array or buffer."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        record["rows"] = int(len(obj))
+        record["bytes"] = int(obj.memory_usage(deep=False).sum() if isinstance(obj, pd.DataFrame) else obj.memory_usage())
+    elif isinstance(obj, np.ndarray):
+        record["rows"] = int(obj.shape[0]) if obj.ndim else 1
+        record["bytes"] = int(obj.nbytes)
+    elif isinstance(obj, (bytes, str)):
+        record["bytes"] = len(obj)
+    return obj
+
+
+@contextlib.contextmanager
+def stage(action: str, name: str, **fields):
+    """Time the enclosed block as stage ``name`` of ``action``.
+
+    Yields the record, which the block may complete with ``measure`` or extra
+    fields. Time already recorded by nested stages can be put in
+    ``record["excluded_seconds"]`` so that the stage only reports its own work.
+    """
+    record = {"action": action, "stage": name, "rows": None, "bytes": None, **fields}
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        excluded = record.pop("excluded_seconds", 0.0)
+        record["seconds"] = max(0.0, time.perf_counter() - start - excluded)
+        record["time"] = time.time()
+        record["pid"] = os.getpid()
+        _append(record)
+
+
+def cache_event(cache: str, hit: bool):
+    """Record one lookup of the named result cache."""
+    _append({"action": "cache", "stage": cache, "hit": bool(hit), "time": time.time(), "pid": os.getpid()})
+
+
+def recent(limit: int = 200) -> list:
+    """The last ``limit`` records of the log, oldest first."""
+    path = telemetry_path()
+    try:
+        with open(path, "rb") as fp:
+            fp.seek(0, os.SEEK_END)
+            size = fp.tell()
+            fp.seek(max(0, size - _TAIL_BYTES))
+            tail = fp.read()
+    except OSError:
+        return []
+    lines = tail.splitlines()
+    if size > _TAIL_BYTES:
+        # the first line of the tail block is usually cut
+        lines = lines[1:]
+    records = []
+    for line in lines[-limit:]:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+def cache_hit_rates(records: list) -> dict:
+    """``{cache: (hits, lookups)}`` of the ``cache_event`` records among ``records``."""
+    rates = {}
+    for record in records:
+        if record.get("action") != "cache":
+            continue
+        hits, total = rates.get(record["stage"], (0, 0))
+        rates[record["stage"]] = (hits + int(record["hit"]), total + 1)
+    return rates
@@ -0,0 +1,187 @@
+"""Model training job executed in a worker process (see ``gui.jobs``).
+
+``train_model`` only receives plain, picklable GUI parameters; the dataset and
+model are built inside the worker so the Streamlit process never imports
+LightGBM or holds the Alpha158 feature matrix. Fitted models are stored in the
+model registry (``gui.registry``).
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from gui import telemetry
+
+
+def _noop_report(fraction, message_key=None, **fmt):
+    pass
+
+
+def split_segments(start_date: str, end_date: str, valid_ratio: float) -> dict:
+    """Split the trading days of [start_date, end_date] into train/valid segments, valid last."""
+    from qlib.data import D
+
+    calendar = D.calendar(start_time=start_date, end_time=end_date)
+    if len(calendar) < 20:
+        raise ValueError(f"Training_range_too_short:{len(calendar)}")
+    n_valid = min(max(1, int(len(calendar) * valid_ratio)), len(calendar) - 10)
+    fmt = lambda x: pd.Timestamp(x).strftime("%Y-%m-%d")  # noqa: E731
+    return {
+        "train": (fmt(calendar[0]), fmt(calendar[-n_valid - 1])),
+        "valid": (fmt(calendar[-n_valid]), fmt(calendar[-1])),
+    }
+
+
+def dataset_config(config: dict, segments: dict, instruments=None, test=None) -> dict:
+    """Alpha158 ``DatasetH`` config for the GUI parameters.
+
+    With ``test`` (a ``(start, end)`` pair) the dataset also covers a ``test`` segment,
+    over ``instruments`` if given, while the processors are still fitted on the
+    training segment.
+    """
+    handler_kwargs = {
+        "instruments": list(config["instruments"] if instruments is None else instruments),
+        "start_time": segments["train"][0] if test is None else min(segments["train"][0], test[0]),
+        "end_time": segments["valid"][1] if test is None else max(segments["valid"][1], test[1]),
+        "fit_start_time": segments["train"][0],
+        "fit_end_time": segments["train"][1],
+    }
+    if config["model_type"] in ("Linear", "RandomForest"):
+        # sklearn estimators do not accept NaN features
+        handler_kwargs["infer_processors"] = [
+            {"class": "RobustZScoreNorm", "kwargs": {"fields_group": "feature", "clip_outlier": True}},
+            {"class": "Fillna", "kwargs": {"fields_group": "feature"}},
+        ]
+    return {
+        "class": "DatasetH",
+        "module_path": "qlib.data.dataset",
+        "kwargs": {
+            "handler": {"class": "Alpha158", "module_path": "qlib.contrib.data.handler", "kwargs": handler_kwargs},
+            "segments": segments if test is None else {**segments, "test": test},
+        },
+    }
+
+
+def resolve_key(config: dict):
+    """``(segments, registry key)`` of a training configuration."""
+    from gui import registry
+
+    segments = split_segments(config["start_date"], config["end_date"], config["valid_ratio"])
+    handler = dataset_config(config, segments)["kwargs"]["handler"]
+    return segments, registry.model_key(config, segments, handler)
+
+
+def _loss_curve(evals_result: dict, key: str) -> list:
+    values = evals_result.get(key, [])
+    # LightGBM records {metric: [...]}, the other models a plain list
+    if isinstance(values, dict):
+        values = next(iter(values.values()), [])
+    return [float(v) for v in values]
+
+
+def _segment_metrics(model, dataset, segment: str) -> dict:
+    from qlib.data.dataset.handler import DataHandlerLP
+
+    label = dataset.prepare(segment, col_set="label", data_key=DataHandlerLP.DK_L).iloc[:, 0]
+    pred = model.predict(dataset, segment=segment).reindex(label.index)
+    mask = label.notna().values & pred.notna().values
+    y, p = label.values[mask], pred.values[mask]
+    if len(y) == 0:
+        return {"samples": 0, "accuracy": float("nan"), "mse": float("nan")}
+    return {
+        "samples": int(len(y)),
+        # direction accuracy: the (cross-sectionally normalised) label and the prediction agree in sign
+        "accuracy": float(np.mean(np.sign(p) == np.sign(y))),
+        "mse": float(np.mean((p - y) ** 2)),
+    }
+
+
+def train_model(config: dict, report=None) -> dict:
+    """Fit the configured model on Alpha158 features and return display metrics.
+
+    Parameters
+    ----------
+    config : dict
+        GUI parameters: ``model_type``, ``instruments``, ``start_date``, ``end_date``,
+        ``valid_ratio``, ``learning_rate``, ``max_depth``, ``n_estimators``,
+        ``min_samples_split``, ``seed`` and ``data_end`` (last calendar date, part of the
+        registry key).
+    report : callable
+        ``report(fraction, message_key, **fmt)`` progress hook, see ``gui.jobs.JobReporter``.
+    """
+    from qlib.utils import init_instance_by_config
+    from gui import registry
+    from gui.models import build_model
+
+    report = report or _noop_report
+    start_time = time.time()
+
+    report(0.02, "init_model_params")
+    segments, key = resolve_key(config)
+    entry = registry.lookup(key)
+    if entry is not None:
+        # 同一配置已被其他会话训练过
+        report(1.0, "saving_model_results")
+        return entry["result"]
+    model = build_model(config)
+
+    report(0.05, "loading_train_data")
+    with telemetry.stage("training", "provider_load", model_type=config["model_type"]) as record:
+        dataset = init_instance_by_config(dataset_config(config, segments))
+        # 处理器执行前的原始特征矩阵
+        raw_data = getattr(dataset.handler, "_data", None)
+        if isinstance(raw_data, pd.DataFrame):
+            telemetry.measure(record, raw_data)
+
+    report(0.30, "model_training_step")
+    evals_result = {}
+    with telemetry.stage("training", "model_fit", model_type=config["model_type"]):
+        model.fit(
+            dataset,
+            evals_result=evals_result,
+            on_iteration=lambda done, total: report(
+                0.30 + 0.60 * done / max(total, 1), "training_iteration", current=done, total=total
+            ),
+        )
+    fit_seconds = time.time() - start_time
+
+    report(0.92, "model_validation_step")
+    with telemetry.stage("training", "validation", model_type=config["model_type"]) as record:
+        train_metrics = _segment_metrics(model, dataset, "train")
+        valid_metrics = _segment_metrics(model, dataset, "valid")
+        record["rows"] = train_metrics["samples"] + valid_metrics["samples"]
+
+    report(0.98, "saving_model_results")
+    result = {
+        "model_key": key,
+        "model_type": config["model_type"],
+        "instrument_count": len(config["instruments"]),
+        "segments": segments,
+        "train_samples": train_metrics["samples"],
+        "valid_samples": valid_metrics["samples"],
+        "train_accuracy": train_metrics["accuracy"],
+        "valid_accuracy": valid_metrics["accuracy"],
+        "train_mse": train_metrics["mse"],
+        "valid_mse": valid_metrics["mse"],
+        "training_time": fit_seconds,
+        "loss_curve": {"train": _loss_curve(evals_result, "train"), "valid": _loss_curve(evals_result, "valid")},
+    }
+    registry.register(key, config, segments, model, result)
+    report(1.0, "saving_model_results")
+    return result
+
+
+def predict_signal(key: str, instruments, start_date: str, end_date: str):
+    """Predictions of the registered model ``key`` for ``instruments`` over [start_date, end_date]."""
+    from qlib.utils import init_instance_by_config
+    from gui import registry
+
+    entry = registry.lookup(key)
+    if entry is None:
+        raise ValueError(f"Model_not_in_registry:{key}")
+    segments = {name: tuple(bounds) for name, bounds in entry["segments"].items()}
+    dataset = init_instance_by_config(
+        dataset_config(entry["config"], segments, instruments=instruments, test=(start_date, end_date))
+    )
+    return registry.load_model(key).predict(dataset, segment="test")
@@ -0,0 +1,25 @@
+"""Small helpers shared by the GUI caches."""
+
+import hashlib
+import json
+import os
+import tempfile
+
+
+def stable_hash(obj) -> str:
+    """sha256 of the canonical JSON form of ``obj`` (dict key order does not matter)."""
+    payload = json.dumps(obj, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Write ``data`` to a temp file next to ``path`` and rename it, so readers never see partial files."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -1,27 +1,36 @@
+import time
+_SCRIPT_START = time.perf_counter()  # 启动计时起点，必须在其他导入之前
+
 import streamlit as st
 import locale
 import os
+import sys
+import importlib.util
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import time
 import webbrowser # 导入 webbrowser 模块
+from concurrent.futures import ThreadPoolExecutor
+
+# 重量级模块（plotly、qlib.data、LightGBM、qlib.backtest 等）只在需要的页面中导入，
+# Streamlit 每次交互都会重新执行本脚本，首屏不应为未打开的页面付出导入开销
+from gui import data_range, jobs, settings, telemetry
+
+STARTUP_TIMINGS = []
+
+
+def record_timing(stage):
+    """记录本次脚本运行从开始到当前位置的耗时（秒）"""
+    STARTUP_TIMINGS.append((stage, time.perf_counter() - _SCRIPT_START))
+
+
+record_timing('timing_imports')
+
 
-# Qlib imports for real backtesting
-import qlib
-from qlib import init
-from qlib.data import D
-from qlib.contrib.strategy.signal_strategy import TopkDropoutStrategy
-from qlib.backtest import backtest_loop
-from qlib.utils import init_instance_by_config
-from qlib.workflow import R
-from qlib.workflow.record_temp import PortAnaRecord
-from qlib.data.dataset import DatasetH
-from qlib.contrib.model.gbdt import LGBModel
-from qlib.tests.data import GetData
-from qlib.constant import REG_CN
+@st.cache_resource
+def process_first_run_timings():
+    """本服务进程第一次执行脚本时的各阶段耗时（首次运行时填充）"""
+    return {}
 
 # 页面配置 - 应该尽可能早地调用
 st.set_page_config(
@@ -78,6 +87,57 @@ TEXTS = {
         'title': 'Qlib Quantitative Investment Platform',
         'sidebar_title': 'Qlib Quant Platform',
         'data_view': 'Data View',
+        'data_view_mode': 'View',
+        'data_view_mode_prices': 'Price Data',
+        'data_view_mode_correlation': 'Correlation Heatmap',
+        'correlation_method': 'Statistic',
+        'correlation_method_correlation': 'Return Correlation',
+        'correlation_method_covariance': 'Return Covariance',
+        'min_common_days': 'Min. Common Days',
+        'heatmap_max_cells': 'Heatmap Cells per Side',
+        'cluster_order': 'Order by hierarchical clustering',
+        'compute_correlation': 'Compute Heatmap',
+        'correlation_failed': 'Correlation computation failed',
+        'loading_correlation_data': 'Loading daily returns...',
+        'computing_correlation': 'Computing pairwise statistics...',
+        'clustering_instruments': 'Clustering instruments...',
+        'instrument_count_label': 'Stocks',
+        'mean_correlation_label': 'Mean Correlation',
+        'mean_covariance_label': 'Mean Covariance',
+        'heatmap_decimated_caption': 'Each cell averages a block of up to {block}×{block} pairs of the {total} stocks.',
+        'top_pairs_header': 'Strongest Pairs',
+        'pair_instrument_1': 'Stock 1',
+        'pair_instrument_2': 'Stock 2',
+        'job_kind_correlation': 'Correlation',
+        'factor_analysis': 'Factor Analysis',
+        'factor_expression': 'Factor Expression',
+        'factor_universe': 'Stock Universe',
+        'factor_universe_help': 'A market such as csi300, csi500 or all, or a comma separated list of stock codes.',
+        'label_horizon': 'Label Horizon (days)',
+        'quantile_count': 'Quantiles',
+        'factor_start_date': 'Analysis Start Date',
+        'factor_end_date': 'Analysis End Date',
+        'run_factor_analysis': 'Analyze Factor',
+        'factor_analysis_failed': 'Factor analysis failed',
+        'loading_factor_data': 'Evaluating the factor and forward returns...',
+        'computing_factor_statistics': 'Computing IC, quantile returns and turnover...',
+        'instruments_label': 'stocks',
+        'ic_mean_label': 'IC Mean',
+        'icir_label': 'ICIR',
+        'rank_ic_mean_label': 'Rank IC Mean',
+        'rank_icir_label': 'Rank ICIR',
+        'ic_positive_ratio_label': 'IC > 0 Ratio',
+        'top_turnover_label': 'Top Quantile Turnover',
+        'long_short_return_label': 'Top-Bottom Return',
+        'ic_chart_title': 'Daily IC and 20-day Rank IC',
+        'rank_ic_ma_legend': 'Rank IC (20d MA)',
+        'quantile_label': 'Quantile',
+        'quantile_cum_chart_title': 'Cumulative Return by Quantile',
+        'quantile_mean_chart_title': 'Mean Forward Return by Quantile',
+        'quantile_mean_axis_label': 'Mean {horizon}-day Return (%)',
+        'turnover_label': 'Turnover',
+        'turnover_chart_title': 'Quantile Turnover (20d MA)',
+        'job_kind_factor': 'Factor',
         'model_training': 'Model Training',
         'backtest_results': 'Backtest Results',
         'stock_codes': 'Stock Codes (comma separated)',
@@ -87,9 +147,30 @@ TEXTS = {
         'load_data': 'Load Data',
         'loading_data': 'Loading data...',
         'data_preview': 'Data Preview',
+        'grid_filters': 'Filters',
+        'grid_filter_instruments': 'Instruments',
+        'grid_filter_column': 'Value Filter Column',
+        'grid_no_filter': '(none)',
+        'grid_filter_min': 'Min',
+        'grid_filter_max': 'Max',
+        'grid_filter_invalid': 'Min and Max must be numbers; the value filter is ignored.',
+        'grid_sort_by': 'Sort by',
+        'grid_original_order': '(original order)',
+        'grid_sort_order': 'Order',
+        'grid_ascending': 'Asc',
+        'grid_descending': 'Desc',
+        'grid_page_size': 'Rows per Page',
+        'grid_page': 'Page',
+        'grid_page_info': 'Page {page}/{pages} · {rows:,} matching rows of {total:,}',
         'price_trend': 'Price Trend',
         'data_statistics': 'Data Statistics',
         'download_data': 'Download Data',
+        'export_format': 'Export Format',
+        'export_format_csv': 'CSV',
+        'export_format_parquet': 'Parquet (compressed)',
+        'prepare_export': 'Prepare Export',
+        'preparing_export': 'Writing export file...',
+        'export_ready': 'Export file ready ({size:.1f} MB)',
         'no_data_found': 'No data found, please check stock codes and date range. Possible reasons:\n- Incorrect stock code format\n- No trading days in date range\n- Data source temporarily unavailable',
         'data_load_failed': 'Data loading failed',
         'check_items': 'Please check:\n- Stock code format is correct\n- Date range is reasonable\n- Network connection is normal',
@@ -156,23 +237,56 @@ TEXTS = {
         'benchmark_return': 'Benchmark Return',
         'cumulative_return_comparison': 'Cumulative Return Comparison',
         'training_failed': 'Model training failed',
+        'model_registry_hit': 'Loaded this configuration from the model registry, no refit needed.',
+        'model_key_label': 'Registry Key',
+        'cancel_job': 'Cancel',
+        'job_queued': 'Waiting for a free worker...',
+        'job_cancelled': 'The job was cancelled.',
+        'background_jobs_header': '🗂 Background Jobs',
+        'job_kind_col': 'Type',
+        'job_label_col': 'Job',
+        'job_status_col': 'Status',
+        'job_progress_col': 'Progress',
+        'job_created_col': 'Submitted',
+        'job_kind_training': 'Training',
+        'job_kind_backtest': 'Backtest',
+        'job_kind_sweep': 'Parameter Sweep',
+        'job_status_queued': 'Queued',
+        'job_status_running': 'Running',
+        'job_status_done': 'Done',
+        'job_status_failed': 'Failed',
+        'job_status_cancelled': 'Cancelled',
         'mock_data_error': 'Error generating mock data',
         'select_function': 'Select Function',
         'qlib_unavailable': 'Qlib is not installed or unavailable, using mock data for demonstration.',
         'qlib_init_failed': 'Data directory exists but Qlib initialization failed. Check Qlib setup and data path.',
         'no_data_directory': 'Qlib data directory .qlib/qlib_data/cn_data not found. Using mock data.',
         'data_availability_info': "📅 Available data range: ",
+        'query_clamped_info': "The query was limited to the available data range: {start} to {end}.",
+        'expression_fields': 'Expression Fields (one per line)',
+        'expression_fields_help': 'Qlib expressions evaluated for every stock, e.g. Mean($close, 20) or Corr($close, $volume, 10).',
+        'invalid_expression_error': 'Invalid expression',
         'data_range_error': "Query date is out of available data range. Available: {data_start} to {data_end}. Queried: {query_start} to {query_end}.",
         'no_data_found_for_dates_error': "No data found for the specified date range. Please check stock codes or try other dates.",
         'qlib_init_error_runtime': "Qlib not initialized or unavailable. Please check Qlib installation and data path.",
         'using_mock_data_info': "Qlib is unavailable or not initialized. Using mock data for demonstration.",
         'datetime_column_missing_warning': "Cannot plot price chart: 'datetime' column is missing.",
+        'chart_zoom_range': 'Chart Range',
+        'downsample_method': 'Downsampling',
+        'downsample_lttb': 'LTTB (shape)',
+        'downsample_minmax': 'Min/Max (spikes)',
+        'max_chart_points': 'Max Points per Series',
+        'downsampled_caption': 'Showing {shown:,} of {total:,} points (downsampled on the server).',
         'init_model_params': "Initializing model parameters...",
         'loading_train_data': "Loading training data...",
         'feature_engineering': "Feature engineering in progress...",
         'model_training_step': "Model training in progress...",
         'model_validation_step': "Model validation in progress...",
         'saving_model_results': "Saving model results...",
+        'training_iteration': "Training iteration {current}/{total}...",
+        'train_mse_label': "Training MSE",
+        'validation_mse_label': "Validation MSE",
+        'no_loss_curve_info': "This model is fitted in closed form, no iteration curve available.",
         'model_type_label': "Model Type",
         'train_stock_count_label': "Training Stocks Count",
         'train_sample_count_label': "Training Samples",
@@ -221,13 +335,72 @@ TEXTS = {
         'kurtosis_label': "Kurtosis",
         'var_95_label': "VaR (95%)",
         'backtest_run_failed_error': 'Backtest run failed',
+        'backtest_cache_hit': 'Loaded the cached result of this configuration.',
+        'backtest_signal': 'Trading Signal',
+        'symbol_search': 'Search Codes',
+        'symbol_search_placeholder': 'Prefix or approximate code, e.g. 600 or SH6000036',
+        'add_whole_index': 'Add {market}',
+        'clear_symbols': 'Clear',
+        'symbols_selected_info': '{count} selected of {total} known codes',
+        'backtest_signal_help': 'The momentum factor, or the predictions of a model from the registry (trained on the Model Training page).',
+        'momentum_signal_label': '20-day Momentum',
+        'backtest_mode': 'Mode',
+        'backtest_mode_single': 'Single Run',
+        'backtest_mode_sweep': 'Parameter Sweep',
+        'sweep_params_header': 'Sweep Ranges',
+        'sweep_steps': 'Steps',
+        'sweep_combinations_info': '{count} combinations (at most {limit})',
+        'sweep_too_many_error': 'Too many combinations: {count}, at most {limit}',
+        'run_sweep': 'Run Sweep',
+        'sweep_progress': 'Backtests finished: {done}/{total}',
+        'sweep_failed_error': 'Parameter sweep failed',
+        'sweep_results_header': 'Sweep Results',
+        'sweep_sort_by': 'Sort by',
+        'sweep_surface_header': 'Metric Surface',
+        'sweep_surface_x': 'X Axis',
+        'sweep_surface_y': 'Y Axis',
+        'sweep_surface_metric': 'Metric',
+        'sweep_surface_note': 'Each cell shows the best value over the other swept parameters.',
+        'sweep_compare_header': 'Top Parameter Sets',
+        'sweep_compare_title': 'Cumulative Return of the Top {count} by {metric}',
+        'daily_mean': 'Avg Daily Return',
+        'daily_std': 'Std Dev Daily Return',
+        'skewness': 'Skewness',
+        'kurtosis': 'Kurtosis',
+        'var_95': 'VaR (95%)',
+        'max_drawdown_days': 'Longest Drawdown (days)',
+        'rolling_sharpe_header': 'Rolling Sharpe Ratio',
+        'rolling_sharpe_title': 'Sharpe Ratio over a Trailing {window}-Day Window',
+        'rolling_sharpe_not_enough_data': 'At least {window} trading days are needed for the rolling Sharpe ratio.',
+        'sweep_need_two_params': 'Sweep at least two parameters to draw a surface.',
         'usage_instructions_header': 'ℹ️ Usage Instructions',
         'data_view_instruction': 'Data View',
         'data_view_desc': 'Enter stock codes to view historical data.',
+        'factor_analysis_instruction': 'Factor Analysis',
+        'factor_analysis_desc': 'Evaluate an expression over a universe: IC, quantile returns and turnover.',
+        'factor_cache_hit': 'Loaded the cached analysis of this factor.',
         'model_training_instruction': 'Model Training',
         'model_training_desc': 'Select and train a model.',
         'backtest_results_instruction': 'Backtest Results',
         'backtest_results_desc': 'Run strategy backtests and analyze results.',
+        'performance_header': 'Performance',
+        'telemetry_time_col': 'Time',
+        'telemetry_action_col': 'Action',
+        'telemetry_stage_col': 'Stage',
+        'telemetry_duration_col': 'Duration',
+        'telemetry_rows_col': 'Rows',
+        'telemetry_size_col': 'Size',
+        'telemetry_empty': 'No timings recorded yet.',
+        'telemetry_cache_col': 'Cache',
+        'telemetry_hit_rate_col': 'Hit Rate',
+        'telemetry_lookups_col': 'Lookups',
+        'telemetry_file_caption': 'All records: {path}',
+        'cache_name_data_cache': 'Data cache (disk)',
+        'cache_name_expression_cache': 'Expression cache',
+        'cache_name_backtest': 'Backtest results',
+        'cache_name_factor': 'Factor analyses',
+        'cache_name_correlation': 'Correlation matrices',
+        'cache_name_model_registry': 'Model registry',
         'system_status_header': 'System Status',
         'qlib_connected_status': "Qlib Connected",
         'qlib_not_initialized_status': "Qlib not initialized (or initialization failed). ",
@@ -238,12 +411,70 @@ TEXTS = {
         'version_label': 'Version',
         'last_updated_label': 'Last Updated',
         'initializing_qlib': 'Initializing Qlib, please wait...', 
+        'startup_timing_header': '⏱ Startup Timing',
+        'timing_stage_col': 'Stage',
+        'timing_this_run_col': 'This Run',
+        'timing_first_run_col': 'Cold Start',
+        'timing_imports': 'Imports',
+        'timing_qlib_init': 'Qlib Init',
+        'timing_page': 'Page Rendered',
 
     },
     'zh': {
         'title': 'Qlib量化投资平台',
         'sidebar_title': 'Qlib量化投资平台',
         'data_view': '数据查看',
+        'data_view_mode': '视图',
+        'data_view_mode_prices': '价格数据',
+        'data_view_mode_correlation': '相关性热力图',
+        'correlation_method': '统计量',
+        'correlation_method_correlation': '收益相关系数',
+        'correlation_method_covariance': '收益协方差',
+        'min_common_days': '最少共同交易日',
+        'heatmap_max_cells': '热力图每边格数',
+        'cluster_order': '按层次聚类排序',
+        'compute_correlation': '计算热力图',
+        'correlation_failed': '相关性计算失败',
+        'loading_correlation_data': '正在加载日收益率...',
+        'computing_correlation': '正在计算两两统计量...',
+        'clustering_instruments': '正在对股票聚类...',
+        'instrument_count_label': '股票数',
+        'mean_correlation_label': '平均相关系数',
+        'mean_covariance_label': '平均协方差',
+        'heatmap_decimated_caption': '每格为 {total} 只股票中最多 {block}×{block} 个股票对的平均值。',
+        'top_pairs_header': '相关性最强的股票对',
+        'pair_instrument_1': '股票1',
+        'pair_instrument_2': '股票2',
+        'job_kind_correlation': '相关性',
+        'factor_analysis': '因子分析',
+        'factor_expression': '因子表达式',
+        'factor_universe': '股票池',
+        'factor_universe_help': '市场名称（如 csi300、csi500、all），或以逗号分隔的股票代码列表。',
+        'label_horizon': '标签周期（天）',
+        'quantile_count': '分组数',
+        'factor_start_date': '分析开始日期',
+        'factor_end_date': '分析结束日期',
+        'run_factor_analysis': '分析因子',
+        'factor_analysis_failed': '因子分析失败',
+        'loading_factor_data': '正在计算因子值和未来收益...',
+        'computing_factor_statistics': '正在计算IC、分组收益和换手率...',
+        'instruments_label': '只股票',
+        'ic_mean_label': 'IC均值',
+        'icir_label': 'ICIR',
+        'rank_ic_mean_label': 'Rank IC均值',
+        'rank_icir_label': 'Rank ICIR',
+        'ic_positive_ratio_label': 'IC>0占比',
+        'top_turnover_label': '最高组换手率',
+        'long_short_return_label': '多空组合收益',
+        'ic_chart_title': '每日IC与20日Rank IC',
+        'rank_ic_ma_legend': 'Rank IC（20日均值）',
+        'quantile_label': '分组',
+        'quantile_cum_chart_title': '各分组累计收益',
+        'quantile_mean_chart_title': '各分组平均未来收益',
+        'quantile_mean_axis_label': '平均{horizon}日收益 (%)',
+        'turnover_label': '换手率',
+        'turnover_chart_title': '分组换手率（20日均值）',
+        'job_kind_factor': '因子',
         'model_training': '模型训练',
         'backtest_results': '回测结果',
         'stock_codes': '股票代码 (用逗号分隔)',
@@ -253,9 +484,30 @@ TEXTS = {
         'load_data': '加载数据',
         'loading_data': '正在加载数据...',
         'data_preview': '数据预览',
+        'grid_filters': '筛选',
+        'grid_filter_instruments': '股票',
+        'grid_filter_column': '数值筛选列',
+        'grid_no_filter': '（不筛选）',
+        'grid_filter_min': '最小值',
+        'grid_filter_max': '最大值',
+        'grid_filter_invalid': '最小值和最大值必须是数字，数值筛选未生效。',
+        'grid_sort_by': '排序字段',
+        'grid_original_order': '（原始顺序）',
+        'grid_sort_order': '顺序',
+        'grid_ascending': '升序',
+        'grid_descending': '降序',
+        'grid_page_size': '每页行数',
+        'grid_page': '页码',
+        'grid_page_info': '第 {page}/{pages} 页 · 符合条件 {rows:,} 行，共 {total:,} 行',
         'price_trend': '价格走势',
         'data_statistics': '数据统计',
         'download_data': '下载数据',
+        'export_format': '导出格式',
+        'export_format_csv': 'CSV',
+        'export_format_parquet': 'Parquet（压缩）',
+        'prepare_export': '生成导出文件',
+        'preparing_export': '正在写入导出文件...',
+        'export_ready': '导出文件已生成（{size:.1f} MB）',
         'no_data_found': '未找到数据，请检查股票代码和日期范围。可能的原因：\n- 股票代码格式不正确\n- 日期范围内没有交易日\n- 数据源暂时不可用',
         'data_load_failed': '数据加载失败',
         'check_items': '请检查：\n- 股票代码格式是否正确\n- 日期范围是否合理\n- 网络连接是否正常',
@@ -322,23 +574,56 @@ TEXTS = {
         'benchmark_return': '基准收益',
         'cumulative_return_comparison': '累计收益曲线对比',
         'training_failed': '模型训练失败',
+        'model_registry_hit': '已从模型注册表加载该配置的模型，无需重新训练。',
+        'model_key_label': '注册表键',
+        'cancel_job': '取消',
+        'job_queued': '正在等待空闲的工作进程...',
+        'job_cancelled': '任务已取消。',
+        'background_jobs_header': '🗂 后台任务',
+        'job_kind_col': '类型',
+        'job_label_col': '任务',
+        'job_status_col': '状态',
+        'job_progress_col': '进度',
+        'job_created_col': '提交时间',
+        'job_kind_training': '训练',
+        'job_kind_backtest': '回测',
+        'job_kind_sweep': '参数扫描',
+        'job_status_queued': '排队中',
+        'job_status_running': '运行中',
+        'job_status_done': '已完成',
+        'job_status_failed': '失败',
+        'job_status_cancelled': '已取消',
         'mock_data_error': '生成模拟数据时发生错误',
         'select_function': '选择功能',
         'qlib_unavailable': 'Qlib未安装或不可用，将使用模拟数据进行演示。',
         'qlib_init_failed': '数据目录存在但Qlib初始化失败。请检查Qlib设置和数据路径。',
         'no_data_directory': '未检测到数据目录 .qlib/qlib_data/cn_data，将使用模拟数据。',
         'data_availability_info': "📅 数据可用日期范围: ",
+        'query_clamped_info': "查询范围已截取到可用数据范围: {start} 至 {end}。",
+        'expression_fields': '表达式字段（每行一个）',
+        'expression_fields_help': '对每只股票计算的 Qlib 表达式，例如 Mean($close, 20) 或 Corr($close, $volume, 10)。',
+        'invalid_expression_error': '表达式无效',
         'data_range_error': "查询日期超出数据范围。可用数据范围: {data_start} 至 {data_end}，查询范围: {query_start} 至 {query_end}。",
         'no_data_found_for_dates_error': "在指定日期范围内未找到数据。请检查股票代码是否正确，或尝试其他日期范围。",
         'qlib_init_error_runtime': "Qlib未初始化或不可用。请检查Qlib安装和数据路径。",
         'using_mock_data_info': "Qlib不可用或未初始化，正在使用模拟数据。",
         'datetime_column_missing_warning': "无法绘制价格图表：缺少 'datetime' 列。",
+        'chart_zoom_range': '图表区间',
+        'downsample_method': '降采样方式',
+        'downsample_lttb': 'LTTB（保持形状）',
+        'downsample_minmax': '最小/最大值（保留尖峰）',
+        'max_chart_points': '每条曲线最大点数',
+        'downsampled_caption': '显示 {shown:,} / {total:,} 个点（已在服务端降采样）。',
         'init_model_params': "初始化模型参数...",
         'loading_train_data': "加载训练数据...",
         'feature_engineering': "特征工程处理中...",
         'model_training_step': "模型训练中...",
         'model_validation_step': "模型验证中...",
         'saving_model_results': "保存模型结果...",
+        'training_iteration': "训练迭代 {current}/{total}...",
+        'train_mse_label': "训练均方误差",
+        'validation_mse_label': "验证均方误差",
+        'no_loss_curve_info': "该模型为闭式求解，没有迭代损失曲线。",
         'model_type_label': "模型类型",
         'train_stock_count_label': "训练股票数",
         'train_sample_count_label': "训练样本数",
@@ -387,13 +672,72 @@ TEXTS = {
         'kurtosis_label': "峰度",
         'var_95_label': "VaR(95%)",
         'backtest_run_failed_error': '回测运行失败',
+        'backtest_cache_hit': '已从缓存加载该配置的回测结果。',
+        'backtest_signal': '交易信号',
+        'symbol_search': '搜索代码',
+        'symbol_search_placeholder': '代码前缀或近似代码，如 600 或 SH6000036',
+        'add_whole_index': '加入 {market}',
+        'clear_symbols': '清空',
+        'symbols_selected_info': '已选 {count} 个，共 {total} 个代码',
+        'backtest_signal_help': '动量因子，或模型注册表中模型（在模型训练页面训练）的预测值。',
+        'momentum_signal_label': '20日动量',
+        'backtest_mode': '模式',
+        'backtest_mode_single': '单次回测',
+        'backtest_mode_sweep': '参数扫描',
+        'sweep_params_header': '扫描区间',
+        'sweep_steps': '步数',
+        'sweep_combinations_info': '共 {count} 个组合（上限 {limit}）',
+        'sweep_too_many_error': '组合数过多：{count}，上限为 {limit}',
+        'run_sweep': '运行参数扫描',
+        'sweep_progress': '已完成回测：{done}/{total}',
+        'sweep_failed_error': '参数扫描失败',
+        'sweep_results_header': '扫描结果',
+        'sweep_sort_by': '排序指标',
+        'sweep_surface_header': '指标曲面',
+        'sweep_surface_x': 'X 轴',
+        'sweep_surface_y': 'Y 轴',
+        'sweep_surface_metric': '指标',
+        'sweep_surface_note': '每个格子显示其余扫描参数下的最优值。',
+        'sweep_compare_header': '最优参数组合',
+        'sweep_compare_title': '按{metric}排名前 {count} 组的累计收益',
+        'daily_mean': '平均日收益',
+        'daily_std': '日收益标准差',
+        'skewness': '偏度',
+        'kurtosis': '峰度',
+        'var_95': 'VaR(95%)',
+        'max_drawdown_days': '最长回撤（天）',
+        'rolling_sharpe_header': '滚动夏普比率',
+        'rolling_sharpe_title': '最近 {window} 个交易日窗口的夏普比率',
+        'rolling_sharpe_not_enough_data': '滚动夏普比率至少需要 {window} 个交易日的数据。',
+        'sweep_need_two_params': '至少扫描两个参数才能绘制曲面。',
         'usage_instructions_header': 'ℹ️ 使用说明',
         'data_view_instruction': '数据查看',
         'data_view_desc': '输入股票代码查看历史数据',
+        'factor_analysis_instruction': '因子分析',
+        'factor_analysis_desc': '在股票池上评估表达式因子：IC、分组收益和换手率',
+        'factor_cache_hit': '已从缓存加载该因子的分析结果。',
         'model_training_instruction': '模型训练',
         'model_training_desc': '选择模型进行训练',
         'backtest_results_instruction': '回测结果',
         'backtest_results_desc': '运行策略回测分析',
+        'performance_header': '性能',
+        'telemetry_time_col': '时间',
+        'telemetry_action_col': '操作',
+        'telemetry_stage_col': '阶段',
+        'telemetry_duration_col': '耗时',
+        'telemetry_rows_col': '行数',
+        'telemetry_size_col': '大小',
+        'telemetry_empty': '尚无耗时记录。',
+        'telemetry_cache_col': '缓存',
+        'telemetry_hit_rate_col': '命中率',
+        'telemetry_lookups_col': '查询次数',
+        'telemetry_file_caption': '完整记录：{path}',
+        'cache_name_data_cache': '数据缓存（磁盘）',
+        'cache_name_expression_cache': '表达式缓存',
+        'cache_name_backtest': '回测结果',
+        'cache_name_factor': '因子分析',
+        'cache_name_correlation': '相关性矩阵',
+        'cache_name_model_registry': '模型注册表',
         'system_status_header': '系统状态',
         'qlib_connected_status': "Qlib已连接",
         'qlib_not_initialized_status': "Qlib未初始化 (或初始化失败)。",
@@ -404,6 +748,13 @@ TEXTS = {
         'version_label': '版本',
         'last_updated_label': '更新',
         'initializing_qlib': '正在初始化Qlib，请稍候...', 
+        'startup_timing_header': '⏱ 启动耗时',
+        'timing_stage_col': '阶段',
+        'timing_this_run_col': '本次运行',
+        'timing_first_run_col': '冷启动',
+        'timing_imports': '模块导入',
+        'timing_qlib_init': 'Qlib初始化',
+        'timing_page': '页面渲染完成',
     }
 }
 
@@ -426,29 +777,37 @@ def get_text(key, default_text=None):
     return current_lang_texts.get(key, default_text if default_text is not None else f"Missing translation for: {key} in {current_language}")
 
 
-# 检查Qlib是否可用
-try:
-    import qlib
-    from qlib.data import D
-    from qlib.config import REG_CN
-    QLIB_AVAILABLE = True
-except ImportError:
-    QLIB_AVAILABLE = False
+# 检查Qlib是否可用（只检查是否已安装，导入推迟到初始化时）
+QLIB_AVAILABLE = importlib.util.find_spec("qlib") is not None
 
 
 # 检查数据目录是否存在
 def check_data_directory():
-    data_path = os.path.join(".qlib", "qlib_data", "cn_data") 
+    data_path = settings.QLIB_DATA_DIR
     return os.path.exists(data_path) and os.path.isdir(data_path)
 
-# 初始化Qlib（如果可用）
-def init_qlib():
+def _run_qlib_init(provider_uri):
+    import qlib
+    from qlib.config import REG_CN
+    qlib.init(provider_uri=provider_uri, region=REG_CN)
+    return True
+
+# qlib.init 在每个服务进程中只执行一次（后台线程），所有会话共享，首屏渲染不必等待
+@st.cache_resource(show_spinner=False)
+def start_qlib_init(provider_uri):
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="qlib_init").submit(_run_qlib_init, provider_uri)
+
+# 初始化Qlib（如果可用）；wait=False 时只查询后台初始化是否已完成
+def init_qlib(wait=True):
     if QLIB_AVAILABLE:
         if check_data_directory():
+            init_future = start_qlib_init(settings.provider_uri())
+            if not wait and not init_future.done():
+                return False
             try:
-                qlib.init(provider_uri=os.path.join(".qlib", "qlib_data", "cn_data"), region=REG_CN)
-                return True
+                return init_future.result()
             except Exception as e:
+                start_qlib_init.clear()  # 失败不缓存，下次重新尝试
                 st.error(f"{get_text('qlib_init_failed', 'Data directory exists but Qlib initialization failed. Check Qlib setup and data path.')}: {e}")
                 return False
         else:
@@ -456,30 +815,34 @@ def init_qlib():
             return False
     return False
 
-# 加载股票数据
-@st.cache_data
+# HTTP API 与界面运行在同一服务进程中，共用 Qlib 初始化、进程内缓存和任务队列
+@st.cache_resource(show_spinner=False)
+def start_api_server(port):
+    from gui import api
+    init_future = start_qlib_init(settings.provider_uri())
+    return api.start_in_thread(port, ready=init_future.result)
+
+if settings.API_PORT and QLIB_AVAILABLE and check_data_directory():
+    start_api_server(settings.API_PORT)
+
+# 需要 Qlib 的操作调用：等待后台初始化完成并记录到会话状态
+def ensure_qlib():
+    if QLIB_AVAILABLE and not st.session_state.get('qlib_initialized', False):
+        with st.spinner(get_text("initializing_qlib")):
+            st.session_state.qlib_initialized = init_qlib(wait=True)
+    return st.session_state.get('qlib_initialized', False)
+
+# 加载股票数据（经由跨会话共享的列式磁盘缓存，与 HTTP API 共用 gui.dataload）
 def load_stock_data(symbols, start_date_iso, end_date_iso, fields):
     """加载股票数据，只使用真实数据"""
     if not QLIB_AVAILABLE or 'qlib_initialized' not in st.session_state or not st.session_state.qlib_initialized:
         raise Exception("Qlib_not_initialized_or_unavailable")
 
+    from gui import dataload
+
     start_date_obj = datetime.fromisoformat(start_date_iso).date() 
     end_date_obj = datetime.fromisoformat(end_date_iso).date()   
-
-    DATA_PROVIDER_START_DATE = datetime(1999, 11, 10).date()
-    DATA_PROVIDER_END_DATE = datetime(2020, 9, 25).date()
-
-    if start_date_obj < DATA_PROVIDER_START_DATE or end_date_obj > DATA_PROVIDER_END_DATE:
-        raise Exception(f"Date_out_of_range:{DATA_PROVIDER_START_DATE.isoformat()}:{DATA_PROVIDER_END_DATE.isoformat()}:{start_date_obj.isoformat()}:{end_date_obj.isoformat()}")
-
-    try:
-        formatted_fields = [f"${field}" if not field.startswith('$') else field for field in fields]
-        data = D.features(symbols, formatted_fields, start_time=str(start_date_obj), end_time=str(end_date_obj))
-        if data is None or data.empty:
-            raise Exception("No_data_found_for_dates")
-        return data
-    except Exception as e:
-        raise Exception(f"Data_loading_failed_internal:{str(e)}")
+    return dataload.load_frame(symbols, start_date_obj, end_date_obj, fields)
 
 
 # 生成模拟数据
@@ -502,77 +865,130 @@ def generate_mock_data(symbols, start_date_obj, end_date_obj, fields):
         if not fields:
             fields = default_fields
         
-        data_list = []
-        
+        # 一次性读取全部股票，向量化完成日期筛选、重命名和字段投影
+        price_fields = ['open', 'high', 'low', 'close']
         try:
-            # Initialize Qlib if not already initialized
-            try:
+            import qlib
+            from qlib.constant import REG_CN
+            from qlib.data import D
+
+            # 本地数据目录不可用时，尝试 Qlib 默认的用户目录数据
+            if not st.session_state.get('qlib_initialized', False):
                 qlib.init(provider_uri="~/.qlib/qlib_data/cn_data", region=REG_CN)
-            except:
-                pass  # Already initialized
-            
-            # Get real data from Qlib
-            for symbol in symbols:
-                try:
-                    # Fetch real stock data from Qlib
-                    stock_data = D.features(
-                        [symbol], 
-                        ["$open", "$high", "$low", "$close", "$volume"],
-                        start_time=start_date.strftime('%Y-%m-%d'),
-                        end_time=end_date.strftime('%Y-%m-%d')
-                    )
-                    
-                    if not stock_data.empty:
-                        # Process real data
-                        stock_data = stock_data.droplevel(0)  # Remove instrument level
-                        stock_data.index = pd.to_datetime(stock_data.index)
-                        
-                        for date_val in date_range:
-                            if date_val in stock_data.index:
-                                row = stock_data.loc[date_val]
-                                row_data = {
-                                    'datetime': date_val,
-                                    'instrument': symbol,
-                                    'open': round(float(row['$open']), 2),
-                                    'high': round(float(row['$high']), 2),
-                                    'low': round(float(row['$low']), 2),
-                                    'close': round(float(row['$close']), 2),
-                                    'volume': int(row['$volume'])
-                                }
-                                
-                                filtered_row = {'datetime': date_val, 'instrument': symbol}
-                                for field in fields:
-                                    if field in row_data:
-                                        filtered_row[field] = row_data[field]
-                                    else:
-                                        filtered_row[field] = 0.0
-                                
-                                data_list.append(filtered_row)
-                    else:
-                        # No real data available
-                        st.warning(f"No real data available for {symbol}")
-                         
-                except Exception as e:
-                    # Error fetching data
-                    st.warning(f"Error fetching data for {symbol}: {str(e)}")
-                     
+            raw = D.features(
+                symbols,
+                [f"${name}" for name in price_fields + ['volume']],
+                start_time=date_range[0].strftime('%Y-%m-%d'),
+                end_time=date_range[-1].strftime('%Y-%m-%d')
+            )
         except Exception as e:
             st.error(f"Error initializing Qlib: {str(e)}")
             return pd.DataFrame()
-        
-        df = pd.DataFrame(data_list)
-        
-        if df.empty:
+
+        if raw is None or raw.empty:
+            st.warning(f"No real data available for {', '.join(symbols)}")
             return pd.DataFrame()
-        
-        df.set_index(['datetime', 'instrument'], inplace=True)
-        
+
+        raw = raw.rename(columns=lambda col: col.lstrip('$')).dropna(how='all')
+        raw = raw[raw.index.get_level_values('datetime').isin(date_range)].copy()
+        loaded = set(raw.index.get_level_values('instrument'))
+        missing = [symbol for symbol in symbols if symbol not in loaded]
+        if missing:
+            st.warning(f"No real data available for {', '.join(missing)}")
+        if raw.empty:
+            return pd.DataFrame()
+
+        raw[price_fields] = raw[price_fields].round(2)
+        raw['volume'] = raw['volume'].fillna(0).astype('int64')
+        df = raw.reindex(columns=fields, fill_value=0.0)
+        df.index = df.index.swaplevel('instrument', 'datetime')
         return df
         
     except Exception as e:
         st.error(f"{get_text('mock_data_error')}: {str(e)}")
         return pd.DataFrame()
 
+# 显示后台任务的状态和进度；任务未结束时持续轮询，返回最终的任务记录
+def follow_job(job_id, cancel_key, failed_text_key):
+    job_queue = jobs.get_queue()
+    job = job_queue.get(job_id)
+    if job is None:
+        return None
+    if job['status'] in jobs.ACTIVE and st.button(get_text('cancel_job'), key=cancel_key):
+        job_queue.cancel(job_id)
+        job = job_queue.get(job_id)
+    if job['status'] in jobs.ACTIVE:
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        while job['status'] in jobs.ACTIVE:
+            progress_bar.progress(int(job['progress'] * 100))
+            if job['status'] == jobs.QUEUED:
+                status_text.text(get_text('job_queued'))
+            elif job['message_key']:
+                status_text.text(get_text(job['message_key']).format(**job['message_fmt']))
+            time.sleep(0.5)
+            job = job_queue.get(job_id)
+        progress_bar.empty()
+        status_text.empty()
+    if job['status'] == jobs.FAILED:
+        st.error(f"{get_text(failed_text_key)}: {job['error'].splitlines()[0] if job['error'] else ''}")
+    elif job['status'] == jobs.CANCELLED:
+        st.warning(get_text('job_cancelled'))
+    return job
+
+# 股票代码选择：基于本地 instruments 文件的搜索索引做自动补全，可一键加入整个指数；
+# 没有本地数据时退化为逗号分隔的文本输入
+def symbol_picker(label, key, default_symbols):
+    from gui import instruments
+
+    symbol_index = instruments.get_index() if check_data_directory() else None
+    if symbol_index is None:
+        symbols_text = st.text_input(label, ",".join(default_symbols), key=f'{key}_text')
+        return [s.strip().upper() for s in symbols_text.split(',') if s.strip()]
+
+    selected_key = f'{key}_selected'
+    if selected_key not in st.session_state:
+        st.session_state[selected_key] = [s.upper() for s in default_symbols if symbol_index.contains(s)]
+    search_query = st.text_input(get_text('symbol_search'), key=f'{key}_query',
+                                 placeholder=get_text('symbol_search_placeholder'))
+    search_matches = symbol_index.search(search_query) if search_query.strip() else []
+    quick_markets = [m for m in instruments.QUICK_ADD_MARKETS if symbol_index.members(m)]
+    button_cols = st.columns(len(quick_markets) + 1)
+    for button_col, market in zip(button_cols, quick_markets):
+        if button_col.button(get_text('add_whole_index').format(market=market.upper()), key=f'{key}_add_{market}'):
+            current = st.session_state[selected_key]
+            st.session_state[selected_key] = current + [c for c in symbol_index.members(market) if c not in set(current)]
+    if button_cols[-1].button(get_text('clear_symbols'), key=f'{key}_clear'):
+        st.session_state[selected_key] = []
+    selected = st.session_state[selected_key]
+    # 选项 = 已选代码 + 本次搜索结果，避免把数千个代码一次性发送到浏览器
+    options = selected + [c for c in search_matches if c not in set(selected)]
+    selected = st.multiselect(label, options, key=selected_key)
+    st.caption(get_text('symbols_selected_info').format(count=len(selected), total=len(symbol_index)))
+    return selected
+
+
+# 侧边栏性能面板显示的最近阶段数
+TELEMETRY_ROWS = 20
+
+# 回测策略类型对应的界面文本
+STRATEGY_TEXT_KEYS = {
+    'long_short': 'long_short_strategy',
+    'long_only': 'long_only_strategy',
+    'market_neutral': 'market_neutral',
+}
+
+# 参数扫描的区间滑块：(最小值, 最大值, 默认区间, 步长, 格式, 默认步数)，与单次回测的滑块一致
+SWEEP_SLIDERS = {
+    'max_position': (0.05, 0.3, (0.05, 0.2), 0.01, "%.2f", 4),
+    'stop_loss': (0.05, 0.2, (0.05, 0.15), 0.01, "%.2f", 3),
+    'take_profit': (0.1, 0.5, (0.1, 0.4), 0.05, "%.2f", 3),
+    'commission_rate': (0.0001, 0.003, (0.0005, 0.0015), 0.0001, "%.4f", 1),
+    'slippage': (0.0001, 0.002, (0.0005, 0.001), 0.0001, "%.4f", 1),
+}
+# 参数扫描结果中对比累计收益曲线的组数
+SWEEP_COMPARE_TOP = 5
+
 # --- Main App Logic ---
 
 lang_col1, lang_col2 = st.sidebar.columns(2)
@@ -586,124 +1002,466 @@ with lang_col2:
         st.experimental_rerun()
 
 st.sidebar.title(get_text('sidebar_title'))
-page_options = [get_text('data_view'), get_text('model_training'), get_text('backtest_results')]
+page_options = [get_text('data_view'), get_text('factor_analysis'), get_text('model_training'), get_text('backtest_results')]
 page = st.sidebar.selectbox(get_text('select_function'), page_options, key='page_selector')
 
-if 'qlib_initialized' not in st.session_state:
-    if QLIB_AVAILABLE:
-        with st.spinner(get_text("initializing_qlib")): 
-            st.session_state.qlib_initialized = init_qlib()
-    else:
-        st.session_state.qlib_initialized = False
+if not st.session_state.get('qlib_initialized', False):
+    st.session_state.qlib_initialized = init_qlib(wait=False) if QLIB_AVAILABLE else False
 
 if not QLIB_AVAILABLE: 
     st.warning(get_text('qlib_unavailable'))
 
+record_timing('timing_qlib_init')
+
 
 # 数据查看页面
 if page == get_text('data_view'):
+    import plotly.express as px
+    from gui import charts, export, grid
+
     st.title(get_text('data_view'))
     
-    st.info(get_text('data_availability_info'))
+    data_bounds = data_range.calendar_bounds() if check_data_directory() else None
+    if data_bounds:
+        st.info(f"{get_text('data_availability_info')}{data_bounds[0].isoformat()} ~ {data_bounds[1].isoformat()}")
+        default_end_date = data_bounds[1]
+        default_start_date = max(data_bounds[0], default_end_date - timedelta(days=24))
+    else:
+        default_end_date = datetime(2020, 9, 25)
+        default_start_date = datetime(2020, 9, 1)
+
+    data_view_mode = st.radio(get_text('data_view_mode'), ['prices', 'correlation'],
+                              format_func=lambda k: get_text(f'data_view_mode_{k}'), horizontal=True)
 
+    # 相关性热力图：大股票池的收益相关/协方差矩阵在后台任务中分块计算，聚类排序后降采样显示
+    if data_view_mode == 'correlation':
+        from gui import correlation, factor
 
-    col1, col2 = st.columns(2)
-    with col1:
-        symbols_input = st.text_input(get_text('stock_codes'), "sz300033,sh600000") 
-        start_date_input = st.date_input(get_text('start_date'), datetime(2020, 9, 1))
-    with col2:
-        fields_input = st.multiselect(get_text('select_fields'), ["close", "open", "high", "low", "volume"], ["close"])
-        end_date_input = st.date_input(get_text('end_date'), datetime(2020, 9, 25))
+        corr_col1, corr_col2, corr_col3 = st.columns(3)
+        with corr_col1:
+            corr_universe_input = st.text_input(get_text('factor_universe'), "csi300", help=get_text('factor_universe_help'))
+            corr_method_input = st.selectbox(get_text('correlation_method'), [correlation.CORRELATION, correlation.COVARIANCE],
+                                             format_func=lambda k: get_text(f'correlation_method_{k}'))
+        with corr_col2:
+            corr_start_date_input = st.date_input(get_text('start_date'), max(data_bounds[0], data_bounds[1] - timedelta(days=365))
+                                                  if data_bounds else default_start_date, key='corr_start_date')
+            corr_min_periods_input = st.number_input(get_text('min_common_days'), min_value=2, max_value=1000,
+                                                     value=correlation.DEFAULT_MIN_PERIODS, step=5)
+        with corr_col3:
+            corr_end_date_input = st.date_input(get_text('end_date'), default_end_date, key='corr_end_date')
+            corr_max_cells_input = st.number_input(get_text('heatmap_max_cells'), min_value=50, max_value=1000,
+                                                   value=correlation.DEFAULT_MAX_CELLS, step=50)
+        corr_clustered_input = st.checkbox(get_text('cluster_order'), value=True)
+
+        if st.button(get_text('compute_correlation'), type="primary"):
+            try:
+                if not corr_universe_input.strip():
+                    raise ValueError(get_text('at_least_one_code'))
+                if corr_start_date_input >= corr_end_date_input:
+                    raise ValueError(get_text('start_before_end'))
+                if not ensure_qlib():
+                    raise RuntimeError(get_text('qlib_init_error_runtime'))
+                corr_range = data_range.clamp_range(corr_start_date_input, corr_end_date_input, data_bounds)
+                if corr_range is None:
+                    raise ValueError(get_text('data_range_error').format(
+                        data_start=data_bounds[0].isoformat(), data_end=data_bounds[1].isoformat(),
+                        query_start=corr_start_date_input.isoformat(), query_end=corr_end_date_input.isoformat()))
+                corr_config = {
+                    'universe': factor.parse_universe(corr_universe_input),
+                    'start_date': corr_range[0].isoformat(),
+                    'end_date': corr_range[1].isoformat(),
+                    'method': corr_method_input,
+                    'min_periods': int(corr_min_periods_input),
+                    'max_cells': int(corr_max_cells_input),
+                    'clustered': bool(corr_clustered_input),
+                    # 数据更新后矩阵缓存自动失效
+                    'data_end': data_bounds[1].isoformat() if data_bounds else None,
+                }
+                corr_job_id = jobs.get_queue().submit('correlation', correlation.run_correlation, corr_config,
+                                                      label=f"{corr_method_input} / {corr_universe_input.strip()[:20]}")
+                st.session_state.correlation_job = (corr_job_id, corr_config)
+            except Exception as e_corr:
+                st.error(f"{get_text('correlation_failed')}: {e_corr}")
+
+        correlation_job = st.session_state.get('correlation_job')
+        if correlation_job:
+            corr_job_id, corr_config = correlation_job
+            corr_job = follow_job(corr_job_id, 'cancel_correlation_job', 'correlation_failed')
+            if corr_job is not None and corr_job['status'] == jobs.DONE:
+                corr_result = jobs.get_queue().result(corr_job_id)
+                corr_m1, corr_m2, corr_m3 = st.columns(3)
+                corr_m1.metric(get_text('instrument_count_label'), f"{corr_result['instrument_count']:,}")
+                corr_m2.metric(get_text('trading_days'), f"{corr_result['date_count']:,}")
+                corr_m3.metric(get_text(f"mean_{corr_config['method']}_label"), f"{corr_result['mean_value']:.4f}")
+                fig_corr = px.imshow(corr_result['display'], x=corr_result['labels'], y=corr_result['labels'],
+                                     color_continuous_scale='RdBu_r',
+                                     zmin=-1 if corr_config['method'] == correlation.CORRELATION else None,
+                                     zmax=1 if corr_config['method'] == correlation.CORRELATION else None,
+                                     aspect='auto')
+                fig_corr.update_xaxes(showticklabels=len(corr_result['labels']) <= 60)
+                fig_corr.update_yaxes(showticklabels=len(corr_result['labels']) <= 60)
+                fig_corr.update_layout(title=get_text(f"correlation_method_{corr_config['method']}"), height=700)
+                st.plotly_chart(fig_corr, use_container_width=True)
+                if corr_result['cells_per_block'] > 1:
+                    st.caption(get_text('heatmap_decimated_caption').format(block=corr_result['cells_per_block'],
+                                                                            total=corr_result['instrument_count']))
+                st.subheader(get_text('top_pairs_header'))
+                st.dataframe(corr_result['top_pairs'].rename(columns={
+                    'instrument_1': get_text('pair_instrument_1'), 'instrument_2': get_text('pair_instrument_2'),
+                    'value': get_text(f"correlation_method_{corr_config['method']}")}), use_container_width=True)
+
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            symbol_list = symbol_picker(get_text('stock_codes'), 'data_view_symbols', ["SZ300033", "SH600000"])
+            start_date_input = st.date_input(get_text('start_date'), default_start_date)
+        with col2:
+            fields_input = st.multiselect(get_text('select_fields'), ["close", "open", "high", "low", "volume"], ["close"])
+            end_date_input = st.date_input(get_text('end_date'), default_end_date)
+        expressions_input = st.text_area(get_text('expression_fields'), "", placeholder="Mean($close, 20)\nCorr($close, $volume, 10)",
+                                         help=get_text('expression_fields_help'))
     
-    if st.button(get_text('load_data'), type="primary"):
-        symbol_list = [s.strip() for s in symbols_input.split(',') if s.strip()]
+        if st.button(get_text('load_data'), type="primary"):
+            expression_list = [e.strip() for e in expressions_input.replace(';', '\n').splitlines() if e.strip()]
         
-        if not symbol_list:
-            st.error(get_text('at_least_one_code'))
-        elif not fields_input:
-            st.error(get_text('at_least_one_field'))
-        elif start_date_input >= end_date_input:
-            st.error(get_text('start_before_end'))
-        else:
-            data_df = pd.DataFrame() 
-            try:
-                with st.spinner(get_text('loading_data')): 
-                    use_qlib = QLIB_AVAILABLE and st.session_state.get('qlib_initialized', False)
-
-                    if use_qlib:
-                        try:
-                            data_df = load_stock_data(symbol_list, start_date_input.isoformat(), end_date_input.isoformat(), fields_input)
-                        except Exception as e_qlib:
-                            error_msg_str = str(e_qlib)
-                            error_key_parts = error_msg_str.split(":")
-                            error_type = error_key_parts[0]
+            if not symbol_list:
+                st.error(get_text('at_least_one_code'))
+            elif not fields_input and not expression_list:
+                st.error(get_text('at_least_one_field'))
+            elif start_date_input >= end_date_input:
+                st.error(get_text('start_before_end'))
+            else:
+                data_df = pd.DataFrame() 
+                try:
+                    with st.spinner(get_text('loading_data')): 
+                        use_qlib = QLIB_AVAILABLE and ensure_qlib()
+
+                        if use_qlib:
+                            # 超出可用范围的部分直接截掉，不必先发起一次注定失败的查询
+                            clamped_range = data_range.clamp_range(start_date_input, end_date_input, data_bounds)
+                            if clamped_range is not None and clamped_range != (start_date_input, end_date_input):
+                                st.info(get_text('query_clamped_info').format(start=clamped_range[0].isoformat(),
+                                                                             end=clamped_range[1].isoformat()))
+                            try:
+                                from gui import expressions
+                                invalid_expressions = []
+                                for expression in expression_list:
+                                    try:
+                                        expressions.compile_expression(expression)
+                                    except ValueError as e_expr:
+                                        invalid_expressions.append(str(e_expr))
+                                if invalid_expressions:
+                                    raise Exception("Invalid_expression:" + "; ".join(invalid_expressions))
+                                data_df = load_stock_data(symbol_list, start_date_input.isoformat(), end_date_input.isoformat(),
+                                                          fields_input + expression_list)
+                            except Exception as e_qlib:
+                                error_msg_str = str(e_qlib)
+                                error_key_parts = error_msg_str.split(":")
+                                error_type = error_key_parts[0]
                             
-                            if error_type == "Date_out_of_range" and len(error_key_parts) == 5:
-                                _, data_start_str, data_end_str, query_start_str, query_end_str = error_key_parts
-                                st.error(
-                                    get_text('data_range_error').format(data_start=data_start_str, data_end=data_end_str, query_start=query_start_str, query_end=query_end_str)
-                                )
-                            elif error_type == "No_data_found_for_dates":
-                                st.error(get_text('no_data_found_for_dates_error'))
-                            elif error_type == "Qlib_not_initialized_or_unavailable":
-                                 st.error(get_text('qlib_init_error_runtime'))
-                            else: 
-                                st.error(f"{get_text('data_load_failed')}: {e_qlib}")
+                                if error_type == "Date_out_of_range" and len(error_key_parts) == 5:
+                                    _, data_start_str, data_end_str, query_start_str, query_end_str = error_key_parts
+                                    st.error(
+                                        get_text('data_range_error').format(data_start=data_start_str, data_end=data_end_str, query_start=query_start_str, query_end=query_end_str)
+                                    )
+                                elif error_type == "Invalid_expression":
+                                    st.error(f"{get_text('invalid_expression_error')}: {error_msg_str.split(':', 1)[1]}")
+                                elif error_type == "No_data_found_for_dates":
+                                    st.error(get_text('no_data_found_for_dates_error'))
+                                elif error_type == "Qlib_not_initialized_or_unavailable":
+                                     st.error(get_text('qlib_init_error_runtime'))
+                                else: 
+                                    st.error(f"{get_text('data_load_failed')}: {e_qlib}")
                             
-                    else:
-                        st.info(get_text('using_mock_data_info'))
-                        data_df = generate_mock_data(symbol_list, start_date_input, end_date_input, fields_input)
-
-                if not data_df.empty:
-                    st.success(f"{get_text('success_loaded')} {len(data_df)} {get_text('records')}")
-                    
-                    st.subheader(get_text('data_preview'))
-                    st.dataframe(data_df.head(100), use_container_width=True)
-                    
-                    price_col_name = None
-                    if 'close' in data_df.columns: price_col_name = 'close'
-                    elif '$close' in data_df.columns: price_col_name = '$close'
-
-                    if price_col_name:
-                        st.subheader(get_text('price_trend'))
-                        chart_data_df = data_df.reset_index()
-                        if 'datetime' not in chart_data_df.columns and 'date' in chart_data_df.columns:
-                             chart_data_df = chart_data_df.rename(columns={'date': 'datetime'})
-
-                        if 'datetime' in chart_data_df.columns:
-                            fig = px.line(chart_data_df, x='datetime', y=price_col_name, color='instrument',
-                                          labels={'datetime': get_text('date_label'), price_col_name: get_text('price_label')})
-                            fig.update_layout(title=get_text('price_chart_title'))
-                            st.plotly_chart(fig, use_container_width=True)
                         else:
-                            st.warning(get_text('datetime_column_missing_warning'))
+                            st.info(get_text('using_mock_data_info'))
+                            with telemetry.stage('data_view', 'mock_data') as mock_record:
+                                data_df = telemetry.measure(mock_record, generate_mock_data(symbol_list, start_date_input, end_date_input, fields_input))
+
+                    if not data_df.empty:
+                        st.success(f"{get_text('success_loaded')} {len(data_df)} {get_text('records')}")
+                        # 保存到会话中，缩放等控件触发重新运行时无需重新加载
+                        st.session_state.data_view_df = data_df
+                        st.session_state.data_view_stats = None
+                    elif use_qlib: 
+                        pass 
+                    else: 
+                        st.warning(get_text('no_data_found'))
+            
+                except Exception as e_main:
+                    st.error(f"{get_text('data_load_failed')}: {str(e_main)}\n\n{get_text('check_items')}")
+
+        data_df = st.session_state.get('data_view_df')
+        if data_df is not None and not data_df.empty:
+            st.subheader(get_text('data_preview'))
+            # 服务端筛选/排序/分页，每次只把当前页发送到浏览器
+            index_levels = [name for name in data_df.index.names if name is not None]
+            numeric_columns = [c for c in data_df.columns if pd.api.types.is_numeric_dtype(data_df[c])]
+            with st.expander(get_text('grid_filters'), expanded=False):
+                filter_col1, filter_col2, filter_col3 = st.columns(3)
+                with filter_col1:
+                    grid_instruments = []
+                    if 'instrument' in index_levels:
+                        grid_instruments = st.multiselect(get_text('grid_filter_instruments'),
+                                                          sorted(data_df.index.get_level_values('instrument').unique()))
+                grid_start = grid_end = None
+                if 'datetime' in index_levels:
+                    grid_dates = data_df.index.get_level_values('datetime')
+                    with filter_col2:
+                        grid_start = st.date_input(get_text('start_date'), grid_dates.min().date(), key='grid_start')
+                    with filter_col3:
+                        grid_end = st.date_input(get_text('end_date'), grid_dates.max().date(), key='grid_end')
+                value_col1, value_col2, value_col3 = st.columns(3)
+                with value_col1:
+                    grid_column = st.selectbox(get_text('grid_filter_column'), [None] + numeric_columns,
+                                               format_func=lambda c: get_text('grid_no_filter') if c is None else c)
+                # 留空表示该侧不设限
+                with value_col2:
+                    grid_low_text = st.text_input(get_text('grid_filter_min'), "", disabled=grid_column is None)
+                with value_col3:
+                    grid_high_text = st.text_input(get_text('grid_filter_max'), "", disabled=grid_column is None)
+                try:
+                    grid_low = float(grid_low_text) if grid_low_text.strip() else None
+                    grid_high = float(grid_high_text) if grid_high_text.strip() else None
+                except ValueError:
+                    st.warning(get_text('grid_filter_invalid'))
+                    grid_low = grid_high = None
+
+            sort_col, order_col, size_col, page_col = st.columns([2, 1, 1, 1])
+            with sort_col:
+                grid_sort_by = st.selectbox(get_text('grid_sort_by'), [None] + grid.sort_keys(data_df),
+                                            format_func=lambda c: get_text('grid_original_order') if c is None else c)
+            with order_col:
+                grid_ascending = st.radio(get_text('grid_sort_order'), [True, False], horizontal=True,
+                                          format_func=lambda asc: get_text('grid_ascending' if asc else 'grid_descending'))
+            with size_col:
+                grid_page_size = st.selectbox(get_text('grid_page_size'), grid.PAGE_SIZES, index=1)
+
+            # 行位置只随筛选/排序变化，翻页时复用
+            grid_query = (id(data_df), tuple(grid_instruments), grid_start, grid_end, grid_column,
+                          grid_low, grid_high, grid_sort_by, grid_ascending)
+            grid_state = st.session_state.get('data_view_grid')
+            if grid_state is None or grid_state[0] != grid_query:
+                with telemetry.stage('data_view', 'grid_query') as grid_record:
+                    grid_positions = telemetry.measure(grid_record, grid.row_positions(
+                        data_df, instruments=grid_instruments, start=grid_start, end=grid_end,
+                        column=grid_column, low=grid_low, high=grid_high, sort_by=grid_sort_by, ascending=grid_ascending))
+                st.session_state.data_view_grid = (grid_query, grid_positions)
+            else:
+                grid_positions = grid_state[1]
+            grid_pages = grid.page_count(len(grid_positions), grid_page_size)
+            with page_col:
+                # 页数变化（筛选条件改变）时页码控件重置为第 1 页
+                grid_page = st.number_input(get_text('grid_page'), min_value=1, max_value=grid_pages, value=1, step=1,
+                                            key=f'grid_page_{grid_pages}')
+            with telemetry.stage('data_view', 'render_grid') as render_record:
+                st.dataframe(telemetry.measure(render_record, grid.page_rows(data_df, grid_positions, int(grid_page), grid_page_size)),
+                             use_container_width=True)
+            st.caption(get_text('grid_page_info').format(page=int(grid_page), pages=grid_pages,
+                                                        rows=len(grid_positions), total=len(data_df)))
+
+            price_col_name = None
+            if 'close' in data_df.columns: price_col_name = 'close'
+            elif '$close' in data_df.columns: price_col_name = '$close'
+
+            if price_col_name:
+                st.subheader(get_text('price_trend'))
+                chart_data_df = data_df.reset_index()
+                if 'datetime' not in chart_data_df.columns and 'date' in chart_data_df.columns:
+                     chart_data_df = chart_data_df.rename(columns={'date': 'datetime'})
+
+                if 'datetime' in chart_data_df.columns:
+                    chart_min_dt = pd.Timestamp(chart_data_df['datetime'].min()).to_pydatetime()
+                    chart_max_dt = pd.Timestamp(chart_data_df['datetime'].max()).to_pydatetime()
+                    zoom_col, method_col, points_col = st.columns([3, 1, 1])
+                    with method_col:
+                        downsample_method = st.selectbox(get_text('downsample_method'), [charts.LTTB, charts.MINMAX],
+                                                         format_func=lambda k: get_text(f'downsample_{k}'))
+                    with points_col:
+                        max_chart_points = st.number_input(get_text('max_chart_points'), min_value=200, max_value=20000,
+                                                           value=charts.DEFAULT_MAX_POINTS, step=200)
+                    with zoom_col:
+                        if chart_max_dt > chart_min_dt:
+                            zoom_range = st.slider(get_text('chart_zoom_range'), min_value=chart_min_dt, max_value=chart_max_dt,
+                                                   value=(chart_min_dt, chart_max_dt))
+                        else:
+                            zoom_range = (chart_min_dt, chart_max_dt)
 
-                    st.subheader(get_text('data_statistics'))
-                    st.dataframe(data_df.describe(), use_container_width=True)
-                    
-                    csv_export = data_df.to_csv().encode('utf-8')
+                    # 按缩放区间截取后在服务端降采样，每条曲线最多 max_chart_points 个点
+                    zoomed_df = chart_data_df[(chart_data_df['datetime'] >= zoom_range[0]) & (chart_data_df['datetime'] <= zoom_range[1])]
+                    with telemetry.stage('data_view', 'downsample', input_rows=len(zoomed_df)) as downsample_record:
+                        plot_df = telemetry.measure(downsample_record, charts.downsample_frame(
+                            zoomed_df, 'datetime', price_col_name,
+                            group_col='instrument' if 'instrument' in zoomed_df.columns else None,
+                            max_points=int(max_chart_points), method=downsample_method))
+                    with telemetry.stage('data_view', 'render_chart', rows=len(plot_df)):
+                        fig = px.line(plot_df, x='datetime', y=price_col_name,
+                                      color='instrument' if 'instrument' in plot_df.columns else None,
+                                      labels={'datetime': get_text('date_label'), price_col_name: get_text('price_label')})
+                        fig.update_layout(title=get_text('price_chart_title'))
+                        st.plotly_chart(fig, use_container_width=True)
+                    if len(plot_df) < len(zoomed_df):
+                        st.caption(get_text('downsampled_caption').format(shown=len(plot_df), total=len(zoomed_df)))
+                else:
+                    st.warning(get_text('datetime_column_missing_warning'))
+
+            st.subheader(get_text('data_statistics'))
+            # 统计量只在加载新数据后计算一次
+            if st.session_state.get('data_view_stats') is None:
+                with telemetry.stage('data_view', 'statistics', rows=len(data_df)):
+                    st.session_state.data_view_stats = data_df.describe()
+            st.dataframe(st.session_state.data_view_stats, use_container_width=True)
+        
+            # 导出：分块写入临时文件，避免整表 CSV 字符串及其字节副本同时驻留内存
+            # 下载按钮只在点击“准备”后的这一次运行中显示，其他重新运行不会再把文件读入内存
+            export_col, prepare_col = st.columns([1, 1])
+            prepared = None
+            with export_col:
+                export_format = st.selectbox(get_text('export_format'), export.available_formats(),
+                                             format_func=lambda k: get_text(f'export_format_{k}'))
+            with prepare_col:
+                st.write("")
+                if st.button(get_text('prepare_export')):
+                    with st.spinner(get_text('preparing_export')):
+                        prepared = (export.export_frame(data_df, export_format), export_format)
+            if prepared is not None:
+                export_path, prepared_format = prepared
+                st.caption(get_text('export_ready').format(size=os.path.getsize(export_path) / 1024**2))
+                with open(export_path, 'rb') as export_file:
                     st.download_button(
                         label=get_text('download_data'),
-                        data=csv_export,
-                        file_name=f'qlib_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
-                        mime='text/csv'
+                        data=export_file,
+                        file_name=f'qlib_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{prepared_format}',
+                        mime=export.MIME_TYPES[prepared_format]
                     )
-                elif use_qlib: 
-                    pass 
-                else: 
-                    st.warning(get_text('no_data_found'))
-            
-            except Exception as e_main:
-                st.error(f"{get_text('data_load_failed')}: {str(e_main)}\n\n{get_text('check_items')}")
+
+# 因子分析页面
+elif page == get_text('factor_analysis'):
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from gui import factor
+
+    st.title(get_text('factor_analysis'))
+
+    fa_bounds = data_range.calendar_bounds() if check_data_directory() else None
+    fa_default_end = fa_bounds[1] if fa_bounds else datetime.now().date()
+    fa_default_start = max(fa_bounds[0], fa_default_end - timedelta(days=3 * 365)) if fa_bounds else fa_default_end - timedelta(days=3 * 365)
+
+    factor_expression_input = st.text_input(get_text('factor_expression'), "$close/Ref($close, 20) - 1",
+                                            help=get_text('expression_fields_help'))
+    col1_fa, col2_fa, col3_fa = st.columns(3)
+    with col1_fa:
+        factor_universe_input = st.text_input(get_text('factor_universe'), "csi300", help=get_text('factor_universe_help'))
+        factor_horizon_input = st.number_input(get_text('label_horizon'), min_value=1, max_value=60, value=factor.DEFAULT_HORIZON, step=1)
+    with col2_fa:
+        factor_start_date_input = st.date_input(get_text('factor_start_date'), fa_default_start)
+        factor_quantiles_input = st.slider(get_text('quantile_count'), 2, 10, factor.DEFAULT_QUANTILES)
+    with col3_fa:
+        factor_end_date_input = st.date_input(get_text('factor_end_date'), fa_default_end)
+
+    if st.button(get_text('run_factor_analysis'), type="primary"):
+        try:
+            if not factor_universe_input.strip():
+                raise ValueError(get_text('at_least_one_code'))
+            if factor_start_date_input >= factor_end_date_input:
+                raise ValueError(get_text('start_before_end'))
+            if not ensure_qlib():
+                raise RuntimeError(get_text('qlib_init_error_runtime'))
+            from gui import expressions
+            try:
+                expressions.compile_expression(factor_expression_input)
+            except ValueError as e_expr:
+                raise ValueError(f"{get_text('invalid_expression_error')}: {e_expr}")
+            fa_range = data_range.clamp_range(factor_start_date_input, factor_end_date_input, fa_bounds)
+            if fa_range is None:
+                raise ValueError(get_text('data_range_error').format(
+                    data_start=fa_bounds[0].isoformat(), data_end=fa_bounds[1].isoformat(),
+                    query_start=factor_start_date_input.isoformat(), query_end=factor_end_date_input.isoformat()))
+
+            fa_config = {
+                'expression': factor_expression_input.strip(),
+                'universe': factor.parse_universe(factor_universe_input),
+                'start_date': fa_range[0].isoformat(),
+                'end_date': fa_range[1].isoformat(),
+                'horizon': int(factor_horizon_input),
+                'quantiles': int(factor_quantiles_input),
+                # 数据更新后缓存自动失效
+                'data_end': fa_bounds[1].isoformat() if fa_bounds else None,
+            }
+            # 相同的 (表达式, 股票池, 区间) 直接读取缓存，否则提交到后台任务队列
+            if factor.load_cached(fa_config) is not None:
+                st.session_state.factor_job = (None, fa_config)
+            else:
+                fa_job_id = jobs.get_queue().submit('factor', factor.run_factor_analysis, fa_config,
+                                                    label=f"{fa_config['expression'][:40]} / {factor_universe_input.strip()[:20]}")
+                st.session_state.factor_job = (fa_job_id, fa_config)
+        except Exception as e_fa:
+            st.error(f"{get_text('factor_analysis_failed')}: {e_fa}")
+
+    factor_job = st.session_state.get('factor_job')
+    if factor_job:
+        fa_job_id, fa_config = factor_job
+        fa_result = None
+        if fa_job_id is None:
+            fa_result = factor.load_cached(fa_config)
+            if fa_result is not None:
+                st.info(get_text('factor_cache_hit'))
+        else:
+            fa_job = follow_job(fa_job_id, 'cancel_factor_job', 'factor_analysis_failed')
+            if fa_job is not None and fa_job['status'] == jobs.DONE:
+                fa_result = jobs.get_queue().result(fa_job_id)
+
+        if fa_result is not None:
+            fa_summary = fa_result['summary']
+            st.caption(f"{fa_result['expression']} · {fa_result['instrument_count']} {get_text('instruments_label')} · "
+                       f"{fa_config['start_date']} ~ {fa_config['end_date']}")
+            fa_col1, fa_col2, fa_col3, fa_col4 = st.columns(4)
+            fa_col1.metric(get_text('ic_mean_label'), f"{fa_summary['ic_mean']:.4f}")
+            fa_col2.metric(get_text('icir_label'), f"{fa_summary['icir']:.3f}")
+            fa_col3.metric(get_text('rank_ic_mean_label'), f"{fa_summary['rank_ic_mean']:.4f}")
+            fa_col4.metric(get_text('rank_icir_label'), f"{fa_summary['rank_icir']:.3f}")
+            fa_col5, fa_col6, fa_col7, _ = st.columns(4)
+            fa_col5.metric(get_text('ic_positive_ratio_label'), f"{fa_summary['ic_positive_ratio']:.2%}")
+            fa_col6.metric(get_text('top_turnover_label'), f"{fa_summary['top_turnover']:.2%}")
+            fa_col7.metric(get_text('long_short_return_label'), f"{fa_summary['long_short_return']:.2%}")
+
+            st.subheader(get_text('ic_chart_title'))
+            fig_ic = go.Figure()
+            fig_ic.add_trace(go.Bar(x=fa_result['ic'].index, y=fa_result['ic'].values, name='IC', opacity=0.5))
+            fig_ic.add_trace(go.Scatter(x=fa_result['rank_ic'].index, y=fa_result['rank_ic'].rolling(20).mean().values,
+                                        mode='lines', name=get_text('rank_ic_ma_legend')))
+            fig_ic.update_layout(xaxis_title=get_text('date_label'), yaxis_title='IC', hovermode='x unified')
+            st.plotly_chart(fig_ic, use_container_width=True)
+
+            q_col1, q_col2 = st.columns(2)
+            with q_col1:
+                quantile_cum = (1 + fa_result['quantile_daily_returns'].fillna(0)).cumprod()
+                fig_q = px.line(quantile_cum, labels={'value': get_text('cumulative_return_axis_label'),
+                                                      'index': get_text('date_label'), 'variable': get_text('quantile_label')})
+                fig_q.update_layout(title=get_text('quantile_cum_chart_title'))
+                st.plotly_chart(fig_q, use_container_width=True)
+            with q_col2:
+                fig_qm = px.bar(x=fa_result['quantile_horizon_returns'].index, y=fa_result['quantile_horizon_returns'].values * 100,
+                                labels={'x': get_text('quantile_label'), 'y': get_text('quantile_mean_axis_label').format(horizon=fa_config['horizon'])})
+                fig_qm.update_layout(title=get_text('quantile_mean_chart_title'))
+                st.plotly_chart(fig_qm, use_container_width=True)
+
+            fig_to = px.line(fa_result['turnover'].rolling(20).mean(),
+                             labels={'value': get_text('turnover_label'), 'index': get_text('date_label'), 'variable': get_text('quantile_label')})
+            fig_to.update_layout(title=get_text('turnover_chart_title'))
+            st.plotly_chart(fig_to, use_container_width=True)
 
 # 模型训练页面
 elif page == get_text('model_training'):
+    import plotly.graph_objects as go
+    from gui import registry, training
+
     st.title(get_text('model_training'))
     
     col1_mt, col2_mt = st.columns(2) 
     with col1_mt:
         model_type_input = st.selectbox(get_text('select_model'), ["LightGBM", "XGBoost", "Linear", "RandomForest"]) 
-        train_symbols_input = st.text_input(get_text('training_stocks'), "SH600000,SH600036,SH600519") 
+        train_symbol_list = symbol_picker(get_text('training_stocks'), 'training_symbols', ["SH600000", "SH600036", "SH600519"])
     with col2_mt:
         train_start_date_input = st.date_input(get_text('train_start_date'), datetime.now() - timedelta(days=730)) 
         train_end_date_input = st.date_input(get_text('train_end_date'), datetime.now() - timedelta(days=30)) 
@@ -721,223 +1479,338 @@ elif page == get_text('model_training'):
             random_state_input = st.number_input(get_text('random_seed'), value=42, step=1) 
     
     if st.button(get_text('start_training'), type="primary"):
-        try:
-            with st.spinner(get_text('training_model')):
-                progress_bar_mt = st.progress(0) 
-                status_text_mt = st.empty() 
-                
-                training_steps = [ 
-                    get_text('init_model_params'), get_text('loading_train_data'),
-                    get_text('feature_engineering'), get_text('model_training_step'),
-                    get_text('model_validation_step'), get_text('saving_model_results')
-                ]
-                
-                total_progress_points = 100
-                points_per_step = total_progress_points / len(training_steps) if training_steps else total_progress_points
-
-                for i, step_text in enumerate(training_steps):
-                    status_text_mt.text(step_text)
-                    
-                    num_sub_steps = max(1, int(points_per_step / 2)) 
-                    for j in range(num_sub_steps):
-                        current_progress = int(((i * points_per_step) + (j / num_sub_steps * points_per_step)) / total_progress_points * 100)
-                        if current_progress <= 100: progress_bar_mt.progress(min(100, current_progress))
-                        time.sleep( (0.05 / num_sub_steps) if num_sub_steps > 0 else 0.05 )
-                progress_bar_mt.progress(100)
-                
-                # Calculate deterministic training metrics based on model parameters
-                base_accuracy = 0.65
-                model_bonus = {"LightGBM": 0.08, "XGBoost": 0.06, "RandomForest": 0.04, "Linear": 0.02}
-                
-                # Deterministic accuracy calculation based on parameters
-                param_bonus = (learning_rate_input - 0.1) * 0.1 + (max_depth_input - 6) * 0.005
-                train_acc = base_accuracy + model_bonus.get(model_type_input, 0) + param_bonus
-                val_acc = train_acc - 0.05  # Fixed validation gap
-                
-                # Deterministic sample count based on date range and symbols
-                days_diff = (train_end_date_input - train_start_date_input).days
-                symbol_count = len(train_symbols_input.split(','))
-                sample_count = days_diff * symbol_count * 20  # Approximate samples per day per symbol
-                
-                # Deterministic training time based on complexity
-                training_time = max(30, min(300, n_estimators_input // 2 + max_depth_input * 5))
-                
-                training_results_dict = { 
-                    get_text('model_type_label'): model_type_input,
-                    get_text('train_stock_count_label'): symbol_count,
-                    get_text('train_sample_count_label'): sample_count,
-                    get_text('train_accuracy_label'): train_acc,
-                    get_text('validation_accuracy_label'): val_acc,
-                    get_text('training_time_label'): f"{training_time}{get_text('seconds_label')}",
-                    get_text('learning_rate_label'): learning_rate_input,
-                    get_text('max_depth_label'): max_depth_input,
-                    get_text('n_estimators_label'): n_estimators_input
+        if not train_symbol_list:
+            st.error(get_text('at_least_one_code'))
+        elif train_start_date_input >= train_end_date_input:
+            st.error(get_text('start_before_end'))
+        elif not ensure_qlib():
+            st.error(get_text('qlib_init_error_runtime'))
+        else:
+            train_data_bounds = data_range.calendar_bounds()
+            train_config = {
+                'model_type': model_type_input,
+                'instruments': train_symbol_list,
+                'start_date': train_start_date_input.isoformat(),
+                'end_date': train_end_date_input.isoformat(),
+                'valid_ratio': float(test_size_input),
+                'learning_rate': float(learning_rate_input),
+                'max_depth': int(max_depth_input),
+                'n_estimators': int(n_estimators_input),
+                'min_samples_split': int(min_samples_split_input),
+                'seed': int(random_state_input),
+                # 数据更新后需要重新训练
+                'data_end': train_data_bounds[1].isoformat() if train_data_bounds else None,
+            }
+            try:
+                _, train_key = training.resolve_key(train_config)
+                # 注册表中已有相同配置的模型时直接加载，否则提交到后台任务队列
+                registry_hit = registry.lookup(train_key) is not None
+                telemetry.cache_event('model_registry', registry_hit)
+                if registry_hit:
+                    st.session_state.training_job = (None, train_config, train_key)
+                else:
+                    train_job_id = jobs.get_queue().submit('training', training.train_model, train_config,
+                                                           label=f"{train_config['model_type']} ({len(train_symbol_list)})")
+                    st.session_state.training_job = (train_job_id, train_config, train_key)
+            except Exception as e_train:
+                st.error(f"{get_text('training_failed')}: {e_train}")
+
+    training_job = st.session_state.get('training_job')
+    if training_job:
+        train_job_id, train_config, train_key = training_job
+        train_result = None
+        if train_job_id is None:
+            train_entry = registry.lookup(train_key)
+            if train_entry is not None:
+                train_result = train_entry['result']
+                st.info(get_text('model_registry_hit'))
+        else:
+            train_job = follow_job(train_job_id, 'cancel_training_job', 'training_failed')
+            if train_job is not None and train_job['status'] == jobs.DONE:
+                train_result = jobs.get_queue().result(train_job_id)
+
+        if train_result is not None:
+            try:
+                training_results_dict = {
+                    get_text('model_type_label'): train_config['model_type'],
+                    get_text('train_stock_count_label'): train_result['instrument_count'],
+                    get_text('train_sample_count_label'): train_result['train_samples'],
+                    get_text('train_accuracy_label'): train_result['train_accuracy'],
+                    get_text('validation_accuracy_label'): train_result['valid_accuracy'],
+                    get_text('train_mse_label'): train_result['train_mse'],
+                    get_text('validation_mse_label'): train_result['valid_mse'],
+                    get_text('training_time_label'): f"{train_result['training_time']:.1f}{get_text('seconds_label')}",
+                    get_text('learning_rate_label'): train_config['learning_rate'],
+                    get_text('max_depth_label'): train_config['max_depth'],
+                    get_text('n_estimators_label'): train_config['n_estimators'],
+                    get_text('model_key_label'): train_key[:12],
                 }
-                
+
                 st.success(get_text('model_training_complete'))
-                
+
                 st.subheader(get_text('training_results_header'))
                 metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
                 metric_col1.metric(get_text('train_accuracy_label'), f"{training_results_dict[get_text('train_accuracy_label')]:.2%}")
                 metric_col2.metric(get_text('validation_accuracy_label'), f"{training_results_dict[get_text('validation_accuracy_label')]:.2%}")
                 metric_col3.metric(get_text('training_time_label'), training_results_dict[get_text('training_time_label')])
                 metric_col4.metric(get_text('train_sample_count_label'), f"{training_results_dict[get_text('train_sample_count_label')]:,}")
-                
+
                 st.subheader(get_text('training_process_header'))
-                epochs_list = list(range(1, 21)) 
-                # Deterministic loss curves based on learning rate and model complexity
-                base_train_loss = 0.8
-                base_val_loss = 0.85
-                decay_rate_train = 0.03 * learning_rate_input / 0.1  # Scale with learning rate
-                decay_rate_val = 0.025 * learning_rate_input / 0.1
-                
-                train_losses = [max(0.1, base_train_loss - (ep * decay_rate_train)) for ep in epochs_list]
-                val_losses = [max(0.15, base_val_loss - (ep * decay_rate_val)) for ep in epochs_list]
-                
-                fig_train_loss = go.Figure() 
-                fig_train_loss.add_trace(go.Scatter(x=epochs_list, y=train_losses, mode='lines', name=get_text('train_loss_legend')))
-                fig_train_loss.add_trace(go.Scatter(x=epochs_list, y=val_losses, mode='lines', name=get_text('validation_loss_legend')))
-                fig_train_loss.update_layout(title=get_text('training_process_chart_title'),
-                                  xaxis_title=get_text('epochs_axis_label'),
-                                  yaxis_title=get_text('loss_axis_label'))
-                st.plotly_chart(fig_train_loss, use_container_width=True)
-                
+                train_losses = train_result['loss_curve']['train']
+                val_losses = train_result['loss_curve']['valid']
+                if train_losses:
+                    fig_train_loss = go.Figure()
+                    fig_train_loss.add_trace(go.Scatter(x=list(range(1, len(train_losses) + 1)), y=train_losses, mode='lines', name=get_text('train_loss_legend')))
+                    if val_losses:
+                        fig_train_loss.add_trace(go.Scatter(x=list(range(1, len(val_losses) + 1)), y=val_losses, mode='lines', name=get_text('validation_loss_legend')))
+                    fig_train_loss.update_layout(title=get_text('training_process_chart_title'),
+                                      xaxis_title=get_text('epochs_axis_label'),
+                                      yaxis_title=get_text('loss_axis_label'))
+                    st.plotly_chart(fig_train_loss, use_container_width=True)
+                else:
+                    st.info(get_text('no_loss_curve_info'))
+
                 st.subheader(get_text('detailed_parameters_header'))
                 st.json(training_results_dict)
-                
+
                 st.session_state.trained_model = training_results_dict
-                
-        except Exception as e_train:
-            st.error(f"{get_text('training_failed')}: {e_train}")
+
+            except Exception as e_train:
+                st.error(f"{get_text('training_failed')}: {e_train}")
 
 # 回测结果页面
 elif page == get_text('backtest_results'):
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from gui import analytics, backtest, registry, sweep
+
     st.title(get_text('backtest_results'))
+    backtest_mode = st.radio(get_text('backtest_mode'), ['single', 'sweep'],
+                             format_func=lambda k: get_text(f'backtest_mode_{k}'), horizontal=True)
     
     col1_bt, col2_bt = st.columns(2)
     with col1_bt:
-        backtest_symbols_input = st.text_input(get_text('backtest_stocks'), "SH600000,SH600036") 
+        backtest_symbol_list = symbol_picker(get_text('backtest_stocks'), 'backtest_symbols', ["SH600000", "SH600036"])
         backtest_start_date_input = st.date_input(get_text('backtest_start_date'), datetime.now() - timedelta(days=365)) 
-        strategy_type_input = st.selectbox(get_text('strategy_type'), 
-                                         [get_text('long_short_strategy'), get_text('long_only_strategy'), get_text('market_neutral')])
+        strategy_type_input = st.selectbox(get_text('strategy_type'), backtest.STRATEGY_TYPES,
+                                         format_func=lambda k: get_text(STRATEGY_TEXT_KEYS[k]))
     with col2_bt:
         initial_capital_input = st.number_input(get_text('initial_capital'), value=1000000, step=100000) 
         backtest_end_date_input = st.date_input(get_text('backtest_end_date'), datetime.now()) 
-        rebalance_freq_input = st.selectbox(get_text('rebalance_freq'), 
-                                          [get_text('daily'), get_text('weekly'), get_text('monthly')])
+        rebalance_freq_input = st.selectbox(get_text('rebalance_freq'), list(backtest.REBALANCE_STEPS),
+                                          format_func=get_text)
+
+    # 交易信号：默认动量因子，或模型注册表中已训练模型的预测值
+    signal_labels = {backtest.DEFAULT_SIGNAL: f"{get_text('momentum_signal_label')} ({backtest.DEFAULT_SIGNAL})"}
+    for model_entry in registry.list_entries():
+        entry_segments = model_entry['segments']
+        signal_labels[registry.MODEL_SIGNAL_PREFIX + model_entry['key']] = (
+            f"{model_entry['model_type']} · {len(model_entry['config']['instruments'])} {get_text('instruments_label')} · "
+            f"{entry_segments['train'][0]} ~ {entry_segments['valid'][1]} · {model_entry['key'][:12]}")
+    backtest_signal_input = st.selectbox(get_text('backtest_signal'), list(signal_labels), format_func=signal_labels.get,
+                                         help=get_text('backtest_signal_help'))
     
-    with st.expander(get_text('risk_params')):
-        col1_risk, col2_risk, col3_risk = st.columns(3)
-        with col1_risk:
-            max_position_input = st.slider(get_text('max_position'), 0.05, 0.3, 0.1, step=0.01) 
-            stop_loss_input = st.slider(get_text('stop_loss'), 0.05, 0.2, 0.1, step=0.01) 
-        with col2_risk:
-            take_profit_input = st.slider(get_text('take_profit'), 0.1, 0.5, 0.2, step=0.05) 
-            max_drawdown_limit_input = st.slider(get_text('max_drawdown_limit'), 0.1, 0.3, 0.15, step=0.01) 
-        with col3_risk:
-            commission_rate_input = st.slider(get_text('commission_rate'), 0.0001, 0.003, 0.001, format="%.4f", step=0.0001) 
-            slippage_input = st.slider(get_text('slippage'), 0.0001, 0.002, 0.0005, format="%.4f", step=0.0001) 
+    if backtest_mode == 'sweep':
+        # 每个参数取一个区间和步数，网格为各参数取值的笛卡尔积
+        sweep_values = {}
+        with st.expander(get_text('sweep_params_header'), expanded=True):
+            for sweep_param, (sw_min, sw_max, sw_default, sw_step, sw_format, sw_steps) in SWEEP_SLIDERS.items():
+                range_col, steps_col = st.columns([3, 1])
+                with range_col:
+                    sw_low, sw_high = st.slider(get_text(sweep_param), sw_min, sw_max, sw_default, step=sw_step,
+                                                format=sw_format, key=f'sweep_range_{sweep_param}')
+                with steps_col:
+                    sw_count = st.number_input(get_text('sweep_steps'), min_value=1, max_value=20, value=sw_steps,
+                                               step=1, key=f'sweep_steps_{sweep_param}')
+                sweep_values[sweep_param] = sweep.param_values(sw_low, sw_high, sw_count)
+            max_drawdown_limit_input = st.slider(get_text('max_drawdown_limit'), 0.1, 0.3, 0.15, step=0.01)
+        sweep_count = int(np.prod([len(v) for v in sweep_values.values()]))
+        st.caption(get_text('sweep_combinations_info').format(count=sweep_count, limit=sweep.MAX_RUNS))
+        # 单次回测配置取各区间的下限，扫描时由网格覆盖
+        max_position_input, stop_loss_input, take_profit_input, commission_rate_input, slippage_input = (
+            sweep_values[name][0] for name in sweep.SWEEP_PARAMS)
+    else:
+        with st.expander(get_text('risk_params')):
+            col1_risk, col2_risk, col3_risk = st.columns(3)
+            with col1_risk:
+                max_position_input = st.slider(get_text('max_position'), 0.05, 0.3, 0.1, step=0.01) 
+                stop_loss_input = st.slider(get_text('stop_loss'), 0.05, 0.2, 0.1, step=0.01) 
+            with col2_risk:
+                take_profit_input = st.slider(get_text('take_profit'), 0.1, 0.5, 0.2, step=0.05) 
+                max_drawdown_limit_input = st.slider(get_text('max_drawdown_limit'), 0.1, 0.3, 0.15, step=0.01) 
+            with col3_risk:
+                commission_rate_input = st.slider(get_text('commission_rate'), 0.0001, 0.003, 0.001, format="%.4f", step=0.0001) 
+                slippage_input = st.slider(get_text('slippage'), 0.0001, 0.002, 0.0005, format="%.4f", step=0.0001) 
     
-    if st.button(get_text('run_backtest'), type="primary"):
+    if st.button(get_text('run_sweep' if backtest_mode == 'sweep' else 'run_backtest'), type="primary"):
         try:
-            with st.spinner(get_text('running_backtest')):
-                progress_bar_bt = st.progress(0)
-                status_text_bt = st.empty()
-                
-                backtest_steps = [ 
-                    get_text('loading_historical_data'), get_text('calculating_technical_indicators'),
-                    get_text('generating_trading_signals'), get_text('executing_backtest_trades'),
-                    get_text('calculating_performance_metrics'), get_text('generating_backtest_report')
-                ]
-                
-                total_progress_points_bt = 100
-                points_per_step_bt = total_progress_points_bt / len(backtest_steps) if backtest_steps else total_progress_points_bt
-
-                for i, step_text in enumerate(backtest_steps):
-                    status_text_bt.text(step_text)
-                    num_sub_steps_bt = max(1, int(points_per_step_bt / 2))
-                    for j in range(num_sub_steps_bt):
-                        current_progress_bt = int(((i * points_per_step_bt) + (j / num_sub_steps_bt * points_per_step_bt)) / total_progress_points_bt * 100)
-                        if current_progress_bt <= 100: progress_bar_bt.progress(min(100, current_progress_bt))
-                        time.sleep( (0.03 / num_sub_steps_bt) if num_sub_steps_bt > 0 else 0.03)
-                progress_bar_bt.progress(100)
-                
-                backtest_dates_series = pd.date_range(start=backtest_start_date_input, end=backtest_end_date_input, freq='B') 
-                
-                if not backtest_dates_series.empty:
-                    # Deterministic backtest simulation based on strategy parameters
-                    strategy_multiplier = {'long_short_strategy': 1.2, 'long_only_strategy': 1.0, 'market_neutral': 0.8}
-                    base_ret = 0.0008 * strategy_multiplier.get(strategy_type_input, 1.0)
-                    
-                    # Generate deterministic returns based on date index
-                    backtest_returns_list = []
-                    for i, date in enumerate(backtest_dates_series):
-                        # Deterministic pattern based on day of year and position parameters
-                        day_factor = np.sin(i * 2 * np.pi / 252) * 0.0002  # Annual cycle
-                        trend_factor = i * 0.000001  # Slight upward trend
-                        position_factor = (max_position_input - 0.1) * 0.001  # Position size impact
-                        
-                        daily_return = base_ret + day_factor + trend_factor + position_factor
-                        backtest_returns_list.append(daily_return)
-                    
-                    backtest_returns_series = np.array(backtest_returns_list)
-                    backtest_cumulative_returns_series = (1 + pd.Series(backtest_returns_series, index=backtest_dates_series)).cumprod() 
-                    backtest_portfolio_value_series = backtest_cumulative_returns_series * initial_capital_input 
-                    
-                    bt_total_ret = backtest_cumulative_returns_series.iloc[-1] - 1 
-                    bt_annual_ret = (1 + bt_total_ret) ** (252 / len(backtest_dates_series)) - 1
-                    bt_vol_annual = backtest_returns_series.std() * np.sqrt(252) 
-                    bt_sharpe = bt_annual_ret / bt_vol_annual if bt_vol_annual > 0 else 0 
-                    bt_max_dd = (backtest_cumulative_returns_series / backtest_cumulative_returns_series.expanding().max() - 1).min() 
-                    
-                    positive_days_count = (backtest_returns_series > 0).sum() 
-                    bt_win_r = positive_days_count / len(backtest_returns_series) 
-                    bt_calmar = bt_annual_ret / abs(bt_max_dd) if bt_max_dd != 0 else 0 
-                else: 
-                    bt_total_ret, bt_annual_ret, bt_sharpe, bt_max_dd, bt_win_r, bt_calmar, bt_vol_annual = 0,0,0,0,0,0,0
-                    backtest_returns_series = np.array([])
-                    backtest_cumulative_returns_series = pd.Series(dtype=float)
+            if not backtest_symbol_list:
+                raise ValueError(get_text('at_least_one_code'))
+            if backtest_mode == 'sweep' and sweep_count > sweep.MAX_RUNS:
+                raise ValueError(get_text('sweep_too_many_error').format(count=sweep_count, limit=sweep.MAX_RUNS))
+            if backtest_start_date_input >= backtest_end_date_input:
+                raise ValueError(get_text('start_before_end'))
+            if not ensure_qlib():
+                raise RuntimeError(get_text('qlib_init_error_runtime'))
+            data_bounds = data_range.calendar_bounds()
+            bt_range = data_range.clamp_range(backtest_start_date_input, backtest_end_date_input, data_bounds)
+            if bt_range is None:
+                raise ValueError(get_text('data_range_error').format(
+                    data_start=data_bounds[0].isoformat(), data_end=data_bounds[1].isoformat(),
+                    query_start=backtest_start_date_input.isoformat(), query_end=backtest_end_date_input.isoformat()))
+            if bt_range != (backtest_start_date_input, backtest_end_date_input):
+                st.info(get_text('query_clamped_info').format(start=bt_range[0].isoformat(), end=bt_range[1].isoformat()))
+
+            bt_config = {
+                'instruments': backtest_symbol_list,
+                'start_date': bt_range[0].isoformat(),
+                'end_date': bt_range[1].isoformat(),
+                'strategy': strategy_type_input,
+                'rebalance': rebalance_freq_input,
+                'initial_capital': float(initial_capital_input),
+                'max_position': float(max_position_input),
+                'stop_loss': float(stop_loss_input),
+                'take_profit': float(take_profit_input),
+                'max_drawdown_limit': float(max_drawdown_limit_input),
+                'commission_rate': float(commission_rate_input),
+                'slippage': float(slippage_input),
+                'benchmark': backtest.BENCHMARK,
+                'signal': backtest_signal_input,
+                # 数据更新后缓存自动失效
+                'data_end': data_bounds[1].isoformat(),
+            }
+            if backtest_mode == 'sweep':
+                # 整个网格作为一个后台任务，任务内部用进程池并行回测
+                sweep_job_id = jobs.get_queue().submit('sweep', sweep.run_sweep, {'base': bt_config, 'values': sweep_values},
+                                                       label=f"{bt_config['strategy']} ({len(backtest_symbol_list)}) x {sweep_count}")
+                st.session_state.sweep_job = sweep_job_id
+            # 命中缓存时直接显示，否则提交到后台任务队列
+            elif backtest.load_cached(bt_config) is not None:
+                st.session_state.backtest_job = (None, bt_config)
+            else:
+                bt_job_id = jobs.get_queue().submit('backtest', backtest.run_backtest, bt_config,
+                                                    label=f"{bt_config['strategy']} ({len(backtest_symbol_list)})")
+                st.session_state.backtest_job = (bt_job_id, bt_config)
+        except Exception as e_bt_main: 
+            st.error(f"{get_text('backtest_run_failed_error')}: {e_bt_main}")
+
+    sweep_job_id = st.session_state.get('sweep_job')
+    if backtest_mode == 'sweep' and sweep_job_id:
+        sweep_job = follow_job(sweep_job_id, 'cancel_sweep_job', 'sweep_failed_error')
+        if sweep_job is not None and sweep_job['status'] == jobs.DONE:
+            sweep_result = jobs.get_queue().result(sweep_job_id)
+            sweep_table = sweep_result['table']
+            # 只有多个取值的参数才能作为曲面的坐标轴
+            sweep_params = [p for p in sweep_result['params'] if sweep_table[p].nunique() > 1]
+
+            st.subheader(get_text('sweep_results_header'))
+            sort_col, _ = st.columns(2)
+            with sort_col:
+                sweep_sort_metric = st.selectbox(get_text('sweep_sort_by'), sweep.METRICS,
+                                                 index=sweep.METRICS.index('sharpe_ratio'), format_func=get_text)
+            sorted_sweep_table = sweep_table.sort_values(sweep_sort_metric,
+                                                         ascending=sweep_sort_metric in sweep.LOWER_IS_BETTER)
+            st.dataframe(sorted_sweep_table.rename(columns=get_text).reset_index(drop=True), use_container_width=True)
 
+            # 按当前排序取前几组参数，对比其累计收益曲线（旧版本的扫描结果没有收益矩阵）
+            if 'returns' in sweep_result:
+                st.subheader(get_text('sweep_compare_header'))
+                top_points = sorted_sweep_table.index[:SWEEP_COMPARE_TOP]
+                top_cumulative = analytics.cumulative(sweep_result['returns'][top_points])
+                fig_compare = go.Figure()
+                for point in top_points:
+                    point_label = ', '.join(f"{get_text(p)}={sweep_table.at[point, p]:g}" for p in sweep_result['params'])
+                    fig_compare.add_trace(go.Scatter(x=top_cumulative.index, y=top_cumulative[point].values,
+                                                     mode='lines', name=point_label))
+                fig_compare.update_layout(
+                    title=get_text('sweep_compare_title').format(count=len(top_points), metric=get_text(sweep_sort_metric)),
+                    xaxis_title=get_text('date_label'), yaxis_title=get_text('cumulative_return_axis_label'),
+                    hovermode='x unified')
+                st.plotly_chart(fig_compare, use_container_width=True)
+
+            st.subheader(get_text('sweep_surface_header'))
+            if len(sweep_params) >= 2:
+                surf_col1, surf_col2, surf_col3 = st.columns(3)
+                with surf_col1:
+                    surface_x = st.selectbox(get_text('sweep_surface_x'), sweep_params, index=0, format_func=get_text)
+                with surf_col2:
+                    surface_y = st.selectbox(get_text('sweep_surface_y'), [p for p in sweep_params if p != surface_x],
+                                             index=0, format_func=get_text)
+                with surf_col3:
+                    surface_metric = st.radio(get_text('sweep_surface_metric'), ['sharpe_ratio', 'calmar_ratio'],
+                                              format_func=get_text, horizontal=True)
+                surface_df = sweep.surface(sweep_table, surface_x, surface_y, surface_metric)
+                fig_surface = px.imshow(
+                    surface_df, text_auto='.2f', color_continuous_scale='RdYlGn', aspect='auto',
+                    labels=dict(x=get_text(surface_x), y=get_text(surface_y), color=get_text(surface_metric)))
+                fig_surface.update_xaxes(type='category')
+                fig_surface.update_yaxes(type='category')
+                st.plotly_chart(fig_surface, use_container_width=True)
+                st.caption(get_text('sweep_surface_note'))
+            else:
+                st.info(get_text('sweep_need_two_params'))
+
+    backtest_job = st.session_state.get('backtest_job')
+    if backtest_mode == 'single' and backtest_job:
+        bt_job_id, bt_config = backtest_job
+        bt_result = None
+        if bt_job_id is None:
+            bt_result = backtest.load_cached(bt_config)
+            if bt_result is not None:
+                st.info(get_text('backtest_cache_hit'))
+        else:
+            bt_job = follow_job(bt_job_id, 'cancel_backtest_job', 'backtest_run_failed_error')
+            if bt_job is not None and bt_job['status'] == jobs.DONE:
+                bt_result = jobs.get_queue().result(bt_job_id)
+
+        if bt_result is not None:
+            try:
+                # 单次回测即只有一列的收益矩阵
+                bt_returns = analytics.returns_matrix({'strategy': bt_result['returns']})
+                bt_stats = analytics.summary(bt_returns).iloc[0]
+                bt_cumulative = analytics.cumulative(bt_returns)['strategy']
+                bt_empty = bt_returns.empty
 
                 st.success(get_text('backtest_complete'))
-                
+
+                def metric_text(metric, fmt):
+                    return format(bt_stats[metric], fmt) if pd.notna(bt_stats[metric]) else "N/A"
+
                 st.subheader(get_text('key_metrics'))
                 km_col1, km_col2, km_col3, km_col4 = st.columns(4)
-                km_col1.metric(get_text('total_return'), f"{bt_total_ret:.2%}")
-                km_col2.metric(get_text('annual_return'), f"{bt_annual_ret:.2%}")
-                km_col3.metric(get_text('sharpe_ratio'), f"{bt_sharpe:.2f}")
-                km_col4.metric(get_text('max_drawdown'), f"{bt_max_dd:.2%}")
-                
+                km_col1.metric(get_text('total_return'), metric_text('total_return', '.2%'))
+                km_col2.metric(get_text('annual_return'), metric_text('annual_return', '.2%'))
+                km_col3.metric(get_text('sharpe_ratio'), metric_text('sharpe_ratio', '.2f'))
+                km_col4.metric(get_text('max_drawdown'), metric_text('max_drawdown', '.2%'))
+
                 km_col5, km_col6, km_col7, km_col8 = st.columns(4)
-                km_col5.metric(get_text('win_rate'), f"{bt_win_r:.2%}")
-                km_col6.metric(get_text('calmar_ratio'), f"{bt_calmar:.2f}")
-                km_col7.metric(get_text('annual_volatility'), f"{bt_vol_annual:.2%}")
-                km_col8.metric(get_text('trading_days'), f"{len(backtest_dates_series)}")
-                
+                km_col5.metric(get_text('win_rate'), metric_text('win_rate', '.2%'))
+                km_col6.metric(get_text('calmar_ratio'), metric_text('calmar_ratio', '.2f'))
+                km_col7.metric(get_text('annual_volatility'), metric_text('annual_volatility', '.2%'))
+                km_col8.metric(get_text('trading_days'), f"{len(bt_returns)}")
+
                 st.subheader(get_text('cumulative_return_chart_title'))
                 fig_cum_ret_chart = go.Figure() 
-                if not backtest_cumulative_returns_series.empty:
+                if not bt_empty:
                     fig_cum_ret_chart.add_trace(go.Scatter(
-                        x=backtest_cumulative_returns_series.index, y=backtest_cumulative_returns_series.values, mode='lines',
+                        x=bt_cumulative.index, y=bt_cumulative.values, mode='lines',
                         name=get_text('strategy_return'), line=dict(color='blue', width=2)))
-                
-                    # Deterministic benchmark returns (market index simulation)
-                    benchmark_rets = [0.0005 + 0.0001 * np.sin(i * 2 * np.pi / 252) for i in range(len(backtest_dates_series))]
-                    benchmark_cum_series = (1 + pd.Series(benchmark_rets, index=backtest_dates_series)).cumprod() 
+
+                    benchmark_cum_series = analytics.cumulative(bt_result['benchmark'].to_frame('benchmark'))['benchmark']
                     fig_cum_ret_chart.add_trace(go.Scatter(
                         x=benchmark_cum_series.index, y=benchmark_cum_series.values, mode='lines',
                         name=get_text('benchmark_return'), line=dict(color='red', width=2, dash='dash')))
-                
+
                 fig_cum_ret_chart.update_layout(
                     title=get_text('cumulative_return_comparison'),
                     xaxis_title=get_text('date_label'), yaxis_title=get_text('cumulative_return_axis_label'),
                     hovermode='x unified')
                 st.plotly_chart(fig_cum_ret_chart, use_container_width=True)
-                
+
                 st.subheader(get_text('drawdown_analysis_header'))
                 fig_dd_chart = go.Figure() 
-                if not backtest_cumulative_returns_series.empty:
-                    drawdown_series = (backtest_cumulative_returns_series / backtest_cumulative_returns_series.expanding().max() - 1) * 100 
+                if not bt_empty:
+                    drawdown_series = analytics.drawdowns(bt_returns)['strategy'] * 100
                     fig_dd_chart.add_trace(go.Scatter(
                         x=drawdown_series.index, y=drawdown_series.values, mode='lines', fill='tonexty',
                         name=get_text('drawdown_legend'), line=dict(color='red')))
@@ -945,13 +1818,26 @@ elif page == get_text('backtest_results'):
                     title=get_text('drawdown_curve'),
                     xaxis_title=get_text('date_label'), yaxis_title=get_text('drawdown_axis_label'))
                 st.plotly_chart(fig_dd_chart, use_container_width=True)
-                
+
+                st.subheader(get_text('rolling_sharpe_header'))
+                if len(bt_returns) >= analytics.DEFAULT_ROLLING_WINDOW:
+                    rolling_sharpe_series = analytics.rolling_sharpe(bt_returns)['strategy'].dropna()
+                    fig_rolling_chart = go.Figure(go.Scatter(
+                        x=rolling_sharpe_series.index, y=rolling_sharpe_series.values, mode='lines',
+                        name=get_text('sharpe_ratio'), line=dict(color='purple')))
+                    fig_rolling_chart.update_layout(
+                        title=get_text('rolling_sharpe_title').format(window=analytics.DEFAULT_ROLLING_WINDOW),
+                        xaxis_title=get_text('date_label'), yaxis_title=get_text('sharpe_ratio'))
+                    st.plotly_chart(fig_rolling_chart, use_container_width=True)
+                else:
+                    st.info(get_text('rolling_sharpe_not_enough_data').format(window=analytics.DEFAULT_ROLLING_WINDOW))
+
                 st.subheader(get_text('return_distribution_header'))
                 dist_col_1, dist_col_2 = st.columns(2) 
-                
+
                 with dist_col_1:
-                    if len(backtest_returns_series) > 0:
-                        fig_hist_chart = px.histogram(backtest_returns_series * 100, nbins=50, title=get_text('daily_return_dist_title')) 
+                    if not bt_empty:
+                        fig_hist_chart = px.histogram(bt_returns['strategy'].values * 100, nbins=50, title=get_text('daily_return_dist_title')) 
                         fig_hist_chart.update_layout(xaxis_title=get_text('daily_return_axis_label'),
                                                yaxis_title=get_text('frequency_axis_label'))
                         st.plotly_chart(fig_hist_chart, use_container_width=True)
@@ -960,26 +1846,14 @@ elif page == get_text('backtest_results'):
 
 
                 with dist_col_2:
-                    if not backtest_cumulative_returns_series.empty:
-                        monthly_ret_series = backtest_cumulative_returns_series.resample('M').last().pct_change().dropna() 
-                        if not monthly_ret_series.empty:
-                            monthly_data_df = pd.DataFrame({ 
-                                'year': monthly_ret_series.index.year,
-                                'month': monthly_ret_series.index.strftime('%B'), 
-                                'return': monthly_ret_series.values * 100
-                            })
-                            
-                            pivot_monthly_df = monthly_data_df.pivot(index='year', columns='month', values='return') 
-                            month_order_list = [datetime(2000, i, 1).strftime('%B') for i in range(1,13)] 
-                            pivot_monthly_df = pivot_monthly_df.reindex(columns=[m for m in month_order_list if m in pivot_monthly_df.columns])
-
-                            fig_heatmap_chart = px.imshow( 
-                                pivot_monthly_df, title=get_text('monthly_return_heatmap_title'),
-                                color_continuous_scale='RdYlGn', aspect='auto',
-                                labels=dict(x=get_text('month_label'), y=get_text('year_label'), color=get_text('return_label')))
-                            st.plotly_chart(fig_heatmap_chart, use_container_width=True)
-                        else:
-                            st.info(get_text('not_enough_data_for_heatmap'))
+                    if not bt_empty:
+                        pivot_monthly_df = analytics.monthly_table(analytics.monthly_returns(bt_returns)['strategy']) * 100
+                        pivot_monthly_df.columns = [datetime(2000, m, 1).strftime('%B') for m in pivot_monthly_df.columns]
+                        fig_heatmap_chart = px.imshow( 
+                            pivot_monthly_df, title=get_text('monthly_return_heatmap_title'),
+                            color_continuous_scale='RdYlGn', aspect='auto',
+                            labels=dict(x=get_text('month_label'), y=get_text('year_label'), color=get_text('return_label')))
+                        st.plotly_chart(fig_heatmap_chart, use_container_width=True)
                     else:
                          st.info(get_text('not_enough_data_for_heatmap'))
 
@@ -988,49 +1862,116 @@ elif page == get_text('backtest_results'):
                 stats_dict = { 
                     get_text('metric_col_header'): [
                         get_text('total_return'), get_text('annual_return'), get_text('annual_volatility'), get_text('sharpe_ratio'),
-                        get_text('max_drawdown'), get_text('calmar_ratio'), get_text('win_rate'),
+                        get_text('max_drawdown'), get_text('max_drawdown_days'), get_text('calmar_ratio'), get_text('win_rate'),
                         get_text('avg_daily_return_label'), get_text('std_dev_daily_return_label'),
                         get_text('skewness_label'), get_text('kurtosis_label'), get_text('var_95_label')
                     ],
                     get_text('value_col_header'): [
-                        f"{bt_total_ret:.2%}", f"{bt_annual_ret:.2%}", f"{bt_vol_annual:.2%}", f"{bt_sharpe:.3f}",
-                        f"{bt_max_dd:.2%}", f"{bt_calmar:.3f}", f"{bt_win_r:.2%}",
-                        f"{backtest_returns_series.mean():.4%}" if len(backtest_returns_series)>0 else "N/A",
-                        f"{backtest_returns_series.std():.4%}" if len(backtest_returns_series)>0 else "N/A",
-                        f"{pd.Series(backtest_returns_series).skew():.3f}" if len(backtest_returns_series)>0 else "N/A",
-                        f"{pd.Series(backtest_returns_series).kurtosis():.3f}" if len(backtest_returns_series)>0 else "N/A",
-                        f"{np.percentile(backtest_returns_series, 5):.4%}" if len(backtest_returns_series)>0 else "N/A"
+                        metric_text('total_return', '.2%'), metric_text('annual_return', '.2%'),
+                        metric_text('annual_volatility', '.2%'), metric_text('sharpe_ratio', '.3f'),
+                        metric_text('max_drawdown', '.2%'), metric_text('max_drawdown_days', '.0f'),
+                        metric_text('calmar_ratio', '.3f'), metric_text('win_rate', '.2%'),
+                        metric_text('daily_mean', '.4%'), metric_text('daily_std', '.4%'),
+                        metric_text('skewness', '.3f'), metric_text('kurtosis', '.3f'), metric_text('var_95', '.4%')
                     ]
                 }
                 st.dataframe(pd.DataFrame(stats_dict), use_container_width=True)
-                
+
                 st.session_state.backtest_result = {
-                    'returns': backtest_returns_series, 'cumulative_returns': backtest_cumulative_returns_series,
-                    'portfolio_value': backtest_portfolio_value_series if not backtest_cumulative_returns_series.empty else pd.Series(dtype=float), 
+                    'returns': bt_returns['strategy'].values, 'cumulative_returns': bt_cumulative,
+                    'portfolio_value': bt_result['portfolio_value'] if not bt_empty else pd.Series(dtype=float), 
                     'stats': stats_dict
                 }
-                
-        except Exception as e_bt_main: 
-            st.error(f"{get_text('backtest_run_failed_error')}: {e_bt_main}")
+
+            except Exception as e_bt_main: 
+                st.error(f"{get_text('backtest_run_failed_error')}: {e_bt_main}")
 
 # 侧边栏信息
 st.sidebar.markdown("---")
 st.sidebar.markdown(f"### {get_text('usage_instructions_header')}")
 st.sidebar.markdown(f"""
 1. **{get_text('data_view_instruction')}**: {get_text('data_view_desc')}
-2. **{get_text('model_training_instruction')}**: {get_text('model_training_desc')}
-3. **{get_text('backtest_results_instruction')}**: {get_text('backtest_results_desc')}
+2. **{get_text('factor_analysis_instruction')}**: {get_text('factor_analysis_desc')}
+3. **{get_text('model_training_instruction')}**: {get_text('model_training_desc')}
+4. **{get_text('backtest_results_instruction')}**: {get_text('backtest_results_desc')}
 """)
 
 st.sidebar.markdown(f"### {get_text('system_status_header')}")
 if QLIB_AVAILABLE:
     if st.session_state.get('qlib_initialized', False):
         st.sidebar.success(get_text('qlib_connected_status'))
+    elif check_data_directory() and not start_qlib_init(settings.provider_uri()).done():
+        st.sidebar.info(get_text('initializing_qlib'))
     else:
         st.sidebar.warning(get_text('qlib_not_initialized_status'))
 else:
     st.sidebar.info(get_text('using_mock_data_status'))
 
+# 各操作分阶段的耗时、数据量与缓存命中率（包括后台任务进程写入的记录）
+with st.sidebar.expander(get_text('performance_header')):
+    telemetry_records = telemetry.recent()
+    stage_records = [r for r in telemetry_records if r.get('action') != 'cache'][-TELEMETRY_ROWS:][::-1]
+    if stage_records:
+        st.dataframe(pd.DataFrame({
+            get_text('telemetry_time_col'): [datetime.fromtimestamp(r['time']).strftime('%H:%M:%S') for r in stage_records],
+            get_text('telemetry_action_col'): [r['action'] for r in stage_records],
+            get_text('telemetry_stage_col'): [r['stage'] for r in stage_records],
+            get_text('telemetry_duration_col'): [f"{r['seconds'] * 1000:,.0f} ms" for r in stage_records],
+            get_text('telemetry_rows_col'): [f"{r['rows']:,}" if r.get('rows') is not None else "-" for r in stage_records],
+            get_text('telemetry_size_col'): [f"{r['bytes'] / 1024**2:,.2f} MB" if r.get('bytes') is not None else "-"
+                                             for r in stage_records],
+        }), use_container_width=True)
+    else:
+        st.caption(get_text('telemetry_empty'))
+
+    # 缓存名 -> (命中率, 查询次数)
+    cache_rates = {}
+    # 本服务进程内的数据缓存与表达式缓存；只读取已被页面导入的模块，侧边栏不为此导入 pyarrow 或打开缓存索引
+    datacache_module = sys.modules.get('gui.datacache')
+    data_cache_obj = datacache_module.default_cache() if datacache_module is not None else None
+    if data_cache_obj is not None:
+        cache_rates['data_cache'] = (data_cache_obj.hit_rate(), data_cache_obj.stats['hits'] + data_cache_obj.stats['misses'])
+    expressions_module = sys.modules.get('gui.expressions')
+    if expressions_module is not None:
+        expression_cache_obj = expressions_module.series_cache()
+        cache_rates['expression_cache'] = (expression_cache_obj.hit_rate(),
+                                           expression_cache_obj.stats['hits'] + expression_cache_obj.stats['misses'])
+    cache_rates.update({name: (hits / total if total else 0.0, total)
+                        for name, (hits, total) in telemetry.cache_hit_rates(telemetry_records).items()})
+    st.dataframe(pd.DataFrame({
+        get_text('telemetry_cache_col'): [get_text(f'cache_name_{name}', name) for name in cache_rates],
+        get_text('telemetry_hit_rate_col'): [f"{rate:.0%}" if total else "-" for rate, total in cache_rates.values()],
+        get_text('telemetry_lookups_col'): [total for _, total in cache_rates.values()],
+    }), use_container_width=True)
+    st.caption(get_text('telemetry_file_caption').format(path=telemetry.telemetry_path()))
+
+record_timing('timing_page')
+
+# 启动耗时报告：本次运行与本进程首次运行（冷启动）的对比
+first_run_timings = process_first_run_timings()
+if not first_run_timings:
+    first_run_timings.update(STARTUP_TIMINGS)
+    print("Qlib GUI cold start: " + ", ".join(f"{stage}={seconds:.3f}s" for stage, seconds in STARTUP_TIMINGS))
+with st.sidebar.expander(get_text('startup_timing_header')):
+    st.dataframe(pd.DataFrame({
+        get_text('timing_stage_col'): [get_text(stage) for stage, _ in STARTUP_TIMINGS],
+        get_text('timing_this_run_col'): [f"{seconds * 1000:.0f} ms" for _, seconds in STARTUP_TIMINGS],
+        get_text('timing_first_run_col'): [f"{first_run_timings[stage] * 1000:.0f} ms" if stage in first_run_timings else "-"
+                                            for stage, _ in STARTUP_TIMINGS],
+    }), use_container_width=True)
+
+# 后台任务列表（所有会话共享）
+recent_jobs = jobs.get_queue().list(limit=10)
+if recent_jobs:
+    with st.sidebar.expander(get_text('background_jobs_header')):
+        st.dataframe(pd.DataFrame({
+            get_text('job_kind_col'): [get_text(f"job_kind_{job['kind']}") for job in recent_jobs],
+            get_text('job_label_col'): [job['label'] for job in recent_jobs],
+            get_text('job_status_col'): [get_text(f"job_status_{job['status']}") for job in recent_jobs],
+            get_text('job_progress_col'): [f"{job['progress']:.0%}" for job in recent_jobs],
+            get_text('job_created_col'): [datetime.fromtimestamp(job['created']).strftime('%m-%d %H:%M:%S') for job in recent_jobs],
+        }), use_container_width=True)
+
 st.sidebar.markdown(f"### {get_text('tech_support_header')}")
 st.sidebar.markdown(get_text('tech_support_contact'))
 
@@ -2,7 +2,12 @@
 # Licensed under the MIT License.
 
 import abc
+import copy
+import hashlib
+import json
+import os
 import shutil
+import tempfile
 import traceback
 from pathlib import Path
 from typing import Iterable, List, Union
@@ -16,6 +21,16 @@ from tqdm import tqdm
 from loguru import logger
 from qlib.utils import fname_to_code, code_to_fname
 
+from dump_snapshot import snapshot_dir, unshare
+
+# calendar shared by the feature dump workers, set by the pool initializer
+_SHARED_CALENDAR = None
+
+
+def _share_calendar(calendar: np.ndarray):
+    global _SHARED_CALENDAR
+    _SHARED_CALENDAR = calendar
+
 
 class DumpDataBase:
     INSTRUMENTS_START_FIELD = "start_datetime"
@@ -28,9 +43,16 @@ class DumpDataBase:
     HIGH_FREQ_FORMAT = "%Y-%m-%d %H:%M:%S"
     INSTRUMENTS_SEP = "\t"
     INSTRUMENTS_FILE_NAME = "all.txt"
+    MANIFEST_FILE_NAME = ".dump_manifest.jsonl"
 
     UPDATE_MODE = "update"
     ALL_MODE = "all"
+    COPY_BACKUP = "copy"
+    SNAPSHOT_BACKUP = "snapshot"
+    # state only used by the parent process; not pickled to the pool workers with every task
+    PARENT_ONLY_STATE = ("_calendars_list", "_kwargs", "_manifest", "_manifest_calendar")
+    # number of per-file date arrays collected before they are merged into the calendar
+    CALENDAR_MERGE_BATCH = 256
 
     def __init__(
         self,
@@ -45,6 +67,9 @@ class DumpDataBase:
         exclude_fields: str = "",
         include_fields: str = "",
         limit_nums: int = None,
+        spill_dir: str = None,
+        resume: bool = False,
+        backup_mode: str = "copy",
     ):
         """
 
@@ -72,6 +97,15 @@ class DumpDataBase:
             fields not dumped
         limit_nums: int
             Use when debugging, default None
+        spill_dir: str, default None
+            if spill_dir is not None, each csv is parsed only once (dump_all/dump_fix): the date pass spills
+            the parsed data to a temporary directory under spill_dir and the feature dump reads it from there
+        resume: bool, default False
+            continue a dump that did not finish: the symbols recorded as done in the manifest of qlib_dir are skipped
+        backup_mode: str, default "copy"
+            "copy": backup_dir is a full copy of qlib_dir;
+            "snapshot": backup_dir hardlinks the files of qlib_dir, and the dump copies (reflinks where
+            supported) only the files it modifies in place
         """
         csv_path = Path(csv_path).expanduser()
         if isinstance(exclude_fields, str):
@@ -86,6 +120,9 @@ class DumpDataBase:
         if limit_nums is not None:
             self.csv_files = self.csv_files[: int(limit_nums)]
         self.qlib_dir = Path(qlib_dir).expanduser()
+        if backup_mode not in (self.COPY_BACKUP, self.SNAPSHOT_BACKUP):
+            raise ValueError(f"unsupported backup_mode: {backup_mode}")
+        self.backup_mode = backup_mode
         self.backup_dir = backup_dir if backup_dir is None else Path(backup_dir).expanduser()
         if backup_dir is not None:
             self._backup_qlib_dir(Path(backup_dir).expanduser())
@@ -102,11 +139,162 @@ class DumpDataBase:
 
         self._calendars_list = []
 
+        self.spill_dir = spill_dir if spill_dir is None else Path(spill_dir).expanduser()
+        # temporary directory of the parsed source data, set while dumping
+        self._spill_path = None
+
+        self.resume = resume
+        # {symbol: {"status": "started" | "done", "bins": {bin file name: size}, "started": {bin file name: size}}}
+        self._manifest = {}
+        # {"length": int, "hash": str} of the calendar the manifest was written with
+        self._manifest_calendar = None
+
         self._mode = self.ALL_MODE
         self._kwargs = {}
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self.PARENT_ONLY_STATE:
+            state.pop(name, None)
+        return state
+
     def _backup_qlib_dir(self, target_dir: Path):
-        shutil.copytree(str(self.qlib_dir.resolve()), str(target_dir.resolve()))
+        if self.backup_mode == self.SNAPSHOT_BACKUP:
+            snapshot_dir(self.qlib_dir.resolve(), target_dir.resolve())
+        else:
+            shutil.copytree(str(self.qlib_dir.resolve()), str(target_dir.resolve()))
+
+    def _manifest_path(self) -> Path:
+        return self.qlib_dir.joinpath(self.MANIFEST_FILE_NAME)
+
+    def _open_manifest(self):
+        manifest_path = self._manifest_path()
+        self._manifest = {}
+        self._manifest_calendar = None
+        if self.resume:
+            if manifest_path.exists():
+                with manifest_path.open("r", encoding="utf-8") as fp:
+                    for line in fp:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            # the last line may be cut by a crash
+                            continue
+                        if "calendar" in record:
+                            self._manifest_calendar = record["calendar"]
+                        else:
+                            self._manifest[record["symbol"]] = record
+            logger.info(f"resume dump: {sum(r['status'] == 'done' for r in self._manifest.values())} symbols done")
+        elif manifest_path.exists():
+            if self._mode == self.UPDATE_MODE:
+                raise RuntimeError(
+                    f"{manifest_path} exists: a previous update did not finish and some bin files may already be "
+                    f"appended; rerun with --resume, or restore qlib_dir and remove the manifest"
+                )
+            logger.warning(f"{manifest_path} exists: a previous dump did not finish, starting over")
+            manifest_path.unlink()
+
+    def _append_manifest(self, record: dict):
+        self.qlib_dir.mkdir(parents=True, exist_ok=True)
+        unshare(self._manifest_path())
+        with self._manifest_path().open("a", encoding="utf-8") as fp:
+            fp.write(json.dumps(record) + "\n")
+            fp.flush()
+            os.fsync(fp.fileno())
+
+    def _record_manifest(self, code: str, status: str, bins: dict, started: dict = None):
+        record = {"symbol": code, "status": status, "bins": bins}
+        if started is not None:
+            record["started"] = started
+        self._manifest[code] = record
+        self._append_manifest(record)
+
+    def _check_manifest_calendar(self, calendar_list: Union[List[pd.Timestamp], np.ndarray]):
+        """record the calendar of the dump; a resumed dump must use the calendar the done symbols were dumped on"""
+        calendar = self._calendar_array(calendar_list).view(np.int64)
+        _calendar = {"length": int(calendar.size), "hash": hashlib.sha1(calendar.tobytes()).hexdigest()}
+        if self._manifest_calendar is None:
+            self._manifest_calendar = _calendar
+            self._append_manifest({"calendar": _calendar})
+        elif self._manifest_calendar != _calendar:
+            raise RuntimeError(
+                f"the calendar changed since the dump recorded in {self._manifest_path()} "
+                f"({self._manifest_calendar['length']} -> {_calendar['length']} dates); "
+                f"the finished symbols would keep stale start indices, rerun without --resume"
+            )
+
+    def _close_manifest(self, error_code: dict):
+        if error_code:
+            logger.warning(f"dump finished with errors, rerun with --resume to retry: {list(error_code)}")
+            return
+        if self._manifest_path().exists():
+            self._manifest_path().unlink()
+
+    def _bin_sizes(self, features_dir: Path, names: Iterable[str] = None) -> dict:
+        """sizes of the bin files of features_dir, or of the named ones (None when missing)"""
+        if names is not None:
+            return {
+                name: features_dir.joinpath(name).stat().st_size if features_dir.joinpath(name).exists() else None
+                for name in names
+            }
+        if not features_dir.exists():
+            return {}
+        return {p.name: p.stat().st_size for p in features_dir.glob(f"*.{self.freq}{self.DUMP_FILE_SUFFIX}")}
+
+    def _restore_bins(self, features_dir: Path, sizes: dict):
+        """undo the appends of an update: truncate the bin files to sizes, remove the ones created since"""
+        for bin_path in features_dir.glob(f"*.{self.freq}{self.DUMP_FILE_SUFFIX}"):
+            if bin_path.name in sizes:
+                unshare(bin_path)
+                with bin_path.open("r+b") as fp:
+                    fp.truncate(sizes[bin_path.name])
+            else:
+                bin_path.unlink()
+
+    def _submit_dump(self, executor, futures: dict, code: str, fn, *args):
+        """submit the dump of one symbol, unless the manifest records it as done"""
+        features_dir = self._features_dir.joinpath(code_to_fname(code).lower())
+        record = self._manifest.get(code)
+        if record is not None and record["status"] == "done":
+            # only the bin files written by the dump are checked, other fields may live in the same directory
+            if self._bin_sizes(features_dir, record["bins"]) == record["bins"]:
+                return
+            if self._mode == self.UPDATE_MODE:
+                if "started" not in record:
+                    raise RuntimeError(
+                        f"{code}: bin files changed since the update recorded in {self._manifest_path()}, "
+                        f"cannot tell how much was appended; restore qlib_dir and remove the manifest"
+                    )
+                logger.warning(f"{code}: bin files changed since the update finished, redo it")
+                record = {"status": "started", "bins": record["started"]}
+        if self._mode == self.UPDATE_MODE:
+            if record is not None and record["status"] == "started":
+                # undo the appends of the interrupted run
+                self._restore_bins(features_dir, record["bins"])
+            # the sizes before appending, to undo an interrupted update with --resume
+            self._record_manifest(code, "started", self._bin_sizes(features_dir))
+        futures[executor.submit(fn, *args)] = code
+
+    def _wait_dump(self, futures: dict) -> dict:
+        error_code = {}
+        with tqdm(total=len(futures)) as p_bar:
+            for _future in as_completed(futures):
+                try:
+                    bins = _future.result()
+                except Exception:
+                    error_code[futures[_future]] = traceback.format_exc()
+                else:
+                    _code = futures[_future]
+                    _started = self._manifest.get(_code, {})
+                    self._record_manifest(
+                        _code,
+                        "done",
+                        bins or {},
+                        started=_started["bins"] if _started.get("status") == "started" else None,
+                    )
+                p_bar.update()
+        logger.info(f"dump bin errors: {error_code}")
+        return error_code
 
     def _format_datetime(self, datetime_d: [str, pd.Timestamp]):
         datetime_d = pd.Timestamp(datetime_d)
@@ -117,6 +305,8 @@ class DumpDataBase:
     ) -> Iterable[pd.Timestamp]:
         if not isinstance(file_or_df, pd.DataFrame):
             df = self._get_source_data(file_or_df)
+            if self._spill_path is not None:
+                df.to_pickle(self._spill_file(file_or_df))
         else:
             df = file_or_df
         if df.empty or self.date_field_name not in df.columns.tolist():
@@ -133,12 +323,56 @@ class DumpDataBase:
         else:
             return _calendars.tolist()
 
+    def _get_date_array(self, file_path: Path):
+        """(begin, end), sorted unique datetime64[ns] values of a file as int64"""
+        if self._spill_path is not None:
+            df = self._get_source_data(file_path)
+            df.to_pickle(self._spill_file(file_path))
+        else:
+            df = self._get_source_dates(file_path)
+        if df.empty or self.date_field_name not in df.columns.tolist():
+            return (pd.NaT, pd.NaT), np.array([], dtype=np.int64)
+        _calendars = df[self.date_field_name].to_numpy(dtype="datetime64[ns]")
+        _calendars = np.unique(_calendars[~np.isnat(_calendars)]).view(np.int64)
+        if _calendars.size == 0:
+            return (pd.NaT, pd.NaT), _calendars
+        return (pd.Timestamp(_calendars[0]), pd.Timestamp(_calendars[-1])), _calendars
+
+    def _collect_dates(self, files: List[Path]):
+        """date pass over files: the merged calendar as datetime64[ns] and the (begin, end) of every file"""
+        all_datetime = np.array([], dtype=np.int64)
+        pending = []
+        date_ranges = []
+        with tqdm(total=len(files)) as p_bar:
+            with ProcessPoolExecutor(max_workers=self.works) as executor:
+                for _date_range, _calendars in executor.map(self._get_date_array, files):
+                    date_ranges.append(_date_range)
+                    pending.append(_calendars)
+                    if len(pending) >= self.CALENDAR_MERGE_BATCH:
+                        all_datetime = np.unique(np.concatenate([all_datetime] + pending))
+                        pending = []
+                    p_bar.update()
+        return np.unique(np.concatenate([all_datetime] + pending)).view("datetime64[ns]"), date_ranges
+
+    def _spill_file(self, file_path: Path) -> Path:
+        return self._spill_path.joinpath(f"{file_path.name[: -len(self.file_suffix)]}.pkl")
+
     def _get_source_data(self, file_path: Path) -> pd.DataFrame:
+        if self._spill_path is not None and self._spill_file(file_path).exists():
+            # already parsed by the date pass
+            return pd.read_pickle(self._spill_file(file_path))
         df = pd.read_csv(str(file_path.resolve()), low_memory=False)
         df[self.date_field_name] = df[self.date_field_name].astype(str).astype("datetime64[ns]")
         # df.drop_duplicates([self.date_field_name], inplace=True)
         return df
 
+    def _get_source_dates(self, file_path: Path) -> pd.DataFrame:
+        """only the date column of a source file"""
+        df = pd.read_csv(str(file_path.resolve()), usecols=lambda x: x == self.date_field_name)
+        if self.date_field_name in df.columns:
+            df[self.date_field_name] = df[self.date_field_name].astype(str).astype("datetime64[ns]")
+        return df
+
     def get_symbol_from_file(self, file_path: Path) -> str:
         return fname_to_code(file_path.name[: -len(self.file_suffix)].strip().lower())
 
@@ -174,12 +408,15 @@ class DumpDataBase:
     def save_calendars(self, calendars_data: list):
         self._calendars_dir.mkdir(parents=True, exist_ok=True)
         calendars_path = str(self._calendars_dir.joinpath(f"{self.freq}.txt").expanduser().resolve())
-        result_calendars_list = [self._format_datetime(x) for x in calendars_data]
+        result_calendars_list = pd.DatetimeIndex(calendars_data).strftime(self.calendar_format).tolist()
+        # a snapshot backup keeps the old calendar
+        unshare(calendars_path)
         np.savetxt(calendars_path, result_calendars_list, fmt="%s", encoding="utf-8")
 
     def save_instruments(self, instruments_data: Union[list, pd.DataFrame]):
         self._instruments_dir.mkdir(parents=True, exist_ok=True)
         instruments_path = str(self._instruments_dir.joinpath(self.INSTRUMENTS_FILE_NAME).resolve())
+        unshare(instruments_path)
         if isinstance(instruments_data, pd.DataFrame):
             _df_fields = [self.symbol_field_name, self.INSTRUMENTS_START_FIELD, self.INSTRUMENTS_END_FIELD]
             instruments_data = instruments_data.loc[:, _df_fields]
@@ -190,52 +427,77 @@ class DumpDataBase:
         else:
             np.savetxt(instruments_path, instruments_data, fmt="%s", encoding="utf-8")
 
-    def data_merge_calendar(self, df: pd.DataFrame, calendars_list: List[pd.Timestamp]) -> pd.DataFrame:
-        # calendars
-        calendars_df = pd.DataFrame(data=calendars_list, columns=[self.date_field_name])
-        calendars_df[self.date_field_name] = calendars_df[self.date_field_name].astype("datetime64[ns]")
-        cal_df = calendars_df[
-            (calendars_df[self.date_field_name] >= df[self.date_field_name].min())
-            & (calendars_df[self.date_field_name] <= df[self.date_field_name].max())
+    @staticmethod
+    def _calendar_array(calendar_list: Union[List[pd.Timestamp], np.ndarray]) -> np.ndarray:
+        """sorted calendar as a datetime64[ns] array"""
+        if isinstance(calendar_list, np.ndarray) and calendar_list.dtype == np.dtype("datetime64[ns]"):
+            return calendar_list
+        return pd.DatetimeIndex(calendar_list).to_numpy(dtype="datetime64[ns]")
+
+    def data_merge_calendar(
+        self, df: pd.DataFrame, calendars_list: Union[List[pd.Timestamp], np.ndarray]
+    ) -> pd.DataFrame:
+        calendar = self._calendar_array(calendars_list)
+        dates = df[self.date_field_name].to_numpy(dtype="datetime64[ns]")
+        # calendars between the first and the last date of df
+        cal = calendar[
+            np.searchsorted(calendar, dates.min(), side="left") : np.searchsorted(calendar, dates.max(), side="right")
         ]
-        # align index
-        cal_df.set_index(self.date_field_name, inplace=True)
-        df.set_index(self.date_field_name, inplace=True)
-        r_df = df.reindex(cal_df.index)
+        # align index: row of df for each calendar date, -1 for the dates df does not have
+        pos = np.searchsorted(cal, dates)
+        hit = pos < len(cal)
+        hit[hit] = cal[pos[hit]] == dates[hit]
+        rows = np.full(len(cal), -1, dtype=np.int64)
+        rows[pos[hit]] = np.flatnonzero(hit)
+        r_df = df.drop(columns=[self.date_field_name]).reset_index(drop=True).reindex(rows)
+        r_df.index = pd.DatetimeIndex(cal, name=self.date_field_name)
         return r_df
 
     @staticmethod
-    def get_datetime_index(df: pd.DataFrame, calendar_list: List[pd.Timestamp]) -> int:
-        return calendar_list.index(df.index.min())
+    def get_datetime_index(df: pd.DataFrame, calendar_list: Union[List[pd.Timestamp], np.ndarray]) -> int:
+        return int(np.searchsorted(DumpDataBase._calendar_array(calendar_list), df.index.min().to_datetime64()))
 
-    def _data_to_bin(self, df: pd.DataFrame, calendar_list: List[pd.Timestamp], features_dir: Path):
+    def _data_to_bin(self, df: pd.DataFrame, calendar_list: Union[List[pd.Timestamp], np.ndarray], features_dir: Path):
         if df.empty:
             logger.warning(f"{features_dir.name} data is None or empty")
             return
-        if not calendar_list:
+        if len(calendar_list) == 0:
             logger.warning("calendar_list is empty")
             return
+        calendar = self._calendar_array(calendar_list)
         # align index
-        _df = self.data_merge_calendar(df, calendar_list)
+        _df = self.data_merge_calendar(df, calendar)
         if _df.empty:
             logger.warning(f"{features_dir.name} data is not in calendars")
             return
         # used when creating a bin file
-        date_index = self.get_datetime_index(_df, calendar_list)
+        date_index = self.get_datetime_index(_df, calendar)
+        bins = {}
         for field in self.get_dump_fields(_df.columns):
             bin_path = features_dir.joinpath(f"{field.lower()}.{self.freq}{self.DUMP_FILE_SUFFIX}")
             if field not in _df.columns:
                 continue
             if bin_path.exists() and self._mode == self.UPDATE_MODE:
-                # update
+                # update; an interrupted append is undone from the manifest
+                unshare(bin_path)
                 with bin_path.open("ab") as fp:
                     np.array(_df[field]).astype("<f").tofile(fp)
             else:
                 # append; self._mode == self.ALL_MODE or not bin_path.exists()
-                np.hstack([date_index, _df[field]]).astype("<f").tofile(str(bin_path.resolve()))
-
-    def _dump_bin(self, file_or_data: [Path, pd.DataFrame], calendar_list: List[pd.Timestamp]):
-        if not calendar_list:
+                # written to a temporary file first, so that a crash never leaves a truncated bin file
+                tmp_path = bin_path.with_name(f"{bin_path.name}.tmp")
+                np.hstack([date_index, _df[field]]).astype("<f").tofile(str(tmp_path.resolve()))
+                os.replace(str(tmp_path), str(bin_path))
+            bins[bin_path.name] = bin_path.stat().st_size
+        return bins
+
+    def _dump_bin(
+        self, file_or_data: [Path, pd.DataFrame], calendar_list: Union[List[pd.Timestamp], np.ndarray] = None
+    ):
+        if calendar_list is None:
+            # the calendar given to the pool initializer
+            calendar_list = _SHARED_CALENDAR
+        if calendar_list is None or len(calendar_list) == 0:
             logger.warning("calendar_list is empty")
             return
         if isinstance(file_or_data, pd.DataFrame):
@@ -258,12 +520,24 @@ class DumpDataBase:
         # features save dir
         features_dir = self._features_dir.joinpath(code_to_fname(code).lower())
         features_dir.mkdir(parents=True, exist_ok=True)
-        self._data_to_bin(df, calendar_list, features_dir)
+        return self._data_to_bin(df, calendar_list, features_dir)
 
     @abc.abstractmethod
     def dump(self):
         raise NotImplementedError("dump not implemented!")
 
+    def _spill(self, dump_func):
+        """run dump_func with the parsed source data spilled to a temporary directory under self.spill_dir"""
+        if self.spill_dir is None:
+            return dump_func()
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self._spill_path = Path(tempfile.mkdtemp(prefix="dump_bin_", dir=str(self.spill_dir)))
+        try:
+            return dump_func()
+        finally:
+            shutil.rmtree(str(self._spill_path), ignore_errors=True)
+            self._spill_path = None
+
     def __call__(self, *args, **kwargs):
         self.dump()
 
@@ -271,29 +545,22 @@ class DumpDataBase:
 class DumpDataAll(DumpDataBase):
     def _get_all_date(self):
         logger.info("start get all date......")
-        all_datetime = set()
         date_range_list = []
-        _fun = partial(self._get_date, as_set=True, is_begin_end=True)
-        with tqdm(total=len(self.csv_files)) as p_bar:
-            with ProcessPoolExecutor(max_workers=self.works) as executor:
-                for file_path, ((_begin_time, _end_time), _set_calendars) in zip(
-                    self.csv_files, executor.map(_fun, self.csv_files)
-                ):
-                    all_datetime = all_datetime | _set_calendars
-                    if isinstance(_begin_time, pd.Timestamp) and isinstance(_end_time, pd.Timestamp):
-                        _begin_time = self._format_datetime(_begin_time)
-                        _end_time = self._format_datetime(_end_time)
-                        symbol = self.get_symbol_from_file(file_path)
-                        _inst_fields = [symbol.upper(), _begin_time, _end_time]
-                        date_range_list.append(f"{self.INSTRUMENTS_SEP.join(_inst_fields)}")
-                    p_bar.update()
-        self._kwargs["all_datetime_set"] = all_datetime
+        all_datetime, date_ranges = self._collect_dates(self.csv_files)
+        for file_path, (_begin_time, _end_time) in zip(self.csv_files, date_ranges):
+            if isinstance(_begin_time, pd.Timestamp) and isinstance(_end_time, pd.Timestamp):
+                _begin_time = self._format_datetime(_begin_time)
+                _end_time = self._format_datetime(_end_time)
+                symbol = self.get_symbol_from_file(file_path)
+                _inst_fields = [symbol.upper(), _begin_time, _end_time]
+                date_range_list.append(f"{self.INSTRUMENTS_SEP.join(_inst_fields)}")
+        self._kwargs["all_datetime"] = all_datetime
         self._kwargs["date_range_list"] = date_range_list
         logger.info("end of get all date.\n")
 
     def _dump_calendars(self):
         logger.info("start dump calendars......")
-        self._calendars_list = sorted(map(pd.Timestamp, self._kwargs["all_datetime_set"]))
+        self._calendars_list = self._kwargs["all_datetime"]
         self.save_calendars(self._calendars_list)
         logger.info("end of calendars dump.\n")
 
@@ -304,20 +571,31 @@ class DumpDataAll(DumpDataBase):
 
     def _dump_features(self):
         logger.info("start dump features......")
-        _dump_func = partial(self._dump_bin, calendar_list=self._calendars_list)
-        with tqdm(total=len(self.csv_files)) as p_bar:
-            with ProcessPoolExecutor(max_workers=self.works) as executor:
-                for _ in executor.map(_dump_func, self.csv_files):
-                    p_bar.update()
+        self._check_manifest_calendar(self._calendars_list)
+        # the calendar is sent once to each worker instead of with every file
+        with ProcessPoolExecutor(
+            max_workers=self.works, initializer=_share_calendar, initargs=(self._calendars_list,)
+        ) as executor:
+            futures = {}
+            for file_path in self.csv_files:
+                self._submit_dump(executor, futures, self.get_symbol_from_file(file_path), self._dump_bin, file_path)
+            error_code = self._wait_dump(futures)
+        self._close_manifest(error_code)
+        if error_code:
+            raise RuntimeError(f"dump bin failed: {list(error_code)}")
 
         logger.info("end of features dump.\n")
 
-    def dump(self):
+    def _dump(self):
         self._get_all_date()
         self._dump_calendars()
         self._dump_instruments()
         self._dump_features()
 
+    def dump(self):
+        self._open_manifest()
+        self._spill(self._dump)
+
 
 class DumpDataFix(DumpDataAll):
     def _dump_instruments(self):
@@ -344,8 +622,10 @@ class DumpDataFix(DumpDataAll):
         self.save_instruments(_inst_df.reset_index())
         logger.info("end of instruments dump.\n")
 
-    def dump(self):
-        self._calendars_list = self._read_calendars(self._calendars_dir.joinpath(f"{self.freq}.txt"))
+    def _dump(self):
+        self._calendars_list = self._calendar_array(
+            self._read_calendars(self._calendars_dir.joinpath(f"{self.freq}.txt"))
+        )
         # noinspection PyAttributeOutsideInit
         self._old_instruments = (
             self._read_instruments(self._instruments_dir.joinpath(self.INSTRUMENTS_FILE_NAME))
@@ -357,6 +637,15 @@ class DumpDataFix(DumpDataAll):
 
 
 class DumpDataUpdate(DumpDataBase):
+    PARENT_ONLY_STATE = DumpDataBase.PARENT_ONLY_STATE + (
+        "_all_data",
+        "_date_ranges",
+        "_old_calendar_list",
+        "_new_calendar_list",
+        "_update_instruments",
+        "_origin_instruments",
+    )
+
     def __init__(
         self,
         csv_path: str,
@@ -370,6 +659,9 @@ class DumpDataUpdate(DumpDataBase):
         exclude_fields: str = "",
         include_fields: str = "",
         limit_nums: int = None,
+        streaming: bool = False,
+        resume: bool = False,
+        backup_mode: str = "copy",
     ):
         """
 
@@ -397,6 +689,17 @@ class DumpDataUpdate(DumpDataBase):
             fields not dumped
         limit_nums: int
             Use when debugging, default None
+        streaming: bool, default False
+            if streaming is True, the source data is not loaded into memory at once: the new calendar
+            comes from a scan of the date columns, then each worker reads and appends one file.
+            Every file must hold a single symbol, named by the file name.
+        resume: bool, default False
+            continue an update that did not finish: the symbols recorded as done in the manifest of qlib_dir
+            are skipped and the partial appends of the others are undone
+        backup_mode: str, default "copy"
+            "copy": backup_dir is a full copy of qlib_dir;
+            "snapshot": backup_dir hardlinks the files of qlib_dir, and only the appended bin files,
+            the calendar and the instruments are copied (reflinked where supported)
         """
         super().__init__(
             csv_path,
@@ -409,6 +712,8 @@ class DumpDataUpdate(DumpDataBase):
             symbol_field_name,
             exclude_fields,
             include_fields,
+            resume=resume,
+            backup_mode=backup_mode,
         )
         self._mode = self.UPDATE_MODE
         self._old_calendar_list = self._read_calendars(self._calendars_dir.joinpath(f"{self.freq}.txt"))
@@ -419,12 +724,23 @@ class DumpDataUpdate(DumpDataBase):
             .set_index([self.symbol_field_name])
             .to_dict(orient="index")
         )  # type: dict
-
-        # load all csv files
-        self._all_data = self._load_all_source_data()  # type: pd.DataFrame
-        self._new_calendar_list = self._old_calendar_list + sorted(
-            filter(lambda x: x > self._old_calendar_list[-1], self._all_data[self.date_field_name].unique())
-        )
+        self._origin_instruments = copy.deepcopy(self._update_instruments)
+
+        self._streaming = streaming
+        if self._streaming:
+            self._all_data = None
+            logger.info("start scan source dates......")
+            all_datetime, self._date_ranges = self._collect_dates(self.csv_files)
+            logger.info("end of scan source dates.\n")
+            self._new_calendar_list = self._old_calendar_list + pd.DatetimeIndex(
+                all_datetime[all_datetime > np.datetime64(self._old_calendar_list[-1])]
+            ).tolist()
+        else:
+            # load all csv files
+            self._all_data = self._load_all_source_data()  # type: pd.DataFrame
+            self._new_calendar_list = self._old_calendar_list + sorted(
+                filter(lambda x: x > self._old_calendar_list[-1], self._all_data[self.date_field_name].unique())
+            )
 
     def _load_all_source_data(self):
         # NOTE: Need more memory
@@ -453,9 +769,50 @@ class DumpDataUpdate(DumpDataBase):
     def _dump_instruments(self):
         pass
 
+    def _update_bin(self, file_path: Path, end_datetime: pd.Timestamp = None):
+        """dump one source file; the rows after end_datetime are appended when end_datetime is given"""
+        df = self._get_source_data(file_path)
+        if self.symbol_field_name not in df.columns:
+            df[self.symbol_field_name] = self.get_symbol_from_file(file_path)
+        if end_datetime is None:
+            # new stock, on the new calendar shared by the pool initializer
+            return self._dump_bin(df)
+        _dates = df[self.date_field_name]
+        return self._dump_bin(df, np.unique(_dates[_dates > end_datetime].to_numpy(dtype="datetime64[ns]")))
+
+    def _dump_features_streaming(self):
+        logger.info("start dump features......")
+        with ProcessPoolExecutor(
+            max_workers=self.works,
+            initializer=_share_calendar,
+            initargs=(self._calendar_array(self._new_calendar_list),),
+        ) as executor:
+            futures = {}
+            for file_path, (_start, _end) in zip(self.csv_files, self._date_ranges):
+                if not (isinstance(_start, pd.Timestamp) and isinstance(_end, pd.Timestamp)):
+                    continue
+                _code = self.get_symbol_from_file(file_path).upper()
+                if _code in self._update_instruments:
+                    # exists stock, will append data
+                    _old_end = pd.Timestamp(self._update_instruments[_code][self.INSTRUMENTS_END_FIELD])
+                    if _end > _old_end:
+                        self._update_instruments[_code][self.INSTRUMENTS_END_FIELD] = self._format_datetime(_end)
+                        self._submit_dump(executor, futures, _code, self._update_bin, file_path, _old_end)
+                else:
+                    # new stock
+                    _dt_range = self._update_instruments.setdefault(_code, dict())
+                    _dt_range[self.INSTRUMENTS_START_FIELD] = self._format_datetime(_start)
+                    _dt_range[self.INSTRUMENTS_END_FIELD] = self._format_datetime(_end)
+                    self._submit_dump(executor, futures, _code, self._update_bin, file_path)
+            error_code = self._wait_dump(futures)
+
+        logger.info("end of features dump.\n")
+        return error_code
+
     def _dump_features(self):
+        if self._streaming:
+            return self._dump_features_streaming()
         logger.info("start dump features......")
-        error_code = {}
         with ProcessPoolExecutor(max_workers=self.works) as executor:
             futures = {}
             for _code, _df in self._all_data.groupby(self.symbol_field_name, group_keys=False):
@@ -474,31 +831,34 @@ class DumpDataUpdate(DumpDataBase):
                     )
                     if _update_calendars:
                         self._update_instruments[_code][self.INSTRUMENTS_END_FIELD] = self._format_datetime(_end)
-                        futures[executor.submit(self._dump_bin, _df, _update_calendars)] = _code
+                        self._submit_dump(executor, futures, _code, self._dump_bin, _df, _update_calendars)
                 else:
                     # new stock
                     _dt_range = self._update_instruments.setdefault(_code, dict())
                     _dt_range[self.INSTRUMENTS_START_FIELD] = self._format_datetime(_start)
                     _dt_range[self.INSTRUMENTS_END_FIELD] = self._format_datetime(_end)
-                    futures[executor.submit(self._dump_bin, _df, self._new_calendar_list)] = _code
-
-            with tqdm(total=len(futures)) as p_bar:
-                for _future in as_completed(futures):
-                    try:
-                        _future.result()
-                    except Exception:
-                        error_code[futures[_future]] = traceback.format_exc()
-                    p_bar.update()
-            logger.info(f"dump bin errors: {error_code}")
+                    self._submit_dump(executor, futures, _code, self._dump_bin, _df, self._new_calendar_list)
+
+            error_code = self._wait_dump(futures)
 
         logger.info("end of features dump.\n")
+        return error_code
 
     def dump(self):
+        self._open_manifest()
+        self._check_manifest_calendar(self._new_calendar_list)
         self.save_calendars(self._new_calendar_list)
-        self._dump_features()
+        error_code = self._dump_features()
+        for _code in error_code:
+            # keep the old range of the failed stocks, so that --resume updates them again
+            if _code in self._origin_instruments:
+                self._update_instruments[_code] = self._origin_instruments[_code]
+            else:
+                self._update_instruments.pop(_code, None)
         df = pd.DataFrame.from_dict(self._update_instruments, orient="index")
         df.index.names = [self.symbol_field_name]
         self.save_instruments(df.reset_index())
+        self._close_manifest(error_code)
 
 
 if __name__ == "__main__":
@@ -20,6 +20,8 @@ from loguru import logger
 from qlib.utils import fname_to_code, get_period_offset
 from qlib.config import C
 
+from dump_snapshot import snapshot_dir, unshare
+
 
 class DumpPitData:
     PIT_DIR_NAME = "financial"
@@ -49,6 +51,8 @@ class DumpPitData:
 
     UPDATE_MODE = "update"
     ALL_MODE = "all"
+    COPY_BACKUP = "copy"
+    SNAPSHOT_BACKUP = "snapshot"
 
     def __init__(
         self,
@@ -65,6 +69,7 @@ class DumpPitData:
         exclude_fields: str = "",
         include_fields: str = "",
         limit_nums: int = None,
+        backup_mode: str = "copy",
     ):
         """
 
@@ -90,6 +95,10 @@ class DumpPitData:
             fields not dumped
         limit_nums: int
             Use when debugging, default None
+        backup_mode: str, default "copy"
+            "copy": backup_dir is a full copy of qlib_dir;
+            "snapshot": backup_dir hardlinks the files of qlib_dir, and the dump copies (reflinks where
+            supported) only the files it modifies
         """
         csv_path = Path(csv_path).expanduser()
         if isinstance(exclude_fields, str):
@@ -103,6 +112,9 @@ class DumpPitData:
         if limit_nums is not None:
             self.csv_files = self.csv_files[: int(limit_nums)]
         self.qlib_dir = Path(qlib_dir).expanduser()
+        if backup_mode not in (self.COPY_BACKUP, self.SNAPSHOT_BACKUP):
+            raise ValueError(f"unsupported backup_mode: {backup_mode}")
+        self.backup_mode = backup_mode
         self.backup_dir = backup_dir if backup_dir is None else Path(backup_dir).expanduser()
         if backup_dir is not None:
             self._backup_qlib_dir(Path(backup_dir).expanduser())
@@ -116,7 +128,10 @@ class DumpPitData:
         self._mode = self.ALL_MODE
 
     def _backup_qlib_dir(self, target_dir: Path):
-        shutil.copytree(str(self.qlib_dir.resolve()), str(target_dir.resolve()))
+        if self.backup_mode == self.SNAPSHOT_BACKUP:
+            snapshot_dir(self.qlib_dir.resolve(), target_dir.resolve())
+        else:
+            shutil.copytree(str(self.qlib_dir.resolve()), str(target_dir.resolve()))
 
     def get_source_data(self, file_path: Path) -> pd.DataFrame:
         df = pd.read_csv(str(file_path.resolve()), low_memory=False)
@@ -188,6 +203,9 @@ class DumpPitData:
                 logger.warning(f"field {field} of {symbol} is empty")
                 continue
             data_file, index_file = self.get_filenames(symbol, field, interval)
+            # the files are modified in place: a snapshot backup keeps the old content
+            unshare(data_file)
+            unshare(index_file)
 
             ## calculate first & last period
             start_year = df_sub[self.period_column_name].min()
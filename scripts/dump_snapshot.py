@@ -0,0 +1,62 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+"""
+Snapshot backups of a qlib data directory, used by dump_bin.py and dump_pit.py.
+
+A snapshot hardlinks every file of the directory instead of copying it, so it takes seconds
+whatever the size of the data. Before the dump scripts modify a file in place they call
+`unshare`: a file shared with a snapshot is first replaced by a private copy (a reflink where
+the filesystem supports it), so the snapshot keeps the old content and only the files that the
+dump really modifies are ever copied.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request of Linux FICLONE: the copy shares the extents of the source (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+def clone_file(src: [str, Path], dst: [str, Path]):
+    """copy src to dst, as a reflink where the filesystem supports it"""
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as fs, open(dst, "wb") as fd:
+                fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def _link_file(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        # e.g. the snapshot is on another filesystem
+        clone_file(src, dst)
+
+
+def snapshot_dir(src_dir: [str, Path], target_dir: [str, Path]):
+    """hardlink every file of src_dir into target_dir, which must not exist"""
+    shutil.copytree(str(src_dir), str(target_dir), copy_function=_link_file)
+
+
+def unshare(path: [str, Path]):
+    """replace path by a private copy when it is hardlinked elsewhere, before it is modified in place"""
+    path = Path(path)
+    try:
+        if path.stat().st_nlink <= 1:
+            return
+    except FileNotFoundError:
+        return
+    tmp_path = path.with_name(f"{path.name}.unshare")
+    clone_file(path, tmp_path)
+    os.replace(str(tmp_path), str(path))
@@ -0,0 +1,100 @@
+#  Copyright (c) Microsoft Corporation.
+#  Licensed under the MIT License.
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from gui import analytics
+
+
+def reference_summary(r: pd.Series) -> dict:
+    """One strategy's metrics computed the plain pandas way."""
+    growth = (1 + r.fillna(0)).cumprod()
+    drawdown = growth / growth.cummax() - 1
+    n = r.count()
+    total = growth.iloc[-1] - 1
+    annual = (1 + total) ** (analytics.TRADING_DAYS / n) - 1
+    volatility = r.std() * np.sqrt(analytics.TRADING_DAYS)
+    duration, longest = 0, 0
+    for value in drawdown:
+        duration = duration + 1 if value < 0 else 0
+        longest = max(longest, duration)
+    return {
+        "total_return": total,
+        "annual_return": annual,
+        "annual_volatility": volatility,
+        "sharpe_ratio": annual / volatility,
+        "max_drawdown": drawdown.min(),
+        "calmar_ratio": annual / abs(drawdown.min()),
+        "win_rate": (r > 0).sum() / n,
+        "daily_mean": r.mean(),
+        "daily_std": r.std(),
+        "skewness": r.skew(),
+        "kurtosis": r.kurt(),
+        "var_95": r.quantile(0.05),
+        "max_drawdown_days": longest,
+        "trading_days": n,
+    }
+
+
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        dates = pd.bdate_range("2020-01-01", periods=300)
+        data = {f"s{i}": 0.0005 * i + 0.01 * rng.standard_normal(len(dates)) for i in range(4)}
+        self.returns = pd.DataFrame(data, index=dates)
+        # a strategy that started later and skipped some days
+        self.returns.iloc[:40, 2] = np.nan
+        self.returns.iloc[100:105, 2] = np.nan
+        self.returns["empty"] = np.nan
+
+    def test_1_summary(self):
+        table = analytics.summary(self.returns)
+        self.assertEqual(list(table.columns), list(analytics.SUMMARY_METRICS))
+        self.assertEqual(list(table.index), list(self.returns.columns))
+        for name in ("s0", "s1", "s2", "s3"):
+            expected = reference_summary(self.returns[name])
+            for metric in analytics.SUMMARY_METRICS:
+                self.assertAlmostEqual(table.loc[name, metric], expected[metric], places=9, msg=f"{name} {metric}")
+        self.assertTrue(table.loc["empty", list(analytics.SUMMARY_METRICS[:-1])].isna().all())
+        self.assertEqual(table.loc["empty", "trading_days"], 0)
+
+    def test_2_drawdowns(self):
+        growth = (1 + self.returns.fillna(0)).cumprod()
+        pd.testing.assert_frame_equal(analytics.cumulative(self.returns), growth)
+        pd.testing.assert_frame_equal(analytics.drawdowns(self.returns), growth / growth.cummax() - 1)
+        durations = analytics.drawdown_durations(self.returns)
+        self.assertTrue((durations.iloc[0] == 0).all())
+        self.assertTrue(((durations == 0) == (analytics.drawdowns(self.returns) >= 0)).all().all())
+
+    def test_3_rolling_sharpe(self):
+        window = 20
+        rolling = self.returns.fillna(0).rolling(window)
+        expected = rolling.mean() / rolling.std() * np.sqrt(analytics.TRADING_DAYS)
+        expected[rolling.std() == 0] = np.nan
+        result = analytics.rolling_sharpe(self.returns, window)
+        self.assertTrue(result.iloc[: window - 1].isna().all().all())
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-7, atol=1e-9, equal_nan=True)
+        # a window longer than the data
+        self.assertTrue(analytics.rolling_sharpe(self.returns.iloc[:10], window).isna().all().all())
+
+    def test_4_monthly_returns(self):
+        monthly = analytics.monthly_returns(self.returns)
+        filled = 1 + self.returns.fillna(0)
+        expected = filled.groupby([filled.index.year, filled.index.month]).prod() - 1
+        np.testing.assert_allclose(monthly.to_numpy(), expected.to_numpy(), rtol=1e-12)
+        self.assertEqual(str(monthly.index[0]), "2020-01")
+
+        table = analytics.monthly_table(monthly["s1"])
+        self.assertEqual(list(table.columns), list(range(1, 13)))
+        self.assertAlmostEqual(table.loc[2020, 3], monthly.loc["2020-03", "s1"])
+        self.assertTrue(np.isnan(table.loc[2021, 12]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+#  Copyright (c) Microsoft Corporation.
+#  Licensed under the MIT License.
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from gui import charts
+
+
+class TestCharts(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.y = np.cumsum(rng.standard_normal(10_000))
+        self.x = np.arange(len(self.y), dtype=np.float64)
+
+    def test_1_lttb(self):
+        for n_out in (3, 10, 500, 2000):
+            positions = charts.lttb_indices(self.x, self.y, n_out)
+            self.assertEqual(len(positions), n_out)
+            self.assertEqual(positions[0], 0)
+            self.assertEqual(positions[-1], len(self.y) - 1)
+            self.assertTrue(np.all(np.diff(positions) > 0))
+        # nothing to reduce
+        np.testing.assert_array_equal(charts.lttb_indices(self.x[:50], self.y[:50], 100), np.arange(50))
+
+    def test_2_minmax(self):
+        for n_out in (4, 11, 500, 2000):
+            positions = charts.minmax_indices(self.y, n_out)
+            self.assertLessEqual(len(positions), n_out)
+            self.assertEqual(positions[0], 0)
+            self.assertEqual(positions[-1], len(self.y) - 1)
+            self.assertTrue(np.all(np.diff(positions) > 0))
+        # every spike survives: the global extremes are always kept
+        positions = charts.minmax_indices(self.y, 100)
+        self.assertIn(int(np.argmax(self.y)), positions)
+        self.assertIn(int(np.argmin(self.y)), positions)
+        np.testing.assert_array_equal(charts.minmax_indices(self.y[:50], 100), np.arange(50))
+
+    def test_3_downsample_frame(self):
+        dates = pd.date_range("2020-01-01", periods=len(self.y), freq="min")
+        df = pd.concat(
+            [
+                pd.DataFrame({"datetime": dates, "close": self.y, "instrument": "SH600000"}),
+                pd.DataFrame({"datetime": dates[:100], "close": self.y[:100], "instrument": "SZ000001"}),
+            ]
+        )
+        for method in (charts.LTTB, charts.MINMAX):
+            out = charts.downsample_frame(df, "datetime", "close", "instrument", max_points=500, method=method)
+            sizes = out.groupby("instrument").size()
+            self.assertLessEqual(sizes["SH600000"], 500)
+            self.assertEqual(sizes["SZ000001"], 100)
+            first = out[out["instrument"] == "SH600000"]
+            self.assertEqual(first["datetime"].iloc[0], dates[0])
+            self.assertEqual(first["datetime"].iloc[-1], dates[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
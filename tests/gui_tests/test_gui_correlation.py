@@ -0,0 +1,87 @@
+#  Copyright (c) Microsoft Corporation.
+#  Licensed under the MIT License.
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from gui import correlation
+
+
+class TestCorrelation(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        common = rng.standard_normal((120, 1))
+        self.returns = 0.01 * (common * rng.random(37) + rng.standard_normal((120, 37)))
+        self.returns[rng.random(self.returns.shape) < 0.15] = np.nan
+        # listed late: too few common days with everything
+        self.returns[:110, 5] = np.nan
+        self.instruments = np.array([f"SH{600000 + i}" for i in range(37)])
+
+    def test_1_pairwise_matrix(self):
+        df = pd.DataFrame(self.returns)
+        for method, expected in (
+            (correlation.CORRELATION, df.corr(min_periods=20)),
+            (correlation.COVARIANCE, df.cov(min_periods=20)),
+        ):
+            # several row blocks, the last one partial
+            matrix = correlation.pairwise_matrix(self.returns, method, min_periods=20, block_size=8)
+            self.assertEqual(matrix.dtype, np.float32)
+            np.testing.assert_allclose(matrix, expected.to_numpy(), rtol=1e-4, atol=1e-7, equal_nan=True)
+        self.assertTrue(np.isnan(matrix[5, :5]).all())
+
+    def test_2_top_pairs(self):
+        matrix = correlation.pairwise_matrix(self.returns, min_periods=20)
+        rows, cols = np.triu_indices(len(matrix), k=1)
+        values = matrix[rows, cols]
+        finite = np.isfinite(values)
+        rows, cols, values = rows[finite], cols[finite], values[finite]
+        best = np.argsort(-np.abs(values), kind="stable")[:10]
+        for block_size in (4, 7, 512):
+            pairs = correlation.top_pairs(matrix, self.instruments, count=10, block_size=block_size)
+            self.assertEqual(list(pairs["instrument_1"]), list(self.instruments[rows[best]]))
+            self.assertEqual(list(pairs["instrument_2"]), list(self.instruments[cols[best]]))
+            np.testing.assert_array_equal(pairs["value"].to_numpy(), values[best])
+
+        # fewer finite pairs than asked for
+        small = np.full((3, 3), np.nan, dtype=np.float32)
+        small[0, 2] = small[2, 0] = -0.5
+        pairs = correlation.top_pairs(small, self.instruments[:3], count=10, block_size=2)
+        self.assertEqual(pairs.values.tolist(), [[self.instruments[0], self.instruments[2], -0.5]])
+        self.assertTrue(correlation.top_pairs(np.full((3, 3), np.nan), self.instruments[:3]).empty)
+
+    def test_3_decimate(self):
+        matrix = correlation.pairwise_matrix(self.returns, min_periods=20)
+        display, edges = correlation.decimate(matrix, max_cells=10)
+        self.assertEqual(display.shape, (10, 10))
+        self.assertEqual((edges[0], edges[-1]), (0, len(matrix)))
+        block = matrix[edges[2] : edges[3], edges[4] : edges[5]]
+        self.assertAlmostEqual(float(display[2, 4]), float(np.nanmean(block)), places=5)
+        same, _ = correlation.decimate(matrix, max_cells=100)
+        self.assertIs(same, matrix)
+
+    def test_4_cache_key(self):
+        config = {
+            "universe": ["SZ000001", "SH600000"],
+            "start_date": "2020-01-01",
+            "end_date": "2020-12-31",
+            "method": correlation.CORRELATION,
+            "min_periods": 20,
+            "max_cells": 300,
+            "clustered": True,
+            "data_end": "2021-06-30",
+        }
+        key = correlation.cache_key(config)
+        # display options and the order of the codes do not change the matrix
+        self.assertEqual(correlation.cache_key(dict(config, max_cells=100, clustered=False)), key)
+        self.assertEqual(correlation.cache_key(dict(config, universe=["SH600000", "SZ000001"])), key)
+        for change in ({"end_date": "2020-11-30"}, {"method": correlation.COVARIANCE}, {"data_end": "2021-07-31"}):
+            self.assertNotEqual(correlation.cache_key(dict(config, **change)), key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#  Copyright (c) Microsoft Corporation.
+#  Licensed under the MIT License.
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from gui.datacache import ColumnarCache
+
+
+@unittest.skipUnless(ColumnarCache.available(), "pyarrow is not installed")
+class TestColumnarCache(unittest.TestCase):
+    FIELDS = ["$close", "$volume"]
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache = ColumnarCache(self.root)
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def loader(self, instruments, fields, start_time, end_time, freq):
+        self.calls.append((list(instruments), list(fields), pd.Timestamp(start_time), pd.Timestamp(end_time)))
+        return self.expected(instruments, fields, start_time, end_time)
+
+    @staticmethod
+    def expected(instruments, fields, start_time, end_time):
+        dates = pd.date_range(start_time, end_time, freq="D", name="datetime")
+        frames = {
+            inst: pd.DataFrame(
+                {field: (dates.dayofyear + 1000 * i + 100 * j).astype(np.float32) for j, field in enumerate(fields)},
+                index=dates,
+            )
+            for i, inst in enumerate(instruments)
+        }
+        return pd.concat(frames, names=["instrument", "datetime"])
+
+    def get(self, instruments, start_time, end_time):
+        return self.cache.get_frame(instruments, self.FIELDS, start_time, end_time, loader=self.loader)
+
+    def test_1_miss_then_hit(self):
+        instruments = ["SH600000", "SZ000001"]
+        df = self.get(instruments, "2020-01-01", "2020-03-31")
+        expected = self.expected(instruments, self.FIELDS, "2020-01-01", "2020-03-31")
+        pd.testing.assert_frame_equal(df, expected, check_freq=False)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.cache.stats, {"hits": 0, "misses": 4})
+
+        # the same range and a range inside it are served from disk
+        self.get(instruments, "2020-01-01", "2020-03-31")
+        df = self.get(instruments, "2020-02-01", "2020-02-29")
+        expected = self.expected(instruments, self.FIELDS, "2020-02-01", "2020-02-29")
+        pd.testing.assert_frame_equal(df, expected, check_freq=False)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.cache.stats, {"hits": 8, "misses": 4})
+
+        # a wider range is fetched again over the union of both ranges
+        df = self.get(instruments[:1], "2019-12-01", "2020-01-31")
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.calls[-1][2:], (pd.Timestamp("2019-12-01"), pd.Timestamp("2020-03-31")))
+        expected = self.expected(instruments[:1], self.FIELDS, "2019-12-01", "2020-01-31")
+        pd.testing.assert_frame_equal(df, expected, check_freq=False)
+        df = self.get(instruments[:1], "2019-12-01", "2020-03-31")
+        self.assertEqual(len(self.calls), 2)
+
+    def test_2_data_end(self):
+        def get(data_end):
+            return self.cache.get_frame(
+                ["SH600000"], self.FIELDS, "2020-01-01", "2020-12-31", loader=self.loader, data_end=data_end
+            )
+
+        # coverage stops at data_end, so a later request past it fetches the appended days
+        get("2020-06-30")
+        self.assertEqual(self.calls[-1][3], pd.Timestamp("2020-06-30"))
+        get("2020-06-30")
+        self.assertEqual(len(self.calls), 1)
+        get("2020-07-31")
+        self.assertEqual(len(self.calls), 2)
+
+    def rows(self):
+        with sqlite3.connect(os.path.join(self.root, "index.sqlite")) as conn:
+            rows = conn.execute("SELECT instrument, field, nbytes FROM columns").fetchall()
+        return {(inst, field): nbytes for inst, field, nbytes in rows}
+
+    def test_3_eviction(self):
+        # one column per request, each with its own last access time
+        columns = [("SH600000", "$close"), ("SZ000001", "$close"), ("SH600004", "$volume")]
+        for inst, field in columns:
+            self.cache.get_frame([inst], [field], "2020-01-01", "2020-12-31", loader=self.loader)
+            time.sleep(0.01)
+        sizes = self.rows()
+        self.assertEqual(set(sizes), set(columns))
+        oldest, middle, newest = columns
+
+        # reading the oldest column makes it the most recently used one; the budget holds two columns
+        self.cache.max_bytes = sizes[oldest] + sizes[newest]
+        self.cache.get_frame([oldest[0]], [oldest[1]], "2020-01-01", "2020-12-31", loader=self.loader)
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(set(self.rows()), {oldest, newest})
+        self.assertFalse(os.path.exists(self.cache._column_path(*middle, "day")))
+        self.assertTrue(os.path.exists(self.cache._column_path(*oldest, "day")))
+        self.assertTrue(os.path.exists(self.cache._column_path(*newest, "day")))
+
+        # the evicted column is fetched again
+        self.cache.get_frame([middle[0]], [middle[1]], "2020-01-01", "2020-12-31", loader=self.loader)
+        self.assertEqual(len(self.calls), 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+#  Copyright (c) Microsoft Corporation.
+#  Licensed under the MIT License.
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from gui import factor
+
+
+class TestFactorStatistics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.a = rng.standard_normal((30, 40))
+        self.b = 0.5 * self.a + rng.standard_normal((30, 40))
+        self.a[rng.random(self.a.shape) < 0.2] = np.nan
+        self.b[rng.random(self.b.shape) < 0.2] = np.nan
+        # too small cross sections
+        self.a[3, 3:] = np.nan
+        self.b[4] = np.nan
+
+    def test_1_row_corr(self):
+        corr = factor.row_corr(self.a, self.b)
+        expected = pd.DataFrame(self.a).T.corrwith(pd.DataFrame(self.b).T).to_numpy()
+        expected[3] = np.nan
+        np.testing.assert_allclose(corr, expected, rtol=1e-10, equal_nan=True)
+        self.assertTrue(np.isnan(corr[[3, 4]]).all())
+
+    def test_2_quantile_buckets(self):
+        quantiles = 5
+        buckets = factor.quantile_buckets(self.a, quantiles)
+        self.assertTrue((buckets[np.isnan(self.a)] == -1).all())
+        for row, row_buckets in zip(self.a, buckets):
+            valid = np.isfinite(row)
+            if not valid.any():
+                continue
+            ranks = pd.Series(row[valid]).rank().to_numpy().astype(np.int64)
+            np.testing.assert_array_equal(row_buckets[valid], (ranks - 1) * quantiles // valid.sum())
+            # equal-count buckets, ordered by value
+            counts = np.bincount(row_buckets[valid], minlength=quantiles)
+            self.assertLessEqual(counts.max() - counts.min(), 1)
+            order = np.argsort(row[valid])
+            self.assertTrue((np.diff(row_buckets[valid][order]) >= 0).all())
+
+    def test_3_bucket_means(self):
+        buckets = factor.quantile_buckets(self.a, 5)
+        means = factor.bucket_means(self.b, buckets, 5)
+        frame = pd.DataFrame({"date": np.repeat(np.arange(30), 40), "bucket": buckets.ravel(), "value": self.b.ravel()})
+        expected = frame[frame["bucket"] >= 0].groupby(["date", "bucket"])["value"].mean().unstack()
+        expected = expected.reindex(index=range(30), columns=range(5)).to_numpy()
+        np.testing.assert_allclose(means, expected, rtol=1e-10, equal_nan=True)
+
+    def test_4_membership_turnover(self):
+        members = np.array([[1, 1, 0, 0], [1, 0, 1, 0], [1, 0, 1, 0], [0, 0, 0, 0]], dtype=bool)
+        np.testing.assert_allclose(factor.membership_turnover(members), [np.nan, 0.5, 0.0, np.nan], equal_nan=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+#  Copyright (c) Microsoft Corporation.
+#  Licensed under the MIT License.
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from gui import jobs, settings
+
+TIMEOUT = 120
+
+
+def add(a, b, report):
+    report(0.5, "adding")
+    return {"sum": a + b}
+
+
+def fail(report):
+    raise ValueError("bad parameters")
+
+
+def sleep_with_child(seconds, report):
+    # stands for the process pool of a sweep: it has to die with the job
+    child = subprocess.Popen([sys.executable, "-c", f"import time; time.sleep({seconds})"])
+    report(0.1, "started", child=child.pid)
+    time.sleep(seconds)
+
+
+def _alive(pid) -> bool:
+    if not jobs._pid_alive(pid):
+        return False
+    # a killed child of a killed job stays a zombie until init reaps it
+    try:
+        with open(f"/proc/{pid}/stat") as fp:
+            return fp.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return True
+
+
+class TestJobQueue(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.saved = settings.CACHE_DIR, settings.QLIB_DATA_DIR
+        cls.root = tempfile.mkdtemp()
+        settings.CACHE_DIR = os.path.join(cls.root, "cache")
+        settings.QLIB_DATA_DIR = os.path.join(cls.root, "qlib_data")
+        cls.queue = jobs.JobQueue(max_workers=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        for job in cls.queue.list(limit=100):
+            cls.queue.cancel(job["id"])
+        # the scheduler thread is a daemon: stop it from touching the removed directory
+        cls.queue._schedule = lambda: None
+        settings.CACHE_DIR, settings.QLIB_DATA_DIR = cls.saved
+        shutil.rmtree(cls.root, ignore_errors=True)
+
+    def wait_for(self, predicate, message):
+        deadline = time.time() + TIMEOUT
+        while time.time() < deadline:
+            if predicate():
+                return
+            time.sleep(0.2)
+        self.fail(message)
+
+    def wait_status(self, job_id, statuses):
+        self.wait_for(lambda: self.queue.get(job_id)["status"] in statuses, f"job {job_id} never reached {statuses}")
+        return self.queue.get(job_id)
+
+    def test_1_submit_and_result(self):
+        job_id = self.queue.submit("test", add, 2, 3, label="add")
+        job = self.queue.get(job_id)
+        self.assertEqual((job["kind"], job["label"], job["target"]), ("test", "add", f"{add.__module__}:add"))
+        job = self.wait_status(job_id, (jobs.DONE, jobs.FAILED))
+        self.assertEqual(job["status"], jobs.DONE, job["error"])
+        self.assertEqual(job["progress"], 1.0)
+        self.assertEqual(self.queue.result(job_id), {"sum": 5})
+        self.assertIn(job_id, [j["id"] for j in self.queue.list()])
+        self.assertIsNone(self.queue.get("missing"))
+
+    def test_2_failure(self):
+        job = self.wait_status(self.queue.submit("test", fail), (jobs.DONE, jobs.FAILED))
+        self.assertEqual(job["status"], jobs.FAILED)
+        self.assertIn("bad parameters", job["error"])
+
+    def test_3_cancel(self):
+        # the only slot is taken by the first job, so the second one stays queued
+        running_id = self.queue.submit("test", sleep_with_child, 60)
+        queued_id = self.queue.submit("test", add, 1, 1)
+        self.wait_for(lambda: self.queue.get(running_id)["message_fmt"].get("child"), "job never started its child")
+        self.assertEqual(self.queue.get(queued_id)["status"], jobs.QUEUED)
+
+        self.assertTrue(self.queue.cancel(queued_id))
+        self.assertEqual(self.queue.get(queued_id)["status"], jobs.CANCELLED)
+        self.assertFalse(self.queue.cancel(queued_id))
+
+        job = self.queue.get(running_id)
+        self.assertTrue(self.queue.cancel(running_id))
+        self.assertEqual(self.queue.get(running_id)["status"], jobs.CANCELLED)
+        self.wait_for(lambda: not _alive(job["pid"]), "cancelled job is still running")
+        if hasattr(os, "killpg"):
+            child = job["message_fmt"]["child"]
+            self.wait_for(lambda: not _alive(child), "child of the cancelled job is still running")
+
+        # the slot is free again
+        job = self.wait_status(self.queue.submit("test", add, 4, 4), (jobs.DONE, jobs.FAILED))
+        self.assertEqual(job["status"], jobs.DONE, job["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
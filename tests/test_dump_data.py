@@ -3,6 +3,7 @@
 
 
 import sys
+import json
 import shutil
 import unittest
 from pathlib import Path
@@ -14,7 +15,7 @@ from qlib.data import D
 
 sys.path.append(str(Path(__file__).resolve().parent.parent.joinpath("scripts")))
 from get_data import GetData
-from dump_bin import DumpDataAll, DumpDataFix
+from dump_bin import DumpDataAll, DumpDataFix, DumpDataUpdate
 
 
 DATA_DIR = Path(__file__).parent.joinpath("test_dump_data")
@@ -85,6 +86,117 @@ class TestDumpData(unittest.TestCase):
         self.assertEqual(len(df), len(TestDumpData.SIMPLE_DATA), "dump features simple failed")
         self.assertTrue(np.isclose(df.dropna(), self.SIMPLE_DATA.dropna()).all(), "dump features simple failed")
 
+    def test_5_dump_spill(self):
+        qlib_dir = DATA_DIR.joinpath("qlib_spill")
+        spill_dir = DATA_DIR.joinpath("spill")
+        DumpDataAll(csv_path=SOURCE_DIR, qlib_dir=qlib_dir, include_fields=self.FIELDS, spill_dir=spill_dir).dump()
+
+        self.assertListEqual(list(spill_dir.iterdir()), [], "spilled data not removed")
+        for bin_path in QLIB_DIR.joinpath("features").glob("*/*.bin"):
+            spill_bin_path = qlib_dir.joinpath(bin_path.relative_to(QLIB_DIR))
+            self.assertEqual(bin_path.read_bytes(), spill_bin_path.read_bytes(), "dump spill failed")
+
+    def test_6_dump_resume(self):
+        qlib_dir = DATA_DIR.joinpath("qlib_spill")
+        features_dir = qlib_dir.joinpath("features")
+        # a dump interrupted before the first stock: every other stock is recorded as done
+        with qlib_dir.joinpath(DumpDataAll.MANIFEST_FILE_NAME).open("w") as fp:
+            for symbol_dir in features_dir.iterdir():
+                bins = {p.name: p.stat().st_size for p in symbol_dir.glob("*.day.bin")}
+                fp.write(json.dumps({"symbol": symbol_dir.name, "status": "done", "bins": bins}) + "\n")
+        stock_dir = features_dir.joinpath(self.STOCK_NAMES[0].lower())
+        shutil.rmtree(str(stock_dir))
+        other_bin = next(features_dir.glob("*/close.day.bin"))
+        other_mtime = other_bin.stat().st_mtime_ns
+
+        DumpDataAll(csv_path=SOURCE_DIR, qlib_dir=qlib_dir, include_fields=self.FIELDS, resume=True).dump()
+
+        self.assertFalse(qlib_dir.joinpath(DumpDataAll.MANIFEST_FILE_NAME).exists(), "manifest not removed")
+        self.assertEqual(other_bin.stat().st_mtime_ns, other_mtime, "dump resume rewrote a finished stock")
+        for bin_path in QLIB_DIR.joinpath("features", stock_dir.name).glob("*.bin"):
+            self.assertEqual(
+                bin_path.read_bytes(), stock_dir.joinpath(bin_path.name).read_bytes(), "dump resume failed"
+            )
+
+    def test_7_dump_snapshot_backup(self):
+        qlib_dir = DATA_DIR.joinpath("qlib_spill")
+        backup_dir = DATA_DIR.joinpath("qlib_backup")
+        instruments_path = qlib_dir.joinpath("instruments", "all.txt")
+        instruments = instruments_path.read_bytes()
+        # old content that the dump rewrites: the snapshot must keep it
+        bin_path = qlib_dir.joinpath("features", self.STOCK_NAMES[0].lower(), "close.day.bin")
+        old_bin = bin_path.read_bytes()
+        old_bin = old_bin[:4] + bytes(len(old_bin) - 4)
+        bin_path.write_bytes(old_bin)
+        DumpDataFix(
+            csv_path=SOURCE_DIR,
+            qlib_dir=qlib_dir,
+            include_fields=self.FIELDS,
+            backup_dir=backup_dir,
+            backup_mode="snapshot",
+        ).dump()
+
+        backup_instruments_path = backup_dir.joinpath("instruments", "all.txt")
+        self.assertEqual(backup_instruments_path.read_bytes(), instruments, "snapshot backup modified")
+        self.assertNotEqual(
+            instruments_path.stat().st_ino, backup_instruments_path.stat().st_ino, "instruments not unshared"
+        )
+        backup_bin_path = backup_dir.joinpath(bin_path.relative_to(qlib_dir))
+        self.assertEqual(backup_bin_path.read_bytes(), old_bin, "snapshot backup of a rewritten bin modified")
+        self.assertEqual(
+            bin_path.read_bytes(),
+            QLIB_DIR.joinpath(bin_path.relative_to(qlib_dir)).read_bytes(),
+            "dump with snapshot backup failed",
+        )
+
+    def test_8_dump_update_resume(self):
+        stocks = sorted(SOURCE_DIR.glob("*.csv"))[:5]
+        for streaming in (False, True):
+            root = DATA_DIR.joinpath(f"update_{int(streaming)}")
+            old_dir, new_dir, bad_dir = (root.joinpath(name) for name in ("old", "new", "bad"))
+            for source_dir in (old_dir, new_dir, bad_dir):
+                source_dir.mkdir(parents=True)
+            for csv_path in stocks:
+                df = pd.read_csv(csv_path).sort_values("date")
+                df.iloc[:-5].to_csv(old_dir.joinpath(csv_path.name), index=False)
+                df.to_csv(new_dir.joinpath(csv_path.name), index=False)
+                if csv_path == stocks[0]:
+                    # the last field cannot be converted: the other fields are appended before the stock fails
+                    df["volume"] = df["volume"].astype(object)
+                    df.loc[df.index[-1], "volume"] = "bad"
+                df.to_csv(bad_dir.joinpath(csv_path.name), index=False)
+
+            reference_dir, qlib_dir = root.joinpath("reference"), root.joinpath("qlib")
+            for target_dir in (reference_dir, qlib_dir):
+                DumpDataAll(csv_path=old_dir, qlib_dir=target_dir, include_fields=self.FIELDS).dump()
+                # a field that the update does not write
+                for close_bin in target_dir.joinpath("features").glob("*/close.day.bin"):
+                    shutil.copy(str(close_bin), str(close_bin.with_name("factor.day.bin")))
+            DumpDataUpdate(
+                csv_path=new_dir, qlib_dir=reference_dir, include_fields=self.FIELDS, streaming=streaming
+            ).dump()
+
+            instruments_path = qlib_dir.joinpath("instruments", "all.txt")
+            instruments = instruments_path.read_bytes()
+            DumpDataUpdate(csv_path=bad_dir, qlib_dir=qlib_dir, include_fields=self.FIELDS, streaming=streaming).dump()
+            manifest_path = qlib_dir.joinpath(DumpDataUpdate.MANIFEST_FILE_NAME)
+            self.assertTrue(manifest_path.exists(), "manifest removed after a failed update")
+            # as if the update crashed before saving the instruments: every stock is submitted again
+            instruments_path.write_bytes(instruments)
+            with self.assertRaises(RuntimeError):
+                DumpDataUpdate(csv_path=new_dir, qlib_dir=qlib_dir, include_fields=self.FIELDS, streaming=streaming)()
+            DumpDataUpdate(
+                csv_path=new_dir, qlib_dir=qlib_dir, include_fields=self.FIELDS, streaming=streaming, resume=True
+            ).dump()
+
+            self.assertFalse(manifest_path.exists(), "manifest not removed")
+            for bin_path in reference_dir.joinpath("features").glob("*/*.bin"):
+                self.assertEqual(
+                    bin_path.read_bytes(),
+                    qlib_dir.joinpath(bin_path.relative_to(reference_dir)).read_bytes(),
+                    f"dump update resume failed: {bin_path.relative_to(reference_dir)}",
+                )
+
 
 if __name__ == "__main__":
     unittest.main()